@@ -9,7 +9,10 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from blueprint.routes import routes_bp
 from core.rich_logging import logger as log
-from constants import FLASK_APP, FLASK_ENV, FLASK_RUN_PORT
+from core.model_registry import registry, MODEL_FILES
+from core.prediction_table import get_table
+from model.smote_type import SmoteType
+from constants import FLASK_APP, FLASK_ENV, FLASK_RUN_PORT, PREDICTION_TABLES
 
 from flask import Flask, request
 from flask_cors import CORS
@@ -25,14 +28,23 @@ app.config["FLASK_RUN_PORT"] = FLASK_RUN_PORT
 
 app.register_blueprint(routes_bp)
 
+# NOTE: Load every model once at startup so no request pays for loading a model file
+registry.preload()
+
+if PREDICTION_TABLES:
+    # NOTE: Materialized before the gunicorn workers are forked, like the models
+    for model_name in MODEL_FILES[SmoteType.SMOTE]:
+        get_table(registry.get(SmoteType.SMOTE, model_name), registry.get_preprocessor(SmoteType.SMOTE))
+
 
 @app.before_request
 def before_request():
-    log.info(f"Request Received: {request.method} {request.url}")
+    log.info("Request Received: %s %s", request.method, request.url)
 
 
 if __name__ == "__main__":
+    # NOTE: Development server only, production serves `wsgi:app` with gunicorn (see run_prod.sh)
     time_in = datetime.datetime.now()
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    app.run(host='0.0.0.0', port=5000, debug=FLASK_ENV == "development")
     time_out = datetime.datetime.now() - time_in
     log.info(f"Application started in {time_out.total_seconds()} seconds.")
\ No newline at end of file
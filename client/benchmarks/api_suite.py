@@ -0,0 +1,258 @@
+"""
+Latency and throughput suite of the prediction API.
+
+Drives ``/api/v1/predict`` (SMOTE) and ``/api/v1/predict/smotenc`` for every deployed model, at
+several batch sizes and concurrency levels, with payloads sampled from the rows of
+``server/data/Sampled/Theft_Over_Open_Data_Sampled.csv``. Requests go through the Flask test
+client by default (offline), or to a running server with ``--url``.
+
+Every case reports throughput, latency percentiles and the per-stage timings (parse, lookup,
+featurize, inference, serialize) read from the ``Server-Timing`` header, which the API only sends
+with ``METRICS_ENABLED=true`` (set for the test client, required on a ``--url`` server). The JSON report has sorted keys and
+rounded values so two reports can be diffed, and ``--compare`` fails (exit code 1) when a case
+regressed by more than ``--tolerance`` against a previous report.
+
+Usage (from the ``client`` directory):
+    python benchmarks/api_suite.py [--output api_suite.json] [--compare baseline.json] [--quick]
+    python benchmarks/api_suite.py --url http://localhost:5000/api/v1
+"""
+import os
+import sys
+import json
+import time
+import random
+import logging
+import platform
+import argparse
+import datetime
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# NOTE: Read by the constants on import, the stage timings are only recorded with metrics enabled
+os.environ.setdefault("METRICS_ENABLED", "true")
+
+from core.model_registry import registry, MODEL_FILES
+from core.timing import parse_server_timing
+from model.smote_type import SmoteType
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+SAMPLED_CSV = os.path.join(ROOT, "server", "data", "Sampled", "Theft_Over_Open_Data_Sampled.csv")
+
+ENDPOINTS = {
+    SmoteType.SMOTE: "/predict",
+    SmoteType.SMOTENC: "/predict/smotenc"
+}
+STAGES = ["parse", "lookup", "featurize", "inference", "serialize"]
+BATCH_SIZES = [1, 10, 100, 1000]
+CONCURRENCY = [1, 4, 16]
+
+
+def load_rows(smote_type: SmoteType) -> list[dict]:
+    """
+    Returns the sampled rows as request records (raw labels), keeping only the rows the model can score.
+    """
+    preprocessor = registry.get_preprocessor(smote_type)
+    categoricals = [col for col in preprocessor.columns if col in preprocessor.label_encoders]
+
+    df = pd.read_csv(SAMPLED_CSV, usecols=preprocessor.columns, dtype={col: str for col in categoricals}).dropna()
+    for col in categoricals:
+        df = df[df[col].isin(set(map(str, preprocessor.label_encoders[col].classes_)))]
+
+    return df[preprocessor.columns].to_dict("records")
+
+
+class TestClientTransport:
+    """
+    Sends requests in-process through the Flask test client, one client per thread.
+    """
+
+    def __init__(self):
+        from app import app
+
+        self.__app = app
+        self.__local = threading.local()
+
+    def post(self, path: str, params: dict, payload: list[dict]) -> tuple[int, dict[str, float]]:
+        if not hasattr(self.__local, "client"):
+            self.__local.client = self.__app.test_client()
+
+        response = self.__local.client.post(f"/api/v1{path}", query_string=params, json=payload)
+        return response.status_code, parse_server_timing(response.headers.get("Server-Timing"))
+
+
+class HttpTransport:
+    """
+    Sends requests to a running server, over one keep-alive session per thread.
+    """
+
+    def __init__(self, url: str):
+        import requests
+
+        self.__requests = requests
+        self.__url = url.rstrip("/")
+        self.__local = threading.local()
+
+    def post(self, path: str, params: dict, payload: list[dict]) -> tuple[int, dict[str, float]]:
+        if not hasattr(self.__local, "session"):
+            self.__local.session = self.__requests.Session()
+
+        response = self.__local.session.post(f"{self.__url}{path}", params=params, json=payload)
+        return response.status_code, parse_server_timing(response.headers.get("Server-Timing"))
+
+
+def percentiles(values: list[float]) -> dict[str, float]:
+    values = np.asarray(values)
+    return {
+        "mean": round(float(values.mean()), 3),
+        "p50": round(float(np.percentile(values, 50)), 3),
+        "p95": round(float(np.percentile(values, 95)), 3),
+        "p99": round(float(np.percentile(values, 99)), 3)
+    }
+
+
+def run_case(transport, path: str, model_name: str, rows: list[dict],
+             batch_size: int, concurrency: int, requests: int, seed: int = 42) -> dict:
+    rng = random.Random(seed)
+    payloads = [[rng.choice(rows) for _ in range(batch_size)] for _ in range(min(requests, 16))]
+    params = {"model_name": model_name}
+
+    # NOTE: Warm up (threads, test clients, connections) before measuring
+    transport.post(path, params, payloads[0])
+
+    def send(index: int) -> tuple[float, int, dict[str, float]]:
+        time_in = time.perf_counter()
+        status, stages = transport.post(path, params, payloads[index % len(payloads)])
+        return (time.perf_counter() - time_in) * 1e3, status, stages
+
+    time_in = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(send, range(requests)))
+    seconds = time.perf_counter() - time_in
+
+    stages = {
+        stage: percentiles([timings[stage] for _, _, timings in results if stage in timings])
+        for stage in STAGES
+        if any(stage in timings for _, _, timings in results)
+    }
+
+    return {
+        "endpoint": f"/api/v1{path}",
+        "model": model_name,
+        "batch_size": batch_size,
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": sum(status != 200 for _, status, _ in results),
+        "requests_per_second": round(requests / seconds, 3),
+        "rows_per_second": round(requests * batch_size / seconds, 3),
+        "latency_ms": percentiles([latency for latency, _, _ in results]),
+        "stages_ms": stages
+    }
+
+
+def case_key(case: dict) -> str:
+    return f"{case['endpoint']} {case['model']} batch={case['batch_size']} concurrency={case['concurrency']}"
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Returns the cases whose p50 latency or throughput regressed by more than `tolerance` against `baseline`.
+    """
+    previous = {case_key(case): case for case in baseline["cases"]}
+    regressions = []
+
+    print(f"\n{'case':<78}{'p50 (ms)':>20}{'req/s':>20}")
+    for case in report["cases"]:
+        old = previous.get(case_key(case))
+        if old is None:
+            continue
+
+        p50, old_p50 = case["latency_ms"]["p50"], old["latency_ms"]["p50"]
+        rps, old_rps = case["requests_per_second"], old["requests_per_second"]
+        print(f"{case_key(case):<78}{f'{old_p50:.2f} -> {p50:.2f}':>20}{f'{old_rps:.1f} -> {rps:.1f}':>20}")
+
+        if p50 > old_p50 * (1 + tolerance) or rps < old_rps * (1 - tolerance):
+            regressions.append(case_key(case))
+
+    return regressions
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=ROOT, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=None, help="Benchmark a running server instead of the Flask test client")
+    parser.add_argument("--output", default="api_suite.json")
+    parser.add_argument("--requests", type=int, default=100, help="Requests per case")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=BATCH_SIZES)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=CONCURRENCY)
+    parser.add_argument("--quick", action="store_true", help="Only the Random Forest models, 30 requests per case")
+    parser.add_argument("--compare", default=None, help="Previous report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression")
+    parser.add_argument("--verbose", action="store_true", help="Keep the per-request logs of the API")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        # NOTE: The per-request Rich logs would dominate the in-process timings
+        logging.getLogger("rich").setLevel(logging.WARNING)
+
+    transport = HttpTransport(args.url) if args.url else TestClientTransport()
+    requests = 30 if args.quick else args.requests
+
+    cases = []
+    for smote_type, path in ENDPOINTS.items():
+        rows = load_rows(smote_type)
+        model_names = ["RandomForestClassifier"] if args.quick else sorted(MODEL_FILES[smote_type])
+
+        for model_name in model_names:
+            for batch_size in args.batch_sizes:
+                for concurrency in args.concurrency:
+                    case = run_case(transport, path, model_name, rows, batch_size, concurrency, requests)
+                    cases.append(case)
+
+                    print(f"{case_key(case):<78}{case['requests_per_second']:>10.1f} req/s"
+                          f"{case['latency_ms']['p50']:>10.2f} ms p50{case['latency_ms']['p99']:>10.2f} ms p99"
+                          f"{case['errors']:>6} errors")
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "transport": args.url or "flask-test-client",
+            "requests_per_case": requests
+        },
+        "cases": cases
+    }
+
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2, sort_keys=True)
+        file.write("\n")
+    print(f"\nWrote {len(cases)} cases to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(report, json.load(file), args.tolerance)
+
+        if regressions:
+            print(f"\n{len(regressions)} case(s) regressed by more than {args.tolerance:.0%}:")
+            for key in regressions:
+                print(f"  {key}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
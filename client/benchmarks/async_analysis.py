@@ -0,0 +1,70 @@
+"""
+Throughput of ``AsyncOpenRouterClient.analyze_many`` as concurrency grows.
+
+Runs a batch of distinct analyses against the local OpenRouter stub
+(``benchmarks/mock_openrouter.py``) at several concurrency limits, with the response cache
+disabled. ``--error-rate`` makes the stub answer a share of the requests with 429/503, to
+exercise the retries.
+
+Usage (from the ``client`` directory):
+    python benchmarks/async_analysis.py [--analyses 48] [--latency 0.25] [--error-rate 0.1]
+"""
+import os
+import sys
+import time
+import asyncio
+import logging
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+
+from core.async_orouter_client import AsyncOpenRouterClient
+from core.orouter_client import analysis_messages
+from mock_openrouter import MockSettings, start
+
+CONCURRENCY = [1, 2, 4, 8, 16, 32]
+
+
+async def run(base_url: str, analyses: int, concurrency: int) -> tuple[float, int]:
+    conversations = [
+        analysis_messages({"model": "rf_model_smotenc.pkl", "prediction": {"values": str(index % 2)}, "row": index},
+                          "RandomForestClassifier", "smotenc")
+        for index in range(analyses)
+    ]
+
+    async with AsyncOpenRouterClient(base_url=base_url, api_key="mock", max_connections=concurrency) as client:
+        time_in = time.perf_counter()
+        results = await client.analyze_many(conversations, concurrency=concurrency, use_cache=False)
+        seconds = time.perf_counter() - time_in
+
+    return seconds, sum(isinstance(result, Exception) for result in results)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--analyses", type=int, default=48)
+    parser.add_argument("--latency", type=float, default=0.25, help="Simulated seconds per completion")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    # NOTE: Per request logs would dominate the timings
+    logging.getLogger("rich").setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    server, base_url = start(settings=MockSettings(first_token_delay=args.latency, token_delay=0,
+                                                   error_rate=args.error_rate))
+
+    print(f"{'concurrency':>12}{'seconds':>10}{'analyses/s':>12}{'speedup':>10}{'failed':>8}")
+    baseline = None
+    for concurrency in CONCURRENCY:
+        seconds, failed = asyncio.run(run(base_url, args.analyses, concurrency))
+        baseline = baseline or seconds
+        print(f"{concurrency:>12}{seconds:>10.2f}{args.analyses / seconds:>12.1f}"
+              f"{baseline / seconds:>9.1f}x{failed:>8}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
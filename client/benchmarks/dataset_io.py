@@ -0,0 +1,78 @@
+"""
+Benchmark of loading the Theft Over dataset.
+
+Compares the previous ``pd.read_csv`` of every column against a projected ``read_csv`` and the
+Parquet copy (full and projected to the columns the pages use). Every method runs in a fresh
+process, so the peak RSS it reports is not hidden by an earlier, larger load.
+
+Usage (from the ``client`` directory):
+    python benchmarks/dataset_io.py [--csv ../server/data/Theft_Over_Open_Data_Cleaned.csv] [--repeat 5]
+"""
+import os
+import sys
+import time
+import argparse
+import resource
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.dataset import convert_dataset, CLEANED_CSV, MODEL_COLUMNS, MAP_COLUMNS
+from model.smote_type import SmoteType
+
+import pandas as pd
+
+# NOTE: Every column used by the two pages, i.e. the SMOTENC features, OFFENCE and the map tooltip
+PROJECTED_COLUMNS = list(dict.fromkeys(MODEL_COLUMNS[SmoteType.SMOTENC] + MAP_COLUMNS))
+
+
+def _load(method: str, csv_path: str, parquet_path: str) -> pd.DataFrame:
+    if method == "read_csv":
+        return pd.read_csv(csv_path)
+    if method == "read_csv (projected)":
+        return pd.read_csv(csv_path, usecols=PROJECTED_COLUMNS)
+    if method == "read_parquet":
+        return pd.read_parquet(parquet_path)
+    return pd.read_parquet(parquet_path, columns=PROJECTED_COLUMNS)
+
+
+def _measure(method: str, csv_path: str, parquet_path: str, repeat: int) -> tuple[float, float, float]:
+    # NOTE: ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+    unit = 1024 * 1024 if sys.platform == "darwin" else 1024
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / unit
+
+    seconds = []
+    for _ in range(repeat):
+        time_in = time.perf_counter()
+        df = _load(method, csv_path, parquet_path)
+        seconds.append(time.perf_counter() - time_in)
+
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / unit
+    return min(seconds), df.memory_usage(deep=True).sum() / 1e6, rss_after - rss_before
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", default=CLEANED_CSV)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    parquet_path = convert_dataset(args.csv)
+    print(f"CSV:     {os.path.getsize(args.csv) / 1e6:.1f} MB on disk")
+    print(f"Parquet: {os.path.getsize(parquet_path) / 1e6:.1f} MB on disk")
+    print(f"Projection: {PROJECTED_COLUMNS}\n")
+
+    print(f"{'method':<26}{'best (ms)':>12}{'frame (MB)':>12}{'peak RSS +MB':>14}")
+
+    context = multiprocessing.get_context("spawn")
+    for method in ["read_csv", "read_csv (projected)", "read_parquet", "read_parquet (projected)"]:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            seconds, frame_mb, rss_mb = executor.submit(_measure, method, args.csv, parquet_path,
+                                                        args.repeat).result()
+
+        print(f"{method:<26}{seconds * 1e3:>12.1f}{frame_mb:>12.2f}{rss_mb:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
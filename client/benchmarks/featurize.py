@@ -0,0 +1,79 @@
+"""
+Micro-benchmark of request featurization.
+
+Compares the NumPy fast path (``Preprocessor.featurize``) against the pandas path at batch
+sizes of 1, 100 and 10,000 records, for both the SMOTE and the SMOTENC feature sets.
+
+The ``legacy`` column is the featurization the predict routes used to do per request
+(``pd.get_dummies`` + ``StandardScaler().fit_transform`` + ``pd.DataFrame``).
+
+Usage (from the ``client`` directory, after the notebooks exported the preprocessors):
+    python benchmarks/featurize.py [--repeat 20]
+"""
+import os
+import sys
+import random
+import argparse
+import timeit
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.model_registry import registry
+from model.smote_type import SmoteType
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+BATCH_SIZES = [1, 100, 10_000]
+
+
+def make_records(preprocessor, size: int, seed: int = 42) -> list[dict]:
+    rng = random.Random(seed)
+    n_classes = {col: len(encoder.classes_) for col, encoder in preprocessor.label_encoders.items()}
+
+    return [
+        {
+            col: rng.randrange(n_classes[col]) if col in n_classes else rng.uniform(-80, 80)
+            for col in preprocessor.columns
+        }
+        for _ in range(size)
+    ]
+
+
+def legacy_featurize(records: list[dict]) -> pd.DataFrame:
+    query = pd.get_dummies(pd.DataFrame(records))
+    return pd.DataFrame(StandardScaler().fit_transform(query))
+
+
+def best_of(func, records, repeat: int) -> float:
+    number = max(1, 1000 // len(records))
+    return min(timeit.repeat(lambda: func(records), number=number, repeat=repeat)) / number
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'features':<10}{'batch':>8}{'legacy (ms)':>14}{'pandas (ms)':>14}{'numpy (ms)':>14}{'speedup':>10}")
+
+    for smote_type in SmoteType:
+        preprocessor = registry.get_preprocessor(smote_type)
+
+        for size in BATCH_SIZES:
+            records = make_records(preprocessor, size)
+
+            # NOTE: Both paths must agree before their timings mean anything
+            np.testing.assert_array_equal(preprocessor.featurize(records), preprocessor.transform(records).to_numpy())
+
+            legacy = best_of(legacy_featurize, records, args.repeat)
+            pandas_path = best_of(preprocessor.transform, records, args.repeat)
+            numpy_path = best_of(preprocessor.featurize, records, args.repeat)
+
+            print(f"{smote_type.value[0]:<10}{size:>8}{legacy * 1e3:>14.3f}{pandas_path * 1e3:>14.3f}"
+                  f"{numpy_path * 1e3:>14.3f}{pandas_path / numpy_path:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
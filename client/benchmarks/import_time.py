@@ -0,0 +1,94 @@
+"""
+Startup budget of the API import graph.
+
+Imports the production entry point (``wsgi``, which also preloads every model) in a fresh
+interpreter with ``python -X importtime`` and reports the total import time, the number of
+modules and the slowest top level imports. Exits with code 1 when:
+
+    - a UI or LLM module (Streamlit, plotting, the OpenAI SDK, ...) is part of the graph,
+    - with MODEL_FORMAT=npz, sklearn, scipy or pandas is part of the graph,
+    - the graph has more than ``--max-modules`` modules,
+    - the best of ``--repeat`` runs takes longer than ``--budget-ms`` milliseconds.
+
+The default budgets are the baseline of the served format plus a margin: about 530 modules in
+450 ms with the .npz models, about 1900 modules in 2.5 s when the pickles (and sklearn) are loaded.
+
+Usage (from the ``client`` directory):
+    python benchmarks/import_time.py [--module wsgi] [--budget-ms 1000] [--max-modules 700] [--repeat 3]
+"""
+import os
+import sys
+import argparse
+import subprocess
+
+CLIENT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(CLIENT_DIR)
+
+from constants import MODEL_FORMAT
+
+# NOTE: Only needed by the Streamlit pages or by /summarize, which imports them on first use
+FORBIDDEN = ["streamlit", "matplotlib", "seaborn", "pydeck", "plotly", "openai", "httpx", "tiktoken"]
+
+# NOTE: Only needed to unpickle the models, or by the nearby index and the datasets, which are imported on first use
+NPZ_FORBIDDEN = ["sklearn", "scipy", "pandas"]
+
+# NOTE: (milliseconds, modules) of the served format, see the module docstring
+BUDGETS = {
+    "npz": (1000, 700),
+    "pickle": (3000, 2100)
+}
+
+
+def import_times(module: str) -> list[tuple[int, int, str]]:
+    """
+    Returns (cumulative microseconds, depth, module) of every module imported by `import module`.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=CLIENT_DIR,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line.split(":", 1)[1].split("|")
+        rows.append((int(cumulative), (len(name) - len(name.lstrip()) - 1) // 2, name.strip()))
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="wsgi", help="Module to import (e.g. wsgi or blueprint.routes)")
+    parser.add_argument("--budget-ms", type=float, default=BUDGETS[MODEL_FORMAT][0])
+    parser.add_argument("--max-modules", type=int, default=BUDGETS[MODEL_FORMAT][1])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list")
+    args = parser.parse_args()
+
+    runs = [import_times(args.module) for _ in range(args.repeat)]
+    rows = min(runs, key=lambda run: sum(cumulative for cumulative, depth, _ in run if depth == 0))
+    total_ms = sum(cumulative for cumulative, depth, _ in rows if depth == 0) / 1e3
+    packages = {name.split(".")[0] for _, _, name in rows}
+
+    print(f"Slowest imports of `import {args.module}` (best of {args.repeat}):")
+    for cumulative, depth, name in sorted(rows, reverse=True)[:args.top]:
+        print(f"{cumulative / 1e3:>10.1f} ms  {'  ' * depth}{name}")
+
+    print(f"\n{'total':<10}{total_ms:>10.1f} ms   (budget {args.budget_ms:.0f} ms)")
+    print(f"{'modules':<10}{len(rows):>10}      (budget {args.max_modules})")
+
+    forbidden = FORBIDDEN + (NPZ_FORBIDDEN if MODEL_FORMAT == "npz" else [])
+    failures = [f"{name} is imported" for name in forbidden if name in packages]
+    if len(rows) > args.max_modules:
+        failures.append(f"{len(rows)} modules exceed the budget of {args.max_modules}")
+    if total_ms > args.budget_ms:
+        failures.append(f"{total_ms:.0f} ms exceeds the budget of {args.budget_ms:.0f} ms")
+
+    if failures:
+        print("\nImport budget exceeded:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Load test of ``/api/v1/predict`` under the production server.
+
+For every worker count, starts ``gunicorn -c gunicorn.conf.py wsgi:app`` on a free port, waits
+for the models to be preloaded, then keeps ``--concurrency`` keep-alive connections busy for
+``--duration`` seconds and reports requests/sec and latency percentiles. The load is generated
+from separate processes so the client is not limited by the GIL. ``--url`` tests an already
+running server instead.
+
+Usage (from the ``client`` directory):
+    python benchmarks/load_test.py [--workers 1 4 16] [--threads 2] [--concurrency 32] [--duration 10]
+"""
+import os
+import sys
+import time
+import socket
+import argparse
+import subprocess
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+CLIENT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# NOTE: Label encoded SMOTE features, i.e. what the dashboard sends
+PAYLOAD = [{"LOCATION_TYPE": 12, "PREMISES_TYPE": 3}, {"LOCATION_TYPE": 4, "PREMISES_TYPE": 1}]
+PARAMS = {"model_name": "RandomForestClassifier"}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workers: int, threads: int) -> tuple[subprocess.Popen, str]:
+    port = free_port()
+    env = {
+        **os.environ,
+        "GUNICORN_BIND": f"127.0.0.1:{port}",
+        "GUNICORN_WORKERS": str(workers),
+        "GUNICORN_THREADS": str(threads),
+        "GUNICORN_LOG_LEVEL": "warning"
+    }
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "wsgi:app"],
+        cwd=CLIENT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+    url = f"http://127.0.0.1:{port}/api/v1"
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        try:
+            if requests.get(f"{url}/", timeout=1).status_code == 200:
+                return process, url
+        except requests.RequestException:
+            time.sleep(0.25)
+
+    process.kill()
+    raise RuntimeError(f"gunicorn did not start with {workers} workers")
+
+
+def _client(url: str, connections: int, duration: float) -> tuple[list[float], int]:
+    deadline = time.perf_counter() + duration
+
+    def connection() -> tuple[list[float], int]:
+        latencies, errors = [], 0
+        with requests.Session() as session:
+            while time.perf_counter() < deadline:
+                time_in = time.perf_counter()
+                response = session.post(f"{url}/predict", params=PARAMS, json=PAYLOAD)
+                latencies.append(time.perf_counter() - time_in)
+                errors += response.status_code != 200
+        return latencies, errors
+
+    with ThreadPoolExecutor(max_workers=connections) as executor:
+        results = list(executor.map(lambda _: connection(), range(connections)))
+
+    return [latency for latencies, _ in results for latency in latencies], sum(errors for _, errors in results)
+
+
+def load(url: str, concurrency: int, duration: float, processes: int) -> dict:
+    # NOTE: Warm up every worker and connection before measuring
+    _client(url, concurrency, 1)
+
+    per_process = [concurrency // processes + (index < concurrency % processes) for index in range(processes)]
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        results = list(executor.map(_client, [url] * processes, per_process, [duration] * processes))
+
+    latencies = np.array([latency for result, _ in results for latency in result]) * 1e3
+    return {
+        "requests": len(latencies),
+        "errors": sum(errors for _, errors in results),
+        "rps": len(latencies) / duration,
+        "p50": float(np.percentile(latencies, 50)),
+        "p95": float(np.percentile(latencies, 95)),
+        "p99": float(np.percentile(latencies, 99))
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--threads", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent keep-alive connections")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds of load per run")
+    parser.add_argument("--processes", type=int, default=min(4, os.cpu_count() or 1),
+                        help="Processes generating the load")
+    parser.add_argument("--url", default=None, help="Test a running server (e.g. http://localhost:5000/api/v1)")
+    args = parser.parse_args()
+
+    print(f"{'workers':>8}{'threads':>9}{'requests':>10}{'errors':>8}{'req/s':>10}"
+          f"{'p50 (ms)':>10}{'p95 (ms)':>10}{'p99 (ms)':>10}")
+
+    runs = [(None, None)] if args.url else [(workers, args.threads) for workers in args.workers]
+    for workers, threads in runs:
+        process, url = (None, args.url) if args.url else start_server(workers, threads)
+
+        try:
+            report = load(url, args.concurrency, args.duration, args.processes)
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+
+        print(f"{workers or '-':>8}{threads or '-':>9}{report['requests']:>10}{report['errors']:>8}"
+              f"{report['rps']:>10.1f}{report['p50']:>10.1f}{report['p95']:>10.1f}{report['p99']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
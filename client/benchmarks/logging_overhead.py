@@ -0,0 +1,101 @@
+"""
+Per-request overhead of the API logging.
+
+Sends ``/api/v1/predict`` requests through the Flask test client, in one subprocess per logging
+configuration (the logging is configured from the environment on import), with the log output
+written to /dev/null:
+
+    off         LOG_LEVEL=WARNING, the baseline without request logs
+    rich-full   Rich handler, whole payloads (what every request paid before LOG_FORMAT existed)
+    rich        Rich handler, payloads truncated to LOG_PAYLOAD_MAX_CHARS
+    json        JSON lines written by the queue listener thread, payloads truncated
+    json-10%    as json, with payloads logged for LOG_PAYLOAD_SAMPLE_RATE=0.1 of the requests
+
+The overhead of a configuration is its time per request minus the one of ``off``.
+
+Usage (from the ``client`` directory):
+    python benchmarks/logging_overhead.py [--requests 500] [--batch-sizes 1 100 1000]
+"""
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import tempfile
+import subprocess
+
+CLIENT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+MODES = {
+    "off": {"LOG_LEVEL": "WARNING"},
+    "rich-full": {"LOG_FORMAT": "rich", "LOG_PAYLOAD_MAX_CHARS": str(2 ** 31)},
+    "rich": {"LOG_FORMAT": "rich"},
+    "json": {"LOG_FORMAT": "json"},
+    "json-10%": {"LOG_FORMAT": "json", "LOG_PAYLOAD_SAMPLE_RATE": "0.1"}
+}
+
+
+def measure(requests: int, batch_size: int, output: str) -> None:
+    """
+    Runs in the subprocess: times `requests` predictions of `batch_size` rows and writes ms/request to `output`.
+    """
+    sys.path.append(CLIENT_DIR)
+    from app import app
+
+    rng = random.Random(42)
+    payload = [{"LOCATION_TYPE": rng.randrange(17), "PREMISES_TYPE": rng.randrange(7)} for _ in range(batch_size)]
+    client = app.test_client()
+
+    for _ in range(20):
+        client.post("/api/v1/predict", query_string={"model_name": "LogisticRegression"}, json=payload)
+
+    time_in = time.perf_counter()
+    for _ in range(requests):
+        client.post("/api/v1/predict", query_string={"model_name": "LogisticRegression"}, json=payload)
+    seconds = time.perf_counter() - time_in
+
+    # NOTE: Includes draining the listener's queue, so the json modes do not hide work
+    logging.shutdown()
+    with open(output, "w") as file:
+        json.dump({"ms_per_request": seconds / requests * 1e3}, file)
+
+
+def run(mode: str, requests: int, batch_size: int) -> float:
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as file:
+        output = file.name
+
+    env = {**os.environ, "LOG_FORMAT": "rich", "LOG_LEVEL": "INFO", **MODES[mode]}
+    try:
+        subprocess.run([sys.executable, __file__, "--child", str(requests), str(batch_size), output],
+                       cwd=CLIENT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        with open(output) as file:
+            return json.load(file)["ms_per_request"]
+    finally:
+        os.remove(output)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 100, 1000])
+    parser.add_argument("--child", nargs=3, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        requests, batch_size, output = args.child
+        measure(int(requests), int(batch_size), output)
+        return
+
+    print(f"{'rows':>6}{'mode':>12}{'ms/request':>14}{'overhead (ms)':>16}")
+    for batch_size in args.batch_sizes:
+        baseline = None
+        for mode in MODES:
+            ms = run(mode, args.requests, batch_size)
+            baseline = ms if baseline is None else baseline
+            print(f"{batch_size:>6}{mode:>12}{ms:>14.3f}{ms - baseline:>16.3f}")
+
+
+if __name__ == "__main__":
+    main()
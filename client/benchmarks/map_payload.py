@@ -0,0 +1,104 @@
+"""
+Payload of the incident map of the SMOTENC page, per map detail.
+
+For the scatter layer of every incident (``Incidents``) and the hexagon layers (``City``,
+``District``, ``Street``), reports the rows and the bytes of the deck JSON that
+``st.pydeck_chart`` sends to the browser on every rerun, the time to build the layer data
+(first build, then from the cache) and to serialize the deck.
+
+``--scale N`` replays the comparison on N jittered copies of the incidents, to estimate the
+payload of a longer history than the one in ``server/data``.
+
+Usage (from the ``client`` directory):
+    python benchmarks/map_payload.py [--repeat 5] [--scale 10]
+"""
+import os
+import sys
+import time
+import argparse
+from unittest import mock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core import map_layers
+from core.dataset import load_toodu_map, MAP_COLUMNS
+
+import numpy as np
+import pandas as pd
+
+DETAILS = {
+    "Incidents": None,
+    "City": 10,
+    "District": 12,
+    "Street": 14
+}
+
+
+def scaled_map(scale: int, seed: int = 42) -> pd.DataFrame:
+    """
+    Returns `scale` copies of the map incidents, each moved by up to ~250 meters.
+    """
+    rng = np.random.default_rng(seed)
+    toodu_df_map = load_toodu_map(MAP_COLUMNS)
+    copies = []
+    for _ in range(scale):
+        copy = toodu_df_map.copy()
+        copy["LONG_WGS84"] += rng.uniform(-0.003, 0.003, len(copy))
+        copy["LAT_WGS84"] += rng.uniform(-0.002, 0.002, len(copy))
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
+
+
+def measure(zoom: int | None, repeat: int) -> dict:
+    map_layers._build_hexagons.cache_clear()
+    map_layers._build_deck.cache_clear()
+
+    time_in = time.perf_counter()
+    deck = map_layers.build_deck(zoom)
+    first_ms = (time.perf_counter() - time_in) * 1e3
+
+    build_ms, serialize_ms = [], []
+    for _ in range(repeat):
+        time_in = time.perf_counter()
+        deck = map_layers.build_deck(zoom)
+        build_ms.append((time.perf_counter() - time_in) * 1e3)
+
+        time_in = time.perf_counter()
+        payload = deck.to_json()
+        serialize_ms.append((time.perf_counter() - time_in) * 1e3)
+
+    return {
+        "rows": len(deck.layers[0].data),
+        "bytes": len(payload.encode()),
+        "first_ms": first_ms,
+        "build_ms": float(np.median(build_ms)),
+        "serialize_ms": float(np.median(serialize_ms))
+    }
+
+
+def report(repeat: int) -> None:
+    print(f"{'detail':<12}{'rows':>9}{'payload':>12}{'first build':>14}{'cached build':>14}{'to_json':>12}")
+    for name, zoom in DETAILS.items():
+        result = measure(zoom, repeat)
+        print(f"{name:<12}{result['rows']:>9}{result['bytes'] / 1024:>9.1f} KB"
+              f"{result['first_ms']:>11.1f} ms{result['build_ms']:>11.1f} ms{result['serialize_ms']:>9.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scale", type=int, default=1, help="Jittered copies of the incidents")
+    args = parser.parse_args()
+
+    print(f"{len(load_toodu_map(MAP_COLUMNS))} incidents")
+    report(args.repeat)
+
+    if args.scale > 1:
+        toodu_df_map = scaled_map(args.scale)
+        print(f"\n{len(toodu_df_map)} incidents ({args.scale} jittered copies)")
+        with mock.patch.object(map_layers, "load_toodu_map", lambda columns=None: toodu_df_map):
+            report(args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Local stub of the OpenRouter chat completions API (OpenAI compatible), for benchmarks and manual checks.
+
+``POST /api/v1/chat/completions`` answers with a canned analysis, either as a single JSON body or,
+when the request has ``"stream": true``, as Server-Sent Events in the OpenAI chunk format. Latency
+is simulated with a delay before the first token and a delay between tokens, and a share of the
+requests can be answered with 429 or 503 errors.
+
+Usage (from the ``client`` directory):
+    python benchmarks/mock_openrouter.py [--port 8765] [--first-token-delay 0.4] [--token-delay 0.02]
+
+Then point the client to it:
+    OPENROUTER_API_URL=http://127.0.0.1:8765/api/v1 streamlit run app_streamlit.py
+"""
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+DEFAULT_CONTENT = """### Confidence Analysis
+The model is **confident** in its prediction, as the predicted probability is well above the threshold.
+
+### Insights
+The location and premises types of the entries are **strongly associated** with Theft Over incidents.
+
+### Operational Insights
+Analysts should prioritize patrols around the predicted premises types during the reported hours.
+"""
+
+
+class MockSettings:
+    def __init__(self,
+                 first_token_delay: float = 0.4,
+                 token_delay: float = 0.02,
+                 error_rate: float = 0.0,
+                 content: str = DEFAULT_CONTENT):
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.error_rate = error_rate
+        self.content = content
+        self.requests = 0
+        self.lock = threading.Lock()
+
+
+def tokenize(content: str) -> list[str]:
+    # NOTE: Roughly one token per word, whitespace is kept with the word that follows it
+    tokens, start = [], 0
+    for index in range(1, len(content)):
+        if content[index].isspace() and not content[index - 1].isspace():
+            tokens.append(content[start:index])
+            start = index
+    tokens.append(content[start:])
+    return tokens
+
+
+def make_handler(settings: MockSettings):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args) -> None:
+            pass
+
+        def __send_json(self, status: int, body: dict) -> None:
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_POST(self) -> None:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+
+            with settings.lock:
+                settings.requests += 1
+
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self.__send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+                return
+
+            if random.random() < settings.error_rate:
+                status = random.choice([429, 503])
+                self.__send_json(status, {"error": {"message": "Simulated upstream error", "code": status}})
+                return
+
+            completion_id = f"chatcmpl-mock-{settings.requests}"
+            created = int(time.time())
+            model = request.get("model") or "mock/model"
+            time.sleep(settings.first_token_delay)
+
+            if not request.get("stream"):
+                tokens = tokenize(settings.content)
+                time.sleep(settings.token_delay * (len(tokens) - 1))
+                self.__send_json(200, {
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": created,
+                    "model": model,
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": settings.content},
+                        "finish_reason": "stop"
+                    }],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": len(tokens), "total_tokens": len(tokens)}
+                })
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+
+            def send_chunk(delta: dict, finish_reason: str | None = None) -> None:
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+                }
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.flush()
+
+            send_chunk({"role": "assistant", "content": ""})
+            for index, token in enumerate(tokenize(settings.content)):
+                if index:
+                    time.sleep(settings.token_delay)
+                send_chunk({"content": token})
+
+            send_chunk({}, finish_reason="stop")
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+            self.close_connection = True
+
+    return Handler
+
+
+class MockServer(ThreadingHTTPServer):
+    # NOTE: The default backlog of 5 connections would throttle the concurrency benchmarks
+    request_queue_size = 256
+    daemon_threads = True
+
+
+def start(port: int = 0, settings: MockSettings = None) -> tuple[ThreadingHTTPServer, str]:
+    """
+    Starts the stub in a daemon thread and returns the server with its base URL (``.../api/v1``).
+    """
+    server = MockServer(("127.0.0.1", port), make_handler(settings or MockSettings()))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/api/v1"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--first-token-delay", type=float, default=0.4)
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with 429/503")
+    args = parser.parse_args()
+
+    settings = MockSettings(args.first_token_delay, args.token_delay, args.error_rate)
+    server = MockServer(("127.0.0.1", args.port), make_handler(settings))
+
+    print(f"Mock OpenRouter API listening on http://127.0.0.1:{args.port}/api/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Latency of the spatial index behind ``/api/v1/incidents/nearby``.
+
+Builds the KD-tree over the incidents of the filtered dataset, then times k-nearest, radius
+and neighbourhood (HOOD_158) queries at random points of the area covered by the incidents.
+Exits with code 1 if the p99 of a query type is not under ``--budget-us`` microseconds.
+
+Usage (from the ``client`` directory):
+    python benchmarks/nearby.py [--queries 5000] [--k 10] [--radius 500] [--budget-us 1000]
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.dataset import load_toodu_map
+from core.spatial_index import get_index
+
+import numpy as np
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--radius", type=float, default=500, help="Meters")
+    parser.add_argument("--budget-us", type=float, default=1000, help="p99 budget of every query type")
+    args = parser.parse_args()
+
+    time_in = time.perf_counter()
+    index = get_index()
+    print(f"Indexed {len(index)} incidents in {(time.perf_counter() - time_in) * 1e3:.1f} ms\n")
+
+    coordinates = load_toodu_map(["LONG_WGS84", "LAT_WGS84"])
+    rng = np.random.default_rng(42)
+    lons = rng.uniform(coordinates["LONG_WGS84"].min(), coordinates["LONG_WGS84"].max(), args.queries)
+    lats = rng.uniform(coordinates["LAT_WGS84"].min(), coordinates["LAT_WGS84"].max(), args.queries)
+
+    queries = {
+        f"nearest k={args.k}": lambda lon, lat: index.nearest(lon, lat, args.k),
+        f"within {args.radius:.0f} m": lambda lon, lat: index.within(lon, lat, args.radius, limit=args.k),
+        "neighbourhood": lambda lon, lat: index.neighbourhood(lon, lat)
+    }
+
+    failures = []
+    print(f"{'query':<18}{'p50 (us)':>10}{'p99 (us)':>10}")
+    for name, query in queries.items():
+        latencies = []
+        for lon, lat in zip(lons, lats):
+            time_in = time.perf_counter()
+            query(lon, lat)
+            latencies.append((time.perf_counter() - time_in) * 1e6)
+
+        p50, p99 = np.percentile(latencies, [50, 99])
+        print(f"{name:<18}{p50:>10.1f}{p99:>10.1f}")
+        if p99 >= args.budget_us:
+            failures.append(name)
+
+    if failures:
+        print(f"\nOver the budget of {args.budget_us:.0f} us: {', '.join(failures)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Exactness and latency of the materialized SMOTE predictions (``PREDICTION_TABLES=true``).
+
+For every SMOTE model, materializes the prediction table and checks that every cell is exactly
+(bit for bit) the ``predict_proba`` of the live path for a one row request, with the request sent
+as encoded ints and as raw labels, and that the labels match at the model's threshold. The
+largest difference to a single batched ``predict_proba`` over the whole grid is reported too:
+batched linear models can differ from the row by row results in the last bit. Then times
+encoding plus inference through the table and live, per batch size.
+
+Exits with code 1 if any cell of a table differs from the live prediction.
+
+Usage (from the ``client`` directory):
+    python benchmarks/prediction_tables.py [--batch-sizes 1 100 1000] [--repeat 200]
+"""
+import os
+import sys
+import time
+import random
+import logging
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.inference import predict_with_threshold, labels_from_probabilities
+from core.model_registry import registry, MODEL_FILES
+from core.prediction_table import PredictionTable
+from model.smote_type import SmoteType
+
+import numpy as np
+
+
+def grid_records(preprocessor, labels: bool) -> list[dict]:
+    """
+    Returns one request record per cell of the table, in the table's row-major order.
+    """
+    shape = [len(preprocessor.label_codes[col]) for col in preprocessor.columns]
+    decode = {col: list(codes) for col, codes in preprocessor.label_codes.items()}
+
+    return [
+        {col: decode[col][code] if labels else code for col, code in zip(preprocessor.columns, codes)}
+        for codes in np.ndindex(*shape)
+    ]
+
+
+def check(model, preprocessor, table: PredictionTable, threshold: float) -> bool:
+    flat = table.probabilities.reshape(-1, len(table.classes))
+    exact = True
+
+    for labels in (False, True):
+        live = np.vstack([model.predict_proba(preprocessor.featurize([record]))
+                          for record in grid_records(preprocessor, labels)])
+        codes = preprocessor.encode(grid_records(preprocessor, labels))
+
+        same_cells = np.array_equal(table.lookup(codes), live)
+        same_labels = all(np.array_equal(a, b) for a, b in zip(
+            labels_from_probabilities(model.classes_, table.lookup(codes), threshold),
+            labels_from_probabilities(model.classes_, live, threshold)
+        ))
+        print(f"  {'raw labels' if labels else 'encoded ints':<14} cells {'exact' if same_cells else 'DIFFER'}, "
+              f"labels {'equal' if same_labels else 'DIFFER'}")
+        exact &= same_cells and same_labels
+
+    batched = model.predict_proba(preprocessor.featurize(grid_records(preprocessor, False)))
+    print(f"  {'batched':<14} max |table - predict_proba(grid)| = {np.abs(flat - batched).max():.3g}")
+    return exact
+
+
+def timings(model, preprocessor, table: PredictionTable, threshold: float, batch_size: int, repeat: int) -> tuple:
+    rng = random.Random(42)
+    records = grid_records(preprocessor, False)
+    payload = [rng.choice(records) for _ in range(batch_size)]
+
+    def lookup():
+        return labels_from_probabilities(model.classes_, table.lookup(preprocessor.encode(payload)), threshold)
+
+    def live():
+        return predict_with_threshold(model, preprocessor.featurize(payload), threshold)
+
+    results = []
+    for func in (lookup, live):
+        func()
+        time_in = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        results.append((time.perf_counter() - time_in) / repeat * 1e6)
+    return tuple(results)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    logging.getLogger("rich").setLevel(logging.WARNING)
+
+    preprocessor = registry.get_preprocessor(SmoteType.SMOTE)
+    exact = True
+    rows = []
+
+    for model_name in MODEL_FILES[SmoteType.SMOTE]:
+        model = registry.get(SmoteType.SMOTE, model_name)
+        threshold = registry.get_threshold(SmoteType.SMOTE, model_name)
+        table = PredictionTable.build(model, preprocessor)
+
+        print(f"{model_name}: table {table.probabilities.shape}, {table.nbytes} bytes, "
+              f"built in {table.build_seconds * 1e3:.1f} ms")
+        exact &= check(model, preprocessor, table, threshold)
+
+        for batch_size in args.batch_sizes:
+            rows.append((model_name, batch_size, *timings(model, preprocessor, table, threshold,
+                                                          batch_size, args.repeat)))
+
+    print(f"\n{'model':<26}{'rows':>6}{'table (us)':>12}{'live (us)':>12}{'speedup':>9}")
+    for model_name, batch_size, lookup_us, live_us in rows:
+        print(f"{model_name:<26}{batch_size:>6}{lookup_us:>12.1f}{live_us:>12.1f}{live_us / lookup_us:>8.1f}x")
+
+    if not exact:
+        print("\nThe materialized predictions differ from the live predictions.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Size of the analysis prompt as the number of predicted rows grows.
+
+Builds the analysis messages for predict responses of 1 to 1,000,000 rows and compares the
+input tokens (system prompt included) of the compact prompt against the previous prompt,
+which embedded the raw response. Fails if the compact prompt is not O(1) in the number of rows.
+
+Usage (from the ``client`` directory):
+    python benchmarks/prompt_size.py
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.orouter_client import analysis_messages, DEFAULT_SYSTEM_PROMPT
+from core.prompt import count_tokens
+
+import numpy as np
+
+ROWS = [1, 10, 100, 1_000, 10_000, 100_000, 1_000_000]
+
+# NOTE: Only the row and class counts may change (their digits, and a class missing from tiny batches)
+MAX_SPREAD = 12
+
+
+def make_response(rows: int, seed: int = 42) -> dict:
+    confidences = np.random.default_rng(seed).random(rows)
+    return {
+        "status": 200,
+        "prediction": {
+            "values": ", ".join(map(str, (confidences > 0.5).astype(int))),
+            "confidence": float(confidences[0]),
+            "confidences": confidences.tolist(),
+            "threshold": 0.5
+        },
+        "model": "rf_model_smotenc.pkl",
+        "timestamp": "Tue, 10 Dec 2024 23:41:16 GMT"
+    }
+
+
+def main() -> None:
+    system_tokens = count_tokens(DEFAULT_SYSTEM_PROMPT)
+    print(f"{'rows':>10}{'raw payload tokens':>20}{'compact tokens':>16}{'build (ms)':>12}")
+
+    sizes = []
+    for rows in ROWS:
+        response = make_response(rows)
+
+        time_in = time.perf_counter()
+        messages = analysis_messages(response, "RandomForestClassifier", "smotenc")
+        seconds = time.perf_counter() - time_in
+
+        sizes.append(system_tokens + count_tokens(messages[0]["content"]))
+        raw = system_tokens + count_tokens(str(response)) if rows <= 10_000 else None
+
+        print(f"{rows:>10}{raw if raw is not None else 'n/a':>20}{sizes[-1]:>16}{seconds * 1e3:>12.2f}")
+
+    assert max(sizes) - min(sizes) <= MAX_SPREAD, f"Prompt size grows with the number of rows: {sizes}"
+    print(f"\nOK: compact prompt stays within {min(sizes)}-{max(sizes)} tokens from {ROWS[0]} to {ROWS[-1]:,} rows")
+
+
+if __name__ == "__main__":
+    main()
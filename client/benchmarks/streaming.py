@@ -0,0 +1,71 @@
+"""
+Time to first visible token of the prediction analysis, blocking vs streaming.
+
+Runs ``OpenRouterClient.create_chat_completion`` and ``OpenRouterClient.stream_chat_completion``
+against the local OpenRouter stub (``benchmarks/mock_openrouter.py``), with the response cache
+disabled, and checks that both return the same content.
+
+Usage (from the ``client`` directory):
+    python benchmarks/streaming.py [--runs 5] [--first-token-delay 0.4] [--token-delay 0.02]
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+
+from core.orouter_client import OpenRouterClient
+from mock_openrouter import MockSettings, start
+
+from openai import OpenAI
+
+MESSAGES = [{
+    "role": "user",
+    "content": "The predictive model used is `RandomForestClassifier`. Here is the JSON data you will make an "
+               "analysis on: {'model': 'rf_model_smotenc.pkl', 'prediction': {'values': '1', 'confidence': 0.93}}"
+}]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--first-token-delay", type=float, default=0.4)
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    args = parser.parse_args()
+
+    server, base_url = start(settings=MockSettings(args.first_token_delay, args.token_delay))
+    client = OpenRouterClient()
+    client.client = OpenAI(base_url=base_url, api_key="mock")
+
+    blocking_first, streaming_first, blocking_total, streaming_total = [], [], [], []
+    for _ in range(args.runs):
+        time_in = time.perf_counter()
+        content = client.create_chat_completion(MESSAGES, use_cache=False)
+        blocking_total.append(time.perf_counter() - time_in)
+        # NOTE: Nothing is visible until the whole completion was received
+        blocking_first.append(blocking_total[-1])
+
+        deltas = []
+        time_in = time.perf_counter()
+        for delta in client.stream_chat_completion(MESSAGES, use_cache=False):
+            if not deltas:
+                streaming_first.append(time.perf_counter() - time_in)
+            deltas.append(delta)
+        streaming_total.append(time.perf_counter() - time_in)
+
+        assert "".join(deltas) == content, "Streamed content does not match the blocking response"
+
+    server.shutdown()
+
+    print(f"{'mode':<12}{'first token (ms)':>18}{'complete (ms)':>16}")
+    print(f"{'blocking':<12}{statistics.median(blocking_first) * 1e3:>18.1f}"
+          f"{statistics.median(blocking_total) * 1e3:>16.1f}")
+    print(f"{'streaming':<12}{statistics.median(streaming_first) * 1e3:>18.1f}"
+          f"{statistics.median(streaming_total) * 1e3:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
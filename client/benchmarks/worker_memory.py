@@ -0,0 +1,176 @@
+"""
+Memory of the serving workers with the pickled and the memory mapped (``.npz``) models.
+
+Copies the deployed models and preprocessors to a temporary directory in both formats (the
+forests optionally replicated ``--scale`` times, to stand in for production sized forests), then
+for each format starts ``--workers`` processes that all load the six models through their own
+``ModelRegistry`` and run a batch through each of them, so that every page of the models is
+touched. Once all workers are loaded, each one reads its memory from ``/proc/self/smaps_rollup``:
+
+    RSS  resident pages, shared ones included (a memory mapped page counts in every worker)
+    PSS  resident pages, each shared page divided by the number of processes sharing it
+    USS  pages private to the worker, what it really adds on top of the others
+
+Workers are started with ``spawn`` by default, i.e. each one loads the models on its own like
+separate servers, Streamlit processes or reloaded models do. ``--preload`` loads them once in the
+parent and forks the workers afterwards, like gunicorn's ``preload_app``.
+
+Usage (from the ``client`` directory, Linux only):
+    python benchmarks/worker_memory.py [--workers 8] [--scale 1] [--preload]
+"""
+import os
+import sys
+import copy
+import pickle
+import shutil
+import argparse
+import tempfile
+import multiprocessing
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.compact_models import export_model, export_preprocessor, save
+from core.inference import predict_proba
+from core.model_registry import ModelRegistry, MODEL_FILES, PREPROCESSOR_FILES, MODELS_DIR
+
+import numpy as np
+
+FORMATS = ["pickle", "npz"]
+
+
+def memory() -> dict[str, float]:
+    """
+    Returns the RSS, PSS and USS of the current process, in MB.
+    """
+    fields = {}
+    with open("/proc/self/smaps_rollup") as file:
+        for line in file:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+
+    return {
+        "rss": fields["Rss"],
+        "pss": fields["Pss"],
+        "uss": fields["Private_Clean"] + fields["Private_Dirty"]
+    }
+
+
+def copy_models(models_dir: str, scale: int) -> None:
+    """
+    Writes every model and preprocessor to `models_dir` as .pkl and .npz, the forests replicated `scale` times.
+    """
+    for file_name in PREPROCESSOR_FILES.values():
+        with open(os.path.join(MODELS_DIR, file_name), "rb") as file:
+            artifact = pickle.load(file)
+
+        shutil.copy(os.path.join(MODELS_DIR, file_name), models_dir)
+        save(os.path.join(models_dir, f"{os.path.splitext(file_name)[0]}.npz"), export_preprocessor(artifact),
+             source=os.path.join(models_dir, file_name))
+
+    for files in MODEL_FILES.values():
+        for file_name in files.values():
+            with open(os.path.join(MODELS_DIR, file_name), "rb") as file:
+                model = pickle.load(file)
+
+            if hasattr(model, "estimators_") and scale > 1:
+                model.estimators_ = [copy.deepcopy(tree) for _ in range(scale) for tree in model.estimators_]
+                model.n_estimators = len(model.estimators_)
+
+            with open(os.path.join(models_dir, file_name), "wb") as file:
+                pickle.dump(model, file)
+            save(os.path.join(models_dir, f"{os.path.splitext(file_name)[0]}.npz"), export_model(model),
+                 source=os.path.join(models_dir, file_name))
+
+
+def load_models(registry: ModelRegistry) -> None:
+    """
+    Loads every model and runs a batch through it, so that all of its pages are resident.
+    """
+    rng = np.random.default_rng(42)
+    for smote_type, files in MODEL_FILES.items():
+        registry.get_preprocessor(smote_type)
+        for model_name in files:
+            model = registry.get(smote_type, model_name)
+            predict_proba(model, rng.normal(size=(1000, model.n_features_in_)))
+
+
+def worker(models_dir: str, model_format: str, registry: ModelRegistry | None, loaded, measured, results) -> None:
+    before = memory()
+    if registry is None:
+        registry = ModelRegistry(models_dir, model_format=model_format)
+        load_models(registry)
+
+    # NOTE: Measured once every worker is loaded, so the shared pages are divided between all of them
+    loaded.wait()
+    results.put((before, memory()))
+    measured.wait()
+
+
+def serve(models_dir: str, model_format: str, workers: int, preload: bool, reports) -> None:
+    """
+    Stands for the gunicorn master: a fresh process per format, so that they do not share imports.
+    """
+    context = multiprocessing.get_context("fork" if preload else "spawn")
+    loaded, measured = context.Barrier(workers), context.Barrier(workers + 1)
+    results = context.Queue()
+
+    registry = None
+    if preload:
+        registry = ModelRegistry(models_dir, model_format=model_format)
+        load_models(registry)
+
+    processes = [context.Process(target=worker, args=(models_dir, model_format, registry, loaded, measured, results))
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+
+    reports.put([results.get() for _ in processes])
+    measured.wait()
+    for process in processes:
+        process.join()
+
+
+def run(models_dir: str, model_format: str, workers: int, preload: bool) -> list[tuple[dict, dict]]:
+    context = multiprocessing.get_context("spawn")
+    reports = context.Queue()
+
+    master = context.Process(target=serve, args=(models_dir, model_format, workers, preload, reports))
+    master.start()
+    result = reports.get()
+    master.join()
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--scale", type=int, default=1, help="Number of copies of the trees of each forest")
+    parser.add_argument("--preload", action="store_true", help="Load the models in the parent, then fork")
+    args = parser.parse_args()
+
+    if not os.path.exists("/proc/self/smaps_rollup"):
+        print("/proc/self/smaps_rollup is not available, the report needs Linux.")
+        sys.exit(1)
+
+    with tempfile.TemporaryDirectory() as models_dir:
+        copy_models(models_dir, args.scale)
+        for model_format in FORMATS:
+            size = sum(os.path.getsize(os.path.join(models_dir, file_name)) for file_name in os.listdir(models_dir)
+                       if file_name.endswith(".pkl" if model_format == "pickle" else ".npz"))
+            print(f"{model_format}: {size / 1e6:.1f} MB of models")
+
+        print(f"\n{args.workers} workers ({'forked after preload' if args.preload else 'spawned'}), MB per worker")
+        print(f"{'format':<8}{'RSS before':>12}{'RSS after':>11}{'PSS after':>11}{'USS after':>11}{'total PSS':>11}")
+
+        for model_format in FORMATS:
+            reports = run(models_dir, model_format, args.workers, args.preload)
+            before = {key: np.mean([report[0][key] for report in reports]) for key in ("rss", "pss", "uss")}
+            after = {key: np.mean([report[1][key] for report in reports]) for key in ("rss", "pss", "uss")}
+
+            print(f"{model_format:<8}{before['rss']:>12.1f}{after['rss']:>11.1f}{after['pss']:>11.1f}"
+                  f"{after['uss']:>11.1f}{after['pss'] * args.workers:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,24 @@
 import os
 import sys
+import time
 import datetime
 from enum import Enum
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from core.rich_logging import logger as log
-from core.model_funcs import safe_load_models
-
-import pandas as pd
-from flask import request, jsonify, Response
+from core.rich_logging import logger as log, log_payload
+from core.model_registry import registry
+from core.inference import predict_with_threshold, labels_from_probabilities
+from core.prediction_table import get_table
+from core import batch
+from core.timing import stage_timer
+from core.metrics import metrics
+from constants import METRICS_ENABLED, PREDICTION_TABLES
+from model.smote_type import SmoteType
+
+from flask import request, jsonify, Response, stream_with_context
 from flask_smorest import Blueprint
 
-from sklearn.preprocessing import StandardScaler
-
-CURRENT_DIR = os.path.abspath(__file__)
-ROOT = os.path.dirname(os.path.dirname(os.path.dirname(CURRENT_DIR)))
-MODELS_DIR = os.path.join(ROOT, "server", "models")
-
 
 class ResponseStatus(Enum):
     SUCCESS = 200
@@ -27,6 +28,7 @@ class ResponseStatus(Enum):
     UNAUTHORIZED = 401
     FORBIDDEN = 403
     CONFLICT = 409
+    BAD_GATEWAY = 502
 
 
 routes_bp = Blueprint(
@@ -36,6 +38,26 @@ routes_bp = Blueprint(
     description="Endpoints for the Theft Over Open Data group project.")
 
 
+@routes_bp.before_request
+def start_timer() -> None:
+    stage_timer()
+
+
+@routes_bp.after_request
+def record_metrics(response: Response) -> Response:
+    timer = stage_timer()
+
+    # NOTE: Nothing is formatted or recorded when metrics are disabled (METRICS_ENABLED)
+    if timer.enabled:
+        seconds = time.perf_counter() - timer.started
+        metrics.observe_request(request.url_rule.rule, timer.model or "none", response.status_code,
+                                seconds, timer.stages, timer.rows)
+
+        # NOTE: Per-stage timings of the request, read by benchmarks/api_suite.py and the browser dev tools
+        response.headers["Server-Timing"] = timer.server_timing()
+    return response
+
+
 @routes_bp.route("/predict", methods=["GET", "POST"])
 def predict() -> tuple[Response, int]:
     """
@@ -54,53 +76,62 @@ def predict() -> tuple[Response, int]:
         - ValueError if the model name is not supported.
 
     :returns:
+        - The predicted label of every row in `prediction.values`, and P(class 1) of every row in
+          `prediction.confidences`. `prediction.confidence` is the confidence of the first row.
+        - Labels use the decision threshold of the model from `server/models/thresholds.json`.
+        - With PREDICTION_TABLES=true, the probabilities are looked up in the predictions materialized for
+          every combination of the inputs (see `core/prediction_table.py`) instead of running the model.
         - status code 200 if successful (200 OK) - Response 200 OK
         - Status code 400 if it's a bad request (400 Bad Request)
     """
     log.info("SERVE: /api/v1/predict [GET, POST] route")
 
-    models_dict = {
-        "LogisticRegression": "lr_model.pkl",
-        "DecisionTreeClassifier": "dt_model.pkl",
-        "RandomForestClassifier": "rf_model.pkl"
-    }
+    timer = stage_timer()
 
     try:
-        request_json = request.get_json()
-        model_name = request.args.get("model_name")
+        with timer.stage("parse"):
+            request_json = request.get_json()
+            model_name = request.args.get("model_name")
 
         if not request_json:
             raise ValueError("No JSON was provided in the request.")
 
-        if not model_name:
-            raise ValueError("No model name was provided in the request.")
-
-        log.info(f"Received request with json: {request_json} and selected model: {model_name}")
-
-        model_name = models_dict.get(model_name)
-        if not model_name:
-            raise ValueError(f"Model name '{model_name}' is not supported.")
-
-        model = safe_load_models(os.path.join(MODELS_DIR, model_name))
-
-        query = pd.get_dummies(pd.DataFrame(request_json))
-
-        scaler = StandardScaler()
-        scaled_df = scaler.fit_transform(query)
-
-        query = pd.DataFrame(scaled_df)
-        confidence = model.predict_proba(query)[0][1]
-        prediction = model.predict(query)
+        log_payload("Received request with json: %s and selected model: %s", request_json, model_name)
+
+        with timer.stage("lookup"):
+            model_file = registry.resolve(SmoteType.SMOTE, model_name)
+            model = registry.get(SmoteType.SMOTE, model_name)
+            preprocessor = registry.get_preprocessor(SmoteType.SMOTE)
+            threshold = registry.get_threshold(SmoteType.SMOTE, model_name)
+            table = get_table(model, preprocessor) if PREDICTION_TABLES else None
+
+        timer.model = model_file
+        timer.rows = len(request_json) if isinstance(request_json, list) else 1
+
+        with timer.stage("featurize"):
+            codes = preprocessor.encode(request_json)
+
+        with timer.stage("inference"):
+            # NOTE: O(1) lookup in the materialized predictions, live inference if the model has no table
+            if table is not None:
+                prediction, confidences = labels_from_probabilities(model.classes_, table.lookup(codes), threshold)
+            else:
+                prediction, confidences = predict_with_threshold(model, preprocessor.scale(codes), threshold)
+
+        with timer.stage("serialize"):
+            response = jsonify({
+                "status": ResponseStatus.SUCCESS.value,
+                "prediction": {
+                    "values": f"{', '.join(map(str, prediction))}",
+                    "confidence": float(confidences[0]),
+                    "confidences": confidences.tolist(),
+                    "threshold": threshold
+                },
+                "model": f"{model_file}",
+                "timestamp": datetime.datetime.now()
+            })
 
-        return jsonify({
-            "status": ResponseStatus.SUCCESS.value,
-            "prediction": {
-                "values": f"{', '.join(map(str, prediction))}",
-                "confidence": confidence
-            },
-            "model": f"{model_name}",
-            "timestamp": datetime.datetime.now()
-        }), 200
+        return response, 200
 
     except Exception as e:
         log.error(f"Error processing request: {str(e)}")
@@ -134,52 +165,301 @@ def predict_smotenc() -> tuple[Response, int]:
         - ValueError if the model name is not supported.
 
     :returns:
+        - The predicted label of every row in `prediction.values`, and P(class 1) of every row in
+          `prediction.confidences`. `prediction.confidence` is the confidence of the first row.
+        - Labels use the decision threshold of the model from `server/models/thresholds.json`.
         - status code 200 if successful (200 OK) - Response 200 OK
         - Status code 400 if it's a bad request (400 Bad Request)
     """
     log.info("SERVE: /api/v1/predict/smotenc [GET, POST] route")
 
-    models_dict = {
-        "LogisticRegression": "lr_model_smotenc.pkl",
-        "DecisionTreeClassifier": "dt_model_smotenc.pkl",
-        "RandomForestClassifier": "rf_model_smotenc.pkl"
-    }
+    timer = stage_timer()
 
     try:
-        request_json = request.get_json()
-        model_name = request.args.get("model_name")
+        with timer.stage("parse"):
+            request_json = request.get_json()
+            model_name = request.args.get("model_name")
 
         if not request_json:
             raise ValueError("No JSON was provided in the request.")
 
+        log_payload("Received request with json: %s and selected model: %s", request_json, model_name)
+
+        with timer.stage("lookup"):
+            model_file = registry.resolve(SmoteType.SMOTENC, model_name)
+            model = registry.get(SmoteType.SMOTENC, model_name)
+            preprocessor = registry.get_preprocessor(SmoteType.SMOTENC)
+            threshold = registry.get_threshold(SmoteType.SMOTENC, model_name)
+
+        timer.model = model_file
+        timer.rows = len(request_json) if isinstance(request_json, list) else 1
+
+        with timer.stage("featurize"):
+            query = preprocessor.featurize(request_json)
+
+        with timer.stage("inference"):
+            prediction, confidences = predict_with_threshold(model, query, threshold)
+
+        with timer.stage("serialize"):
+            response = jsonify({
+                "status": ResponseStatus.SUCCESS.value,
+                "prediction": {
+                    "values": f"{', '.join(map(str, prediction))}",
+                    "confidence": float(confidences[0]),
+                    "confidences": confidences.tolist(),
+                    "threshold": threshold
+                },
+                "model": f"{model_file}",
+                "timestamp": datetime.datetime.now()
+            })
+
+        return response, 200
+
+    except Exception as e:
+        log.error(f"Error processing request: {str(e)}")
+        return jsonify({
+            "status": ResponseStatus.BAD_REQUEST.value,
+            "message": "An error occurred while processing the request.",
+            "data": {
+                "error": str(e),
+                "model": "Logistic Regression",
+                "timestamp": datetime.datetime.now()
+            },
+            "timestamp": datetime.datetime.now()
+        }), 400
+
+
+@routes_bp.route("/predict/batch", methods=["POST"])
+def predict_batch() -> tuple[Response, int]:
+    """
+    :endpoint: /api/v1/predict/batch
+    :methods: POST
+    :description:
+        - This is the endpoint for bulk predictions, e.g. a whole month of Theft Over records.
+        - The body is streamed as NDJSON (`application/x-ndjson`) or CSV (`text/csv`), one record per line/row.
+          Records can use the raw labels of `Theft_Over_Open_Data_Cleaned.csv` or the encoded values.
+        - Records are scored in chunks of `chunk_size` rows and the results are streamed back as they
+          are produced, so memory stays bounded regardless of the input size.
+        - Query parameters:
+            - model_name: LogisticRegression, DecisionTreeClassifier or RandomForestClassifier.
+            - smote_type: smote or smotenc (defaults to smotenc).
+            - format: ndjson or csv for the output (defaults to the Accept header, then the input format).
+            - chunk_size: number of rows scored per pass (defaults to 1000).
+
+    :raises:
+        - ValueError if the model name, SMOTE type, formats or chunk size are not supported.
+
+    :returns:
+        - A stream of `{row, label, probability, error}` results, one per input record, where invalid
+          records (including NDJSON lines that are not valid JSON) get an `error` instead of a prediction
+          and the stream goes on - Response 200 OK
+        - Status code 400 if it's a bad request (400 Bad Request)
+    """
+    log.info("SERVE: /api/v1/predict/batch [POST] route")
+
+    try:
+        model_name = request.args.get("model_name")
+        smote_type = SmoteType.match(request.args.get("smote_type", SmoteType.SMOTENC.value[0]))
+        if not smote_type:
+            raise ValueError(f"SMOTE type '{request.args.get('smote_type')}' is not supported.")
+
+        input_format = batch.match_format(request.mimetype)
+        if not input_format:
+            raise ValueError(f"Content type '{request.mimetype}' is not supported, use NDJSON or CSV.")
+
+        output_format = batch.match_format(request.args.get("format")) \
+            or batch.match_format(request.accept_mimetypes.best_match(list(batch.CONTENT_TYPES.values()))) \
+            or input_format
+
+        chunk_size = request.args.get("chunk_size", batch.DEFAULT_CHUNK_SIZE, type=int)
+        if not 0 < chunk_size <= batch.MAX_CHUNK_SIZE:
+            raise ValueError(f"Chunk size must be between 1 and {batch.MAX_CHUNK_SIZE}.")
+
+        model_file = registry.resolve(smote_type, model_name)
+        model = registry.get(smote_type, model_name)
+        preprocessor = registry.get_preprocessor(smote_type)
+        threshold = registry.get_threshold(smote_type, model_name)
+
+        log.info("Streaming batch predictions with model: %s (%s -> %s)", model_file, input_format, output_format)
+        stage_timer().model = model_file
+
+    except Exception as e:
+        log.error(f"Error processing request: {str(e)}")
+        return jsonify({
+            "status": ResponseStatus.BAD_REQUEST.value,
+            "message": "An error occurred while processing the request.",
+            "data": {
+                "error": str(e),
+                "model": model_name,
+                "timestamp": datetime.datetime.now()
+            },
+            "timestamp": datetime.datetime.now()
+        }), 400
+
+    def generate():
+        records = batch.iter_records(request.stream, input_format)
+        chunks = batch.score_stream(model, preprocessor, records, threshold, chunk_size)
+
+        header = True
+        rows = 0
+        try:
+            for results in chunks:
+                rows += len(results)
+                yield batch.serialize(results, output_format, header)
+                header = False
+
+        except ValueError as e:
+            # NOTE: The status line is already sent, so unreadable input (e.g. malformed CSV) ends the stream with
+            # an error record, after the results of the rows read before it
+            log.error(f"Error streaming batch predictions: {str(e)}")
+            error = {"row": None, "label": None, "probability": None, "error": str(e)}
+            yield batch.serialize([error], output_format, header)
+
+        if METRICS_ENABLED:
+            # NOTE: Recorded here, as the request metrics are recorded before the body is streamed
+            metrics.batch_rows.observe(("/api/v1/predict/batch", model_file), rows)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype=batch.CONTENT_TYPES[output_format]
+    ), 200
+
+
+@routes_bp.route("/summarize", methods=["POST"])
+def summarize() -> tuple[Response, int]:
+    """
+    :endpoint: /api/v1/summarize
+    :methods: POST
+    :description:
+        - This is the endpoint for model summaries using AI (OpenRouter).
+        - The body is `{"prediction": <response of a predict endpoint>, "model_name": ..., "smote_type": ...}`.
+        - Every request goes through one shared OpenRouter client, so identical analyses (timestamps aside)
+          are answered from its cache, and concurrent identical requests trigger a single upstream call
+          (streamed requests all receive the deltas of the same upstream stream).
+        - Requests are coalesced per process, i.e. per gunicorn worker. The cache is per worker too unless
+          OPENROUTER_CACHE_DB is set: with the SQLite store, the workers share the completed analyses, and
+          only identical requests in flight on different workers at the same time are not coalesced.
+        - Query parameters:
+            - stream: true to stream the summary as plain text while it is generated (defaults to false).
+
+    :raises:
+        - ValueError if no JSON, prediction, model name or supported SMOTE type was provided in the request.
+
+    :returns:
+        - The summary as Markdown in `summary` - Response 200 OK
+        - Status code 400 if it's a bad request (400 Bad Request)
+        - Status code 502 if OpenRouter could not generate the summary (502 Bad Gateway)
+    """
+    log.info("SERVE: /api/v1/summarize [POST] route")
+
+    # NOTE: The OpenAI SDK is the heaviest import of the API, only loaded by the first summary of a worker
+    from core.orouter_client import shared_client, analysis_messages
+
+    try:
+        request_json = request.get_json(silent=True)
+        if not request_json or not request_json.get("prediction"):
+            raise ValueError("No prediction was provided in the request.")
+
+        model_name = request_json.get("model_name")
         if not model_name:
             raise ValueError("No model name was provided in the request.")
 
-        log.info(f"Received request with json: {request_json} and selected model: {model_name}")
+        smote_type = SmoteType.match_str(request_json.get("smote_type", SmoteType.SMOTE.value[0]))
+        if not smote_type:
+            raise ValueError(f"SMOTE type '{request_json.get('smote_type')}' is not supported.")
 
-        model_name = models_dict.get(model_name)
-        if not model_name:
-            raise ValueError(f"Model name '{model_name}' is not supported.")
+        messages = analysis_messages(request_json["prediction"], model_name, smote_type)
+        client = shared_client()
 
-        model = safe_load_models(os.path.join(MODELS_DIR, model_name))
-        query = pd.get_dummies(pd.DataFrame(request_json))
+    except Exception as e:
+        log.error(f"Error processing request: {str(e)}")
+        return jsonify({
+            "status": ResponseStatus.BAD_REQUEST.value,
+            "message": "An error occurred while processing the request.",
+            "data": {
+                "error": str(e),
+                "timestamp": datetime.datetime.now()
+            },
+            "timestamp": datetime.datetime.now()
+        }), 400
+
+    if request.args.get("stream", "false").lower() == "true":
+        def generate():
+            try:
+                yield from client.stream_chat_completion(messages=messages, temperature=1, max_tokens=0)
+            except Exception as e:
+                # NOTE: The status line is already sent, the client detects the truncated summary
+                log.error(f"Error streaming summary: {str(e)}")
 
-        scaler = StandardScaler()
-        scaled_df = scaler.fit_transform(query)
+        return Response(stream_with_context(generate()), mimetype="text/plain"), 200
 
-        query = pd.DataFrame(scaled_df)
-        confidence = model.predict_proba(query)[0][1]
-        prediction = model.predict(query)
+    try:
+        summary = client.create_chat_completion(messages=messages, temperature=1, max_tokens=0)
 
+    except Exception as e:
+        log.error(f"Error generating summary: {str(e)}")
         return jsonify({
-            "status": ResponseStatus.SUCCESS.value,
-            "prediction": {
-                "values": f"{', '.join(map(str, prediction))}",
-                "confidence": confidence
+            "status": ResponseStatus.BAD_GATEWAY.value,
+            "message": "An error occurred while generating the summary.",
+            "data": {
+                "error": str(e),
+                "timestamp": datetime.datetime.now()
             },
-            "model": f"{model_name}",
             "timestamp": datetime.datetime.now()
-        }), 200
+        }), 502
+
+    return jsonify({
+        "status": ResponseStatus.SUCCESS.value,
+        "summary": summary,
+        "model": model_name,
+        "timestamp": datetime.datetime.now()
+    }), 200
+
+
+@routes_bp.route("/incidents/nearby", methods=["GET"])
+def incidents_nearby() -> tuple[Response, int]:
+    """
+    :endpoint: /api/v1/incidents/nearby
+    :methods: GET
+    :description:
+        - Returns the incidents near a coordinate, from a KD-tree over the projected coordinates of the dataset.
+        - Query parameters:
+            - `lon`, `lat`: the WGS84 coordinate (required), within the Web Mercator range (|lat| <= 85.05).
+            - `k`: number of incidents to return, closest first (default 10, at most 100).
+            - `radius`: if set (a positive number of meters), only the incidents within `radius` meters are
+              returned (the `k` closest of them) and `count` is the number of incidents within the radius.
+        - `neighbourhood` is the HOOD_158 of the closest incident, used to fill HOOD_158 from a coordinate.
+        - Every incident has its distance to the coordinate in meters in `DISTANCE_M`.
+
+    :return:
+        - The incidents in `data.incidents` - Response 200 OK
+        - Status code 400 if it's a bad request (400 Bad Request)
+    """
+    log.info("SERVE: /api/v1/incidents/nearby [GET] route")
+
+    # NOTE: Imported on first use, the index (and its dataset) is not part of the prediction routes
+    from core.spatial_index import get_index, MAX_LATITUDE
+
+    try:
+        lon = request.args.get("lon", type=float)
+        lat = request.args.get("lat", type=float)
+        if lon is None or lat is None:
+            raise ValueError("Both `lon` and `lat` must be provided as numbers.")
+        if not (-180 <= lon <= 180 and -MAX_LATITUDE <= lat <= MAX_LATITUDE):
+            raise ValueError(f"`lon` must be between -180 and 180 and `lat` between -{MAX_LATITUDE} and "
+                             f"{MAX_LATITUDE} (the Web Mercator range of the dataset).")
+
+        k = request.args.get("k", 10, type=int)
+        radius = request.args.get("radius", type=float)
+
+        index = get_index()
+        if radius is None:
+            incidents = index.nearest(lon, lat, k)
+            count = len(incidents)
+        else:
+            count, incidents = index.within(lon, lat, radius, limit=k)
+
+        neighbourhood = index.neighbourhood(lon, lat)
 
     except Exception as e:
         log.error(f"Error processing request: {str(e)}")
@@ -188,12 +468,70 @@ def predict_smotenc() -> tuple[Response, int]:
             "message": "An error occurred while processing the request.",
             "data": {
                 "error": str(e),
-                "model": "Logistic Regression",
                 "timestamp": datetime.datetime.now()
             },
             "timestamp": datetime.datetime.now()
         }), 400
 
+    return jsonify({
+        "status": ResponseStatus.SUCCESS.value,
+        "data": {
+            "count": count,
+            "neighbourhood": neighbourhood,
+            "incidents": incidents
+        },
+        "timestamp": datetime.datetime.now()
+    }), 200
+
+
+@routes_bp.route("/metrics", methods=["GET"])
+def metrics_endpoint() -> tuple[Response, int]:
+    """
+    :endpoint: /api/v1/metrics
+    :methods: GET
+    :description:
+        - Returns the request metrics of this process in the Prometheus text format, when the API runs
+          with METRICS_ENABLED=true:
+            - toodu_requests_total and toodu_request_errors_total by route, model and status code.
+            - toodu_request_duration_seconds and toodu_stage_duration_seconds (parse, lookup, featurize,
+              inference, serialize) histograms by route and model.
+            - toodu_batch_size_rows histogram of the rows per prediction request.
+
+    :return:
+        - The metrics as text/plain - Response 200 OK
+        - Status code 404 if metrics are disabled (404 Not Found)
+    """
+    if not METRICS_ENABLED:
+        return jsonify({
+            "status": ResponseStatus.NOT_FOUND.value,
+            "message": "Metrics are disabled, set METRICS_ENABLED=true to enable them.",
+            "data": None,
+            "timestamp": datetime.datetime.now()
+        }), 404
+
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4"), 200
+
+
+@routes_bp.route("/models", methods=["GET"])
+def models() -> tuple[Response, int]:
+    """
+    :endpoint: /api/v1/models
+    :methods: GET
+    :description:
+        - Returns the state of the in-memory model registry.
+        - Includes the load time of every cached model and the registry hit/miss/reload counters,
+          which can be used to confirm that requests are not paying for deserialization.
+
+    :return:
+        - status code 200 if successful (200 OK) - Response 200 OK
+    """
+    log.info("SERVE: /api/v1/models GET route")
+    return jsonify({
+        "status": ResponseStatus.SUCCESS.value,
+        "data": registry.stats(),
+        "timestamp": datetime.datetime.now()
+    }), 200
+
 
 @routes_bp.route("/", methods=["GET"])
 def health() -> tuple[Response, int]:
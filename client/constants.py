@@ -7,10 +7,46 @@ FLASK_APP = os.getenv("FLASK_APP")
 FLASK_ENV = os.getenv("FLASK_ENV")
 FLASK_RUN_PORT = os.getenv("FLASK_RUN_PORT")
 
+# NOTE: "rich" (interactive development) or "json" (production: JSON lines written off the request threads)
+LOG_FORMAT = os.getenv("LOG_FORMAT", "rich").lower()
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+# NOTE: Request and response payloads are logged truncated, and only for a sample (0 to 1) of the requests
+LOG_PAYLOAD_MAX_CHARS = int(os.getenv("LOG_PAYLOAD_MAX_CHARS", 256))
+LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", 1.0))
+
+# NOTE: "npz" serves the models exported by `export_models.py` (memory mapped, shared by the workers) when they exist,
+# "pickle" always unpickles the .pkl files
+MODEL_FORMAT = os.getenv("MODEL_FORMAT", "npz").lower()
+
+# NOTE: Serves /api/v1/predict (SMOTE) from tables of the predictions of every input, materialized at startup
+PREDICTION_TABLES = os.getenv("PREDICTION_TABLES", "false").lower() == "true"
+
+# NOTE: Per-stage request metrics (/api/v1/metrics and the Server-Timing header), disabled by default
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() == "true"
+
+# NOTE: Base URL of the Flask API, used by the Streamlit pages
+API_URL = os.getenv("API_URL", "http://localhost:5000/api/v1")
+
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 OPENROUTER_API_URL = os.getenv("OPENROUTER_API_URL")
 OPENROUTER_MODEL = os.getenv("OPENROUTER_MODEL")
 
+# NOTE: Response cache of the prediction analysis, per gunicorn worker unless OPENROUTER_CACHE_DB enables the
+# on-disk SQLite store shared by the workers (identical requests in flight are only coalesced within a worker)
+OPENROUTER_CACHE_SIZE = int(os.getenv("OPENROUTER_CACHE_SIZE", 256))
+OPENROUTER_CACHE_TTL = float(os.getenv("OPENROUTER_CACHE_TTL", 24 * 60 * 60))
+OPENROUTER_CACHE_DB = os.getenv("OPENROUTER_CACHE_DB")
+
+# NOTE: Timeouts (seconds), retries on 429/5xx and concurrent analyses of the OpenRouter clients
+OPENROUTER_TIMEOUT = float(os.getenv("OPENROUTER_TIMEOUT", 60))
+OPENROUTER_CONNECT_TIMEOUT = float(os.getenv("OPENROUTER_CONNECT_TIMEOUT", 5))
+OPENROUTER_MAX_RETRIES = int(os.getenv("OPENROUTER_MAX_RETRIES", 3))
+OPENROUTER_CONCURRENCY = int(os.getenv("OPENROUTER_CONCURRENCY", 8))
+
+# NOTE: Maximum input tokens (system prompt and prediction summary) of an analysis
+OPENROUTER_INPUT_TOKEN_BUDGET = int(os.getenv("OPENROUTER_INPUT_TOKEN_BUDGET", 1024))
+
 
 MODEL_PROMPT = """"
 You are a Scientific Data Analyst <add more details about your role here>.
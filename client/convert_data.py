@@ -0,0 +1,40 @@
+"""
+Converts the Theft Over datasets to Parquet.
+
+String columns are stored as dictionary encoded categoricals, integers are downcast and floats
+are stored as float32 (except the numerical model features). The Parquet copies are written to
+``server/data/cache`` and keyed by the hash of their CSV, so the dashboard picks them up as is
+and an updated CSV is converted again on first use.
+
+Usage (from the ``client`` directory):
+    python convert_data.py [--force] [csv ...]
+"""
+import os
+import sys
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.dataset import convert_dataset, CLEANED_CSV, FILTERED_CSV
+
+import pyarrow.parquet as pq
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("csv", nargs="*", default=[CLEANED_CSV, FILTERED_CSV],
+                        help="CSV files to convert, defaults to the cleaned and filtered datasets")
+    parser.add_argument("--force", action="store_true", help="Convert again even if the Parquet copy exists")
+    args = parser.parse_args()
+
+    for csv_path in args.csv:
+        path = convert_dataset(csv_path, force=args.force)
+        metadata = pq.read_metadata(path)
+
+        print(f"{os.path.basename(csv_path)} ({os.path.getsize(csv_path) / 1e6:.1f} MB) -> "
+              f"{path} ({os.path.getsize(path) / 1e6:.1f} MB, {metadata.num_rows} rows, "
+              f"{metadata.num_columns} columns)")
+
+
+if __name__ == "__main__":
+    main()
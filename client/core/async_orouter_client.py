@@ -0,0 +1,154 @@
+import os
+import sys
+import random
+import asyncio
+from typing import List, Dict, Any
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from constants import (
+    OPENROUTER_API_KEY,
+    OPENROUTER_API_URL,
+    OPENROUTER_CACHE_SIZE,
+    OPENROUTER_CACHE_TTL,
+    OPENROUTER_CACHE_DB,
+    OPENROUTER_TIMEOUT,
+    OPENROUTER_CONNECT_TIMEOUT,
+    OPENROUTER_MAX_RETRIES,
+    OPENROUTER_CONCURRENCY
+)
+from core.rich_logging import logger as log
+from core.response_cache import ResponseCache, make_key
+from core.orouter_client import build_chat_request
+
+import httpx
+from openai import AsyncOpenAI, APIStatusError, APIConnectionError, APITimeoutError
+
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 8.0
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return isinstance(error, (APIConnectionError, APITimeoutError))
+
+
+def retry_delay(error: Exception, attempt: int) -> float:
+    # NOTE: Honours the Retry-After header of rate limited responses, else exponential backoff with full jitter
+    if isinstance(error, APIStatusError):
+        retry_after = error.response.headers.get("Retry-After")
+        if retry_after and retry_after.replace(".", "", 1).isdigit():
+            return min(float(retry_after), RETRY_MAX_DELAY)
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+
+class AsyncOpenRouterClient:
+    """
+    Asynchronous counterpart of ``OpenRouterClient``, for running many analyses concurrently.
+
+    Every request goes through one pooled ``httpx.AsyncClient``, so connections are reused
+    between analyses. The client must be closed with ``aclose`` (or used as an async context
+    manager) from the event loop that used it.
+    """
+
+    def __init__(self,
+                 cache: ResponseCache | None = None,
+                 base_url: str = OPENROUTER_API_URL,
+                 api_key: str = OPENROUTER_API_KEY,
+                 timeout: float = OPENROUTER_TIMEOUT,
+                 connect_timeout: float = OPENROUTER_CONNECT_TIMEOUT,
+                 max_retries: int = OPENROUTER_MAX_RETRIES,
+                 max_connections: int = OPENROUTER_CONCURRENCY * 2):
+        self.__cache = cache or ResponseCache(
+            max_entries=OPENROUTER_CACHE_SIZE,
+            ttl=OPENROUTER_CACHE_TTL,
+            db_path=OPENROUTER_CACHE_DB
+        )
+        self.__max_retries = max_retries
+        self.__http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        )
+
+        # NOTE: The SDK retries are disabled, retries are handled (and logged) by `create_chat_completion`
+        self.__client = AsyncOpenAI(
+            base_url=base_url,
+            api_key=api_key,
+            http_client=self.__http_client,
+            max_retries=0
+        )
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        return self.__client
+
+    @property
+    def cache(self) -> ResponseCache:
+        return self.__cache
+
+    async def __aenter__(self) -> "AsyncOpenRouterClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self.__http_client.aclose()
+
+    async def create_chat_completion(self,
+                                     messages: List[Dict[str, str]],
+                                     temperature: float = 1,
+                                     max_tokens: int = 256,
+                                     top_p: float = 1,
+                                     frequency_penalty: float = 0,
+                                     presence_penalty: float = 0,
+                                     response_format: Dict = None,
+                                     use_cache: bool = True) -> Any:
+
+        kwargs = build_chat_request(messages, temperature, max_tokens, top_p,
+                                    frequency_penalty, presence_penalty, response_format)
+
+        cache_key = make_key(kwargs)
+        if use_cache:
+            cached = self.__cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        for attempt in range(self.__max_retries + 1):
+            try:
+                response = await self.__client.chat.completions.create(**kwargs)
+                break
+
+            except Exception as e:
+                if attempt == self.__max_retries or not is_retryable(e):
+                    log.error(f"Error creating chat completion: {str(e)}")
+                    raise e
+
+                delay = retry_delay(e, attempt)
+                log.info(f"Retrying chat completion in {delay:.2f} seconds "
+                         f"(attempt {attempt + 1} of {self.__max_retries}): {str(e)}")
+                await asyncio.sleep(delay)
+
+        content = response.choices[0].message.content
+        if content:
+            self.__cache.set(cache_key, content)
+        return content
+
+    async def analyze_many(self,
+                           conversations: List[List[Dict[str, str]]],
+                           concurrency: int = OPENROUTER_CONCURRENCY,
+                           **kwargs) -> List[str | Exception]:
+        """
+        Runs one chat completion per conversation, at most `concurrency` at a time.
+
+        Results are returned in the order of `conversations`. A failed analysis is returned as
+        its exception instead of cancelling the others.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def analyze(messages: List[Dict[str, str]]) -> str:
+            async with semaphore:
+                return await self.create_chat_completion(messages, **kwargs)
+
+        return await asyncio.gather(*(analyze(messages) for messages in conversations), return_exceptions=True)
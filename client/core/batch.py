@@ -0,0 +1,180 @@
+import io
+import os
+import sys
+import csv
+import json
+from typing import Any, BinaryIO, Iterable, Iterator, NamedTuple
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.inference import predict_with_threshold
+from core.preprocessing import Preprocessor
+
+import numpy as np
+
+DEFAULT_CHUNK_SIZE = 1000
+MAX_CHUNK_SIZE = 50_000
+
+# NOTE: Content types accepted and produced by the batch endpoint
+NDJSON = "ndjson"
+CSV = "csv"
+CONTENT_TYPES = {
+    NDJSON: "application/x-ndjson",
+    CSV: "text/csv"
+}
+
+RESULT_FIELDS = ["row", "label", "probability", "error"]
+
+
+class InvalidRecord(NamedTuple):
+    """
+    Stands for an input line that could not be parsed, scored as an error row so the stream goes on.
+    """
+    error: str
+
+
+def match_format(value: str | None) -> str | None:
+    """
+    Maps a content type (``text/csv``, ``application/x-ndjson``...) or a short name to a batch format.
+    """
+    if not value:
+        return None
+
+    value = value.split(";")[0].strip().lower()
+    if value in (CSV, CONTENT_TYPES[CSV]):
+        return CSV
+
+    if value in (NDJSON, "jsonl", "json", CONTENT_TYPES[NDJSON], "application/jsonl", "application/json"):
+        return NDJSON
+
+    return None
+
+
+def iter_ndjson_records(stream: BinaryIO) -> Iterator[dict | InvalidRecord]:
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            # NOTE: Also catches lines that are not valid UTF-8 (UnicodeDecodeError)
+            yield InvalidRecord(f"Invalid JSON on line {line_number}: {str(e)}")
+
+
+def iter_csv_records(stream: BinaryIO) -> Iterator[dict]:
+    try:
+        yield from csv.DictReader(io.TextIOWrapper(stream, encoding="utf-8", newline=""))
+    except csv.Error as e:
+        raise ValueError(f"Invalid CSV: {str(e)}")
+
+
+def iter_records(stream: BinaryIO, input_format: str) -> Iterator[dict | InvalidRecord]:
+    if input_format == CSV:
+        return iter_csv_records(stream)
+    return iter_ndjson_records(stream)
+
+
+def iter_chunks(records: Iterable[Any], chunk_size: int) -> Iterator[list]:
+    """
+    Groups `records` in lists of `chunk_size`. If reading the records fails, the records read so
+    far are still yielded before the error is raised.
+    """
+    records = iter(records)
+    chunk = []
+    while True:
+        try:
+            record = next(records)
+        except StopIteration:
+            break
+        except ValueError:
+            if chunk:
+                yield chunk
+            raise
+
+        chunk.append(record)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+def score_chunk(model: Any, preprocessor: Preprocessor, records: list[dict], threshold: float) -> list[dict]:
+    """
+    Scores one chunk of records with a single featurize + ``predict_proba`` pass.
+
+    If the chunk contains invalid records, they are isolated row by row so the valid rows
+    are still scored and every invalid row gets its own error message.
+    """
+    features = None
+    if not any(isinstance(record, InvalidRecord) for record in records):
+        try:
+            features = preprocessor.featurize(records)
+            errors = [None] * len(records)
+        except ValueError:
+            pass
+
+    if features is None:
+        rows, errors = [], []
+        for record in records:
+            if isinstance(record, InvalidRecord):
+                errors.append(record.error)
+                continue
+
+            try:
+                rows.append(preprocessor.featurize([record])[0])
+                errors.append(None)
+            except ValueError as e:
+                errors.append(str(e))
+
+        features = np.vstack(rows) if rows else None
+
+    results = [{"row": None, "label": None, "probability": None, "error": error} for error in errors]
+
+    valid = [index for index, error in enumerate(errors) if error is None]
+    if valid:
+        labels, confidences = predict_with_threshold(model, features, threshold)
+        for index, label, probability in zip(valid, labels.tolist(), confidences.tolist()):
+            results[index]["label"] = label
+            results[index]["probability"] = probability
+
+    return results
+
+
+def score_stream(model: Any,
+                 preprocessor: Preprocessor,
+                 records: Iterable[dict],
+                 threshold: float,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[list[dict]]:
+    """
+    Lazily scores ``records`` in fixed-size chunks, yielding the results of one chunk at a time.
+    """
+    row = 0
+    for chunk in iter_chunks(records, chunk_size):
+        results = score_chunk(model, preprocessor, chunk, threshold)
+        for result in results:
+            result["row"] = row
+            row += 1
+
+        yield results
+
+
+def serialize_ndjson(results: list[dict]) -> str:
+    return "".join(json.dumps(result) + "\n" for result in results)
+
+
+def serialize_csv(results: list[dict], header: bool = False) -> str:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=RESULT_FIELDS, lineterminator="\n")
+    if header:
+        writer.writeheader()
+    writer.writerows(results)
+    return buffer.getvalue()
+
+
+def serialize(results: list[dict], output_format: str, header: bool = False) -> str:
+    if output_format == CSV:
+        return serialize_csv(results, header=header)
+    return serialize_ndjson(results)
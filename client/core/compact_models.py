@@ -0,0 +1,396 @@
+import os
+import sys
+import hashlib
+import zipfile
+from typing import Any, BinaryIO
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.preprocessing import Preprocessor
+
+import numpy as np
+
+# NOTE: Bumped when the layout of the arrays changes, older files are rejected instead of misread
+FORMAT_VERSION = 1
+
+# NOTE: Member holding the sha256 of the pickle an artifact was exported from, see `exported_from`
+SOURCE_DIGEST = "source_sha256"
+
+# NOTE: Size of the fixed part of a zip local file header, followed by the file name and the extra field
+_ZIP_LOCAL_HEADER_SIZE = 30
+
+_NPY_HEADER_READERS = {
+    (1, 0): np.lib.format.read_array_header_1_0,
+    (2, 0): np.lib.format.read_array_header_2_0
+}
+
+
+class CompactLinearModel:
+    """
+    NumPy evaluator of an exported ``LogisticRegression``: ``predict_proba`` is the logistic
+    (or for multiclass models, the softmax) of ``X @ coef.T + intercept``, like sklearn computes it.
+    """
+
+    def __init__(self, estimator: str, classes: np.ndarray, coef: np.ndarray, intercept: np.ndarray):
+        self.estimator = estimator
+        self.classes_ = classes
+        self.coef_ = coef
+        self.intercept_ = intercept
+        self.n_features_in_ = coef.shape[1]
+
+    def decision_function(self, X) -> np.ndarray:
+        X = _check_features(X, self.n_features_in_, np.float64)
+        scores = X @ self.coef_.T + self.intercept_
+        return scores.reshape(-1) if scores.shape[1] == 1 else scores
+
+    def predict_proba(self, X) -> np.ndarray:
+        scores = self.decision_function(X)
+        if scores.ndim == 1:
+            # NOTE: exp of -|score| only, which never overflows (scipy's expit can differ in the last bit,
+            # see `export_models.py --tolerance`)
+            exp = np.exp(-np.abs(scores))
+            probabilities = np.where(scores >= 0, 1.0 / (1.0 + exp), exp / (1.0 + exp))
+            return np.stack([1 - probabilities, probabilities], axis=1)
+
+        scores -= scores.max(axis=1).reshape(-1, 1)
+        np.exp(scores, out=scores)
+        scores /= scores.sum(axis=1).reshape(-1, 1)
+        return scores
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+class CompactTreeEnsemble:
+    """
+    NumPy evaluator of an exported ``DecisionTreeClassifier`` or ``RandomForestClassifier``.
+
+    The nodes of every tree are flattened into shared arrays (tree `t` starts at ``roots[t]``) and a
+    batch walks all of its trees at once, one level per step. Leaves point to themselves, so walking
+    ``max_depth`` levels lands every row on its leaf. Like sklearn, the features are compared as
+    ``float32`` (against the thresholds rounded down to ``float32``, which splits every ``float32``
+    the same way) and the per-tree probabilities of a forest are summed in tree order, then
+    averaged, so the results are bit for bit those of ``predict_proba``.
+    """
+
+    def __init__(self,
+                 estimator: str,
+                 classes: np.ndarray,
+                 roots: np.ndarray,
+                 children: np.ndarray,
+                 feature: np.ndarray,
+                 threshold: np.ndarray,
+                 value: np.ndarray,
+                 max_depth: int,
+                 n_features: int):
+        self.estimator = estimator
+        self.classes_ = classes
+        self.roots = roots
+        self.children = children
+        self.feature = feature
+        self.threshold = threshold
+        self.value = value
+        self.max_depth = max_depth
+        self.n_features_in_ = n_features
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    def apply(self, X) -> np.ndarray:
+        """
+        Returns the (global) index of the leaf reached by every row in every tree, shape ``(n_rows, n_trees)``.
+        """
+        X = _check_features(X, self.n_features_in_, np.float32)
+        offsets = (np.arange(len(X)) * self.n_features_in_).reshape(-1, 1)
+        features = X.reshape(-1)
+        children = self.children.reshape(-1)
+
+        # NOTE: Rows never contain NaN (rejected by `Preprocessor`), so `>` is the negation of sklearn's `<=`
+        nodes = np.broadcast_to(self.roots, (len(X), self.n_trees))
+        for _ in range(self.max_depth):
+            right = features[offsets + self.feature[nodes]] > self.threshold[nodes]
+            nodes = children[2 * nodes + right]
+
+        return nodes
+
+    def predict_proba(self, X) -> np.ndarray:
+        leaves = self.apply(X)
+        if self.n_trees == 1:
+            return self.value[leaves[:, 0]]
+
+        # NOTE: Reduced over the first axis, i.e. summed in tree order, like the forest accumulates its trees
+        probabilities = np.add.reduce(self.value[leaves.T], axis=0)
+        probabilities /= self.n_trees
+        return probabilities
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+class ArrayScaler:
+    """
+    ``StandardScaler`` stand-in for the exported preprocessors, only the parts used by ``Preprocessor``.
+    """
+
+    def __init__(self, mean: np.ndarray, scale: np.ndarray):
+        self.mean_ = mean
+        self.scale_ = scale
+
+    def transform(self, X) -> np.ndarray:
+        return (np.asarray(X, dtype=np.float64) - self.mean_) / self.scale_
+
+
+class ArrayLabelEncoder:
+    """
+    ``LabelEncoder`` stand-in for the exported preprocessors, only the parts used by ``Preprocessor``.
+    """
+
+    def __init__(self, classes: np.ndarray):
+        self.classes_ = classes
+
+    def transform(self, y) -> np.ndarray:
+        y = np.asarray(y).astype(str)
+        codes = np.searchsorted(self.classes_, y)
+        unknown = (codes >= len(self.classes_)) | (self.classes_[np.minimum(codes, len(self.classes_) - 1)] != y)
+        if unknown.any():
+            raise ValueError(f"y contains previously unseen labels: {sorted(set(y[unknown].tolist()))}")
+        return codes
+
+
+def _check_features(X, n_features: int, dtype: type) -> np.ndarray:
+    X = np.asarray(X, dtype=dtype)
+    if X.ndim != 2 or X.shape[1] != n_features:
+        raise ValueError(f"X has {X.shape[-1] if X.ndim else 0} features, but the model is expecting "
+                         f"{n_features} features as input.")
+    return X
+
+
+def _export_trees(trees: list, classes: np.ndarray) -> dict[str, np.ndarray]:
+    if any(tree.n_outputs != 1 for tree in trees):
+        raise ValueError("Only single output trees can be exported.")
+
+    sizes = [tree.node_count for tree in trees]
+    roots = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+
+    children, feature, threshold, value = [], [], [], []
+    for root, tree in zip(roots, trees):
+        nodes = np.arange(root, root + tree.node_count)
+        leaf = tree.children_left == -1
+
+        # NOTE: Leaves loop back on themselves, their feature and threshold are never used
+        children.append(np.column_stack([np.where(leaf, nodes, tree.children_left + root),
+                                         np.where(leaf, nodes, tree.children_right + root)]))
+        feature.append(np.where(leaf, 0, tree.feature))
+        threshold.append(np.where(leaf, np.inf, tree.threshold))
+        value.append(tree.value[:, 0, :len(classes)])
+
+    # NOTE: The largest float32 <= each threshold, `x <= t32` then holds exactly when `x <= t` for any float32 `x`
+    threshold = np.concatenate(threshold)
+    threshold32 = threshold.astype(np.float32)
+    above = threshold32.astype(np.float64) > threshold
+    threshold32[above] = np.nextafter(threshold32[above], np.float32(-np.inf))
+
+    # NOTE: Node indices are stored as intp, indexing with int32 arrays converts them on every lookup
+    return {
+        "roots": roots.astype(np.intp),
+        "children": np.concatenate(children).astype(np.intp),
+        "feature": np.concatenate(feature).astype(np.intp),
+        "threshold": threshold32,
+        "value": np.ascontiguousarray(np.concatenate(value), dtype=np.float64),
+        "max_depth": np.array(max(tree.max_depth for tree in trees), dtype=np.int32)
+    }
+
+
+def export_model(model: Any) -> dict[str, np.ndarray]:
+    """
+    Returns the arrays of the NumPy evaluator of a fitted ``LogisticRegression``, ``DecisionTreeClassifier``
+    or ``RandomForestClassifier``, as written by ``save``. No object (pickled) arrays are produced.
+    """
+    estimator = type(model).__name__
+    classes = np.asarray(model.classes_)
+    if classes.dtype.hasobject:
+        classes = classes.astype(str)
+
+    arrays = {
+        "version": np.array(FORMAT_VERSION, dtype=np.int32),
+        "estimator": np.array(estimator),
+        "classes": classes,
+        "n_features": np.array(model.n_features_in_, dtype=np.int32)
+    }
+
+    if hasattr(model, "coef_"):
+        arrays["kind"] = np.array("linear")
+        arrays["coef"] = np.ascontiguousarray(model.coef_, dtype=np.float64)
+        arrays["intercept"] = np.asarray(model.intercept_, dtype=np.float64)
+    elif hasattr(model, "tree_"):
+        arrays["kind"] = np.array("trees")
+        arrays.update(_export_trees([model.tree_], classes))
+    elif hasattr(model, "estimators_"):
+        arrays["kind"] = np.array("trees")
+        arrays.update(_export_trees([tree.tree_ for tree in model.estimators_], classes))
+    else:
+        raise ValueError(f"Models of type {estimator} cannot be exported.")
+
+    return arrays
+
+
+def export_preprocessor(artifact: dict) -> dict[str, np.ndarray]:
+    """
+    Returns the arrays of a preprocessing artifact (the dict of ``preprocessor.pkl``), as written by ``save``.
+    """
+    scaled_columns = list(artifact["scaled_columns"])
+    scaler = artifact["scaler"]
+
+    arrays = {
+        "version": np.array(FORMAT_VERSION, dtype=np.int32),
+        "kind": np.array("preprocessor"),
+        "columns": np.array(artifact["columns"], dtype=str),
+        "scaled_columns": np.array(scaled_columns, dtype=str),
+        "mean": np.zeros(len(scaled_columns)) if scaler.mean_ is None else np.asarray(scaler.mean_, np.float64),
+        "scale": np.ones(len(scaled_columns)) if scaler.scale_ is None else np.asarray(scaler.scale_, np.float64)
+    }
+    for col, encoder in artifact["label_encoders"].items():
+        arrays[f"classes/{col}"] = np.asarray(encoder.classes_).astype(str)
+
+    return arrays
+
+
+def save(path: str, arrays: dict[str, np.ndarray], source: str = None) -> None:
+    """
+    Writes `arrays` to an uncompressed ``.npz`` file, so that ``load_arrays`` can memory map them.
+
+    The file is written next to `path` and renamed over it: a process loading the models never
+    sees a partially written file, and the processes that memory mapped the previous file keep
+    reading it unchanged until they reload it. The sha256 of the `source` file (the pickle the
+    arrays were exported from) is stored with them, see ``exported_from``.
+    """
+    if source is not None:
+        arrays = {**arrays, SOURCE_DIGEST: np.array(source_digest(source))}
+
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as file:
+        np.savez(file, **arrays)
+    os.replace(temp_path, path)
+
+
+def source_digest(path: str) -> str:
+    """
+    Returns the sha256 of a file, as stored by ``save`` for the `source` of the arrays.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def exported_from(path: str) -> str | None:
+    """
+    Returns the sha256 of the pickle an ``.npz`` file was exported from, None if it was saved without it.
+
+    Only that member is read, the arrays of the model are not loaded.
+    """
+    with zipfile.ZipFile(path) as archive:
+        if f"{SOURCE_DIGEST}.npy" not in archive.namelist():
+            return None
+
+        with archive.open(f"{SOURCE_DIGEST}.npy") as member:
+            return np.lib.format.read_array(member, allow_pickle=False).item()
+
+
+def load_arrays(file: str | BinaryIO, mmap_mode: str | None = "r") -> dict[str, np.ndarray]:
+    """
+    Reads the arrays of an ``.npz`` file (a path or a file opened in binary mode) written by ``save``.
+
+    ``np.load`` ignores `mmap_mode` for ``.npz`` files. The members of an uncompressed archive are
+    plain ``.npy`` files stored at a fixed offset though, so every non scalar array is memory mapped
+    read-only from the archive itself: the pages are shared between the processes that load the
+    file, through the page cache. Pass ``mmap_mode=None`` to read the arrays into memory instead.
+    """
+    if isinstance(file, str):
+        with open(file, "rb") as opened:
+            return load_arrays(opened, mmap_mode)
+
+    arrays = {}
+    with zipfile.ZipFile(file) as archive:
+        for info in archive.infolist():
+            name = info.filename.removesuffix(".npy")
+
+            if mmap_mode is not None and info.compress_type == zipfile.ZIP_STORED:
+                file.seek(info.header_offset)
+                header = file.read(_ZIP_LOCAL_HEADER_SIZE)
+                name_size = int.from_bytes(header[26:28], "little")
+                extra_size = int.from_bytes(header[28:30], "little")
+                file.seek(info.header_offset + _ZIP_LOCAL_HEADER_SIZE + name_size + extra_size)
+                read_header = _NPY_HEADER_READERS.get(np.lib.format.read_magic(file))
+            else:
+                read_header = None
+
+            if read_header is None:
+                with archive.open(info) as member:
+                    arrays[name] = np.lib.format.read_array(member, allow_pickle=False)
+                continue
+
+            shape, fortran_order, dtype = read_header(file)
+            if dtype.hasobject:
+                raise ValueError(f"{_file_name(file)} contains an object array ({name}).")
+
+            if not shape or 0 in shape:
+                count = int(np.prod(shape))
+                arrays[name] = np.frombuffer(file.read(count * dtype.itemsize), dtype=dtype, count=count).reshape(shape)
+            else:
+                arrays[name] = np.memmap(file, dtype=dtype, mode=mmap_mode, offset=file.tell(), shape=shape,
+                                         order="F" if fortran_order else "C").view(np.ndarray)
+
+    return arrays
+
+
+def _file_name(file: str | BinaryIO) -> str:
+    return os.path.basename(file if isinstance(file, str) else getattr(file, "name", "The file"))
+
+
+def _scalar(arrays: dict[str, np.ndarray], name: str) -> Any:
+    return arrays[name].item()
+
+
+def load(file: str | BinaryIO, mmap_mode: str | None = "r") -> CompactLinearModel | CompactTreeEnsemble | Preprocessor:
+    """
+    Loads a model or a preprocessor exported by ``save``, without sklearn (and without unpickling anything).
+    """
+    arrays = load_arrays(file, mmap_mode)
+
+    version = _scalar(arrays, "version")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"{_file_name(file)} has format version {version}, expected {FORMAT_VERSION}.")
+
+    kind = _scalar(arrays, "kind")
+    if kind == "preprocessor":
+        return Preprocessor(
+            columns=arrays["columns"].tolist(),
+            scaled_columns=arrays["scaled_columns"].tolist(),
+            scaler=ArrayScaler(arrays["mean"], arrays["scale"]),
+            label_encoders={
+                name.removeprefix("classes/"): ArrayLabelEncoder(classes)
+                for name, classes in arrays.items()
+                if name.startswith("classes/")
+            }
+        )
+
+    if kind == "linear":
+        return CompactLinearModel(_scalar(arrays, "estimator"), arrays["classes"], arrays["coef"], arrays["intercept"])
+
+    if kind == "trees":
+        return CompactTreeEnsemble(
+            estimator=_scalar(arrays, "estimator"),
+            classes=arrays["classes"],
+            roots=arrays["roots"],
+            children=arrays["children"],
+            feature=arrays["feature"],
+            threshold=arrays["threshold"],
+            value=arrays["value"],
+            max_depth=_scalar(arrays, "max_depth"),
+            n_features=_scalar(arrays, "n_features")
+        )
+
+    raise ValueError(f"{_file_name(file)} contains an unknown kind of model: {kind}.")
@@ -0,0 +1,190 @@
+import os
+import sys
+import hashlib
+from functools import lru_cache
+from typing import Any, NamedTuple
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.rich_logging import logger as log
+from model.smote_type import SmoteType
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+from sklearn.model_selection import train_test_split
+
+CURRENT_DIR = os.path.abspath(__file__)
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(CURRENT_DIR)))
+DATA_DIR = os.path.join(ROOT, "server", "data")
+CACHE_DIR = os.path.join(DATA_DIR, "cache")
+
+CLEANED_CSV = os.path.join(DATA_DIR, "Theft_Over_Open_Data_Cleaned.csv")
+FILTERED_CSV = os.path.join(DATA_DIR, "Theft_Over_Open_Data_Filtered.csv")
+
+THEFT_OVER_CATEGORIES = [
+    "Theft - Misapprop Funds Over",
+    "Theft Over - Bicycle",
+    "Theft Over - Distraction",
+    "Theft Over",
+    "Theft Over - Shoplifting",
+    "Theft Of Utilities Over",
+    "Theft From Mail / Bag / Key"
+]
+
+# NOTE: Same features as the training notebooks (archive/(old)_c309_r2_toodu_model and c309_r2_toodu_model)
+CATEGORICAL_FEATURES = {
+    SmoteType.SMOTE: ["PREMISES_TYPE", "LOCATION_TYPE"],
+    SmoteType.SMOTENC: ["PREMISES_TYPE", "LOCATION_TYPE", "HOOD_158"]
+}
+NUMERICAL_FEATURES = {
+    SmoteType.SMOTE: [],
+    SmoteType.SMOTENC: ["LONG_WGS84", "LAT_WGS84", "OCC_HOUR", "REPORT_HOUR"]
+}
+
+# NOTE: Column projections, the pages never need the other columns of the dataset (e.g. REPORT_DATE)
+MODEL_COLUMNS = {
+    smote_type: CATEGORICAL_FEATURES[smote_type] + NUMERICAL_FEATURES[smote_type] + ["OFFENCE"]
+    for smote_type in SmoteType
+}
+MAP_COLUMNS = ["LONG_WGS84", "LAT_WGS84", "OFFENCE", "PREMISES_TYPE"]
+
+
+class DatasetSplit(NamedTuple):
+    x_train: Any
+    x_test: Any
+    y_train: pd.Series
+    y_test: pd.Series
+    label_encoders: dict[str, LabelEncoder]
+    target_encoder: LabelEncoder
+
+
+@lru_cache(maxsize=8)
+def _file_digest(path: str, mtime_ns: int, size: int) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_digest(path: str) -> str:
+    # NOTE: The file is only re-hashed when its mtime or size changes
+    stat = os.stat(path)
+    return _file_digest(path, stat.st_mtime_ns, stat.st_size)
+
+
+def compact_types(df: pd.DataFrame, keep: list[str] = None) -> pd.DataFrame:
+    """
+    Converts string columns to categoricals, downcasts integers, and stores floats as float32.
+
+    Columns in `keep` (the numerical model features) keep their dtype, so they are scaled
+    exactly like in the training notebooks.
+    """
+    keep = set(keep or [])
+    for col in df.columns:
+        if col in keep:
+            continue
+
+        if pd.api.types.is_integer_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], downcast="integer")
+        elif pd.api.types.is_float_dtype(df[col]):
+            df[col] = df[col].astype(np.float32)
+        elif not pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = df[col].astype("category")
+
+    return df
+
+
+def parquet_path(csv_path: str) -> str:
+    """
+    Returns the path of the Parquet copy of `csv_path`, keyed by the hash of the CSV so it is never stale.
+    """
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(CACHE_DIR, f"{name}.{file_digest(csv_path)[:16]}.parquet")
+
+
+def convert_dataset(csv_path: str, force: bool = False) -> str:
+    """
+    Converts a dataset CSV to Parquet, with string columns stored as dictionary encoded categoricals.
+    """
+    path = parquet_path(csv_path)
+    if os.path.exists(path) and not force:
+        return path
+
+    df = compact_types(pd.read_csv(csv_path), keep=NUMERICAL_FEATURES[SmoteType.SMOTENC])
+
+    # NOTE: Written to a temporary file first, so a concurrent reader never sees a partial file
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    df.to_parquet(f"{path}.tmp", engine="pyarrow", index=False)
+    os.replace(f"{path}.tmp", path)
+
+    log.info(f"Converted {os.path.basename(csv_path)} to {path}")
+    return path
+
+
+def read_dataset(csv_path: str, columns: list[str] = None) -> pd.DataFrame:
+    """
+    Reads `columns` (all of them by default) of a dataset through its Parquet copy, converting it on first use.
+
+    Falls back to reading the projected columns of the CSV when Parquet is not available.
+    """
+    try:
+        return pd.read_parquet(convert_dataset(csv_path), columns=columns)
+    except (ImportError, OSError) as e:
+        log.error(f"Could not read {os.path.basename(csv_path)} as Parquet: {str(e)}")
+
+    return compact_types(pd.read_csv(csv_path, usecols=columns), keep=NUMERICAL_FEATURES[SmoteType.SMOTENC])
+
+
+@lru_cache(maxsize=8)
+def _load(csv_path: str, digest: str, columns: tuple[str, ...] | None) -> pd.DataFrame:
+    return read_dataset(csv_path, list(columns) if columns else None)
+
+
+def load_toodu_dataset(columns: list[str] = None) -> pd.DataFrame:
+    """
+    Returns `columns` of the cleaned Theft Over dataset, loaded once per process. Callers must not mutate it.
+    """
+    return _load(CLEANED_CSV, file_digest(CLEANED_CSV), tuple(columns) if columns else None)
+
+
+def load_toodu_map(columns: list[str] = None) -> pd.DataFrame:
+    """
+    Returns `columns` of the filtered dataset (valid coordinates only) used by the map, loaded once per process.
+    """
+    return _load(FILTERED_CSV, file_digest(FILTERED_CSV), tuple(columns) if columns else None)
+
+
+@lru_cache(maxsize=4)
+def _build_split(smote_type: SmoteType, digest: str) -> DatasetSplit:
+    toodu_df = load_toodu_dataset(MODEL_COLUMNS[smote_type])
+
+    categorical_features = CATEGORICAL_FEATURES[smote_type]
+    numerical_features = NUMERICAL_FEATURES[smote_type]
+
+    offence = toodu_df["OFFENCE"].astype(str).replace(THEFT_OVER_CATEGORIES, "Theft Over")
+    target_encoder = LabelEncoder()
+    target = pd.Series(target_encoder.fit_transform(offence), name="OFFENCE_ENCODED")
+
+    label_encoders = {col: LabelEncoder() for col in categorical_features}
+    features = pd.DataFrame({
+        col: label_encoders[col].fit_transform(toodu_df[col].astype(str))
+        for col in categorical_features
+    })
+
+    if smote_type == SmoteType.SMOTE:
+        # NOTE: The SMOTE models were trained on the scaled label encoded features
+        features = StandardScaler().fit_transform(features)
+    else:
+        features[numerical_features] = StandardScaler().fit_transform(toodu_df[numerical_features])
+
+    x_train, x_test, y_train, y_test = train_test_split(features, target, test_size=0.2, random_state=42)
+    return DatasetSplit(x_train, x_test, y_train, y_test, label_encoders, target_encoder)
+
+
+def get_split(smote_type: SmoteType) -> DatasetSplit:
+    """
+    Returns the encoded train/test split used to train the models of `smote_type`, built once per process.
+    """
+    return _build_split(smote_type, file_digest(CLEANED_CSV))
@@ -0,0 +1,67 @@
+from typing import Any
+
+import numpy as np
+from sklearn.metrics import (
+    confusion_matrix,
+    classification_report,
+    accuracy_score,
+    precision_score,
+    recall_score,
+    f1_score,
+    roc_curve,
+    auc
+)
+from sklearn.model_selection import cross_val_score
+
+# NOTE: Fields of a models.json entry read by the dashboard, as written by `evaluate_and_save_model` in the
+# training notebooks and by `evaluate_models.py`
+METADATA_KEYS = {"file", "accuracy", "precision", "recall", "f1", "classification_report",
+                 "confusion_matrix", "cross_validation", "roc_curve", "auc"}
+
+
+def evaluate_model(model: Any, x_test, y_test) -> dict:
+    """
+    Returns the evaluation artifacts of a binary model on the test split, in the format of a models.json entry.
+
+    Runs ``predict``, ``predict_proba`` and a 5-fold ``cross_val_score`` (which refits copies of the model).
+    """
+    y_pred = model.predict(x_test)
+    fpr, tpr, _ = roc_curve(y_test, model.predict_proba(x_test)[:, 1])
+    cv_scores = cross_val_score(model, x_test, y_test, cv=5)
+
+    return {
+        "accuracy": accuracy_score(y_test, y_pred),
+        "precision": precision_score(y_test, y_pred),
+        "recall": recall_score(y_test, y_pred),
+        "f1": f1_score(y_test, y_pred),
+        "classification_report": classification_report(y_test, y_pred, output_dict=True),
+        "confusion_matrix": confusion_matrix(y_test, y_pred).tolist(),
+        "cross_validation": {
+            "scores": cv_scores.tolist(),
+            "mean": cv_scores.mean(),
+            "std": cv_scores.std()
+        },
+        "roc_curve": {
+            "fpr": np.round(fpr, 6).tolist(),
+            "tpr": np.round(tpr, 6).tolist()
+        },
+        "auc": auc(fpr, tpr)
+    }
+
+
+def performance_metrics(entry: dict) -> dict:
+    """
+    Returns the metrics shown by the dashboard from a models.json entry (or the output of ``evaluate_model``).
+    """
+    return {
+        "accuracy": entry["accuracy"],
+        "precision": entry["precision"],
+        "recall": entry["recall"],
+        "f1": entry["f1"],
+        "cv_mean": entry["cross_validation"]["mean"],
+        "cv_std": entry["cross_validation"]["std"],
+        "confusion_matrix": np.array(entry["confusion_matrix"]),
+        "classification_report": entry["classification_report"],
+        "roc_curve": entry["roc_curve"],
+        "auc": entry["auc"]
+    }
@@ -0,0 +1,46 @@
+import warnings
+from typing import Any
+
+import numpy as np
+
+
+def predict_proba(model: Any, features: np.ndarray) -> np.ndarray:
+    """
+    ``model.predict_proba(features)`` for the featurized ndarray of ``Preprocessor.featurize``.
+
+    sklearn models fitted on DataFrames warn that the ndarray has no feature names, the column
+    order is enforced by ``Preprocessor`` instead. The warning is only silenced around this call.
+    """
+    if not hasattr(model, "feature_names_in_"):
+        return model.predict_proba(features)
+
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message="X does not have valid feature names")
+        return model.predict_proba(features)
+
+
+def predict_with_threshold(model: Any, features: np.ndarray, threshold: float = 0.5) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Runs a single ``predict_proba`` pass and derives the labels from it.
+
+    For binary models the label is the positive class when ``P(class 1) > threshold``,
+    which matches ``model.predict`` at the default threshold of 0.5. Other models fall
+    back to the argmax. Returns the labels and the per-row ``P(class 1)`` confidences.
+    """
+    return labels_from_probabilities(model.classes_, predict_proba(model, features), threshold)
+
+
+def labels_from_probabilities(classes: np.ndarray,
+                              probabilities: np.ndarray,
+                              threshold: float = 0.5) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Labels and confidences of ``predict_with_threshold`` from already computed ``predict_proba`` rows.
+    """
+    if len(classes) == 2:
+        confidences = probabilities[:, 1]
+        labels = classes[(confidences > threshold).astype(np.intp)]
+    else:
+        confidences = probabilities.max(axis=1)
+        labels = classes[probabilities.argmax(axis=1)]
+
+    return labels, confidences
@@ -0,0 +1,168 @@
+import os
+import sys
+from functools import lru_cache
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.dataset import load_toodu_map, file_digest, FILTERED_CSV, MAP_COLUMNS
+
+import numpy as np
+import pandas as pd
+import pydeck as pdk
+
+# NOTE: Radius (meters) of the hexagons at each zoom level of the map, a few screen pixels at that zoom
+HEX_RADIUS_METERS = {
+    10: 600,
+    12: 250,
+    14: 80
+}
+
+EARTH_RADIUS_METERS = 6_371_008.8
+# NOTE: Reference latitude of the equirectangular projection, the data only covers Toronto
+REFERENCE_LAT = 43.7
+
+# NOTE: Columns sent to the browser per hexagon, the tooltip only reads these
+HEXAGON_COLUMNS = ["LON", "LAT", "COUNT", "OFFENCE", "PREMISES_TYPE"]
+
+TOOLTIP_STYLE = {
+    "backgroundColor": "rgba(0, 0, 0, 0.7)",
+    "color": "white",
+    "padding": "10px",
+    "fontSize": "14px",
+    "borderRadius": "8px"
+}
+
+
+def _project(lon: np.ndarray, lat: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    x = np.radians(lon) * EARTH_RADIUS_METERS * np.cos(np.radians(REFERENCE_LAT))
+    y = np.radians(lat) * EARTH_RADIUS_METERS
+    return x, y
+
+
+def _unproject(x: np.ndarray, y: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    lon = np.degrees(x / (EARTH_RADIUS_METERS * np.cos(np.radians(REFERENCE_LAT))))
+    lat = np.degrees(y / EARTH_RADIUS_METERS)
+    return lon, lat
+
+
+def hex_bin(lon: np.ndarray, lat: np.ndarray, radius: float) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the axial coordinates (q, r) of the pointy top hexagons of `radius` meters containing each point.
+    """
+    x, y = _project(np.asarray(lon, dtype=float), np.asarray(lat, dtype=float))
+    q = (np.sqrt(3) / 3 * x - y / 3) / radius
+    r = (2 / 3 * y) / radius
+
+    # NOTE: Cube rounding, the coordinate with the largest rounding error is recomputed from the other two
+    s = -q - r
+    rq, rr, rs = np.round(q), np.round(r), np.round(s)
+    dq, dr, ds = np.abs(rq - q), np.abs(rr - r), np.abs(rs - s)
+    fix_q = (dq > dr) & (dq > ds)
+    fix_r = ~fix_q & (dr > ds)
+    rq = np.where(fix_q, -rr - rs, rq)
+    rr = np.where(fix_r, -rq - rs, rr)
+    return rq.astype(np.int64), rr.astype(np.int64)
+
+
+def hex_center(q: np.ndarray, r: np.ndarray, radius: float) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the (lon, lat) of the centers of the hexagons (q, r) of `radius` meters.
+    """
+    x = radius * (np.sqrt(3) * q + np.sqrt(3) / 2 * r)
+    y = radius * (3 / 2 * r)
+    return _unproject(x, y)
+
+
+def aggregate_hexagons(df: pd.DataFrame, radius: float) -> pd.DataFrame:
+    """
+    Aggregates the incidents of `df` (LONG_WGS84, LAT_WGS84, OFFENCE, PREMISES_TYPE) into hexagons of
+    `radius` meters: one row per non empty hexagon with its center, the number of incidents and the
+    most common offence and premises type.
+    """
+    q, r = hex_bin(df["LONG_WGS84"].to_numpy(), df["LAT_WGS84"].to_numpy(), radius)
+    cells = pd.DataFrame({"q": q, "r": r, "OFFENCE": df["OFFENCE"].to_numpy(),
+                          "PREMISES_TYPE": df["PREMISES_TYPE"].to_numpy()})
+
+    hexagons = cells.groupby(["q", "r"]).size().rename("COUNT").to_frame()
+    for col in ("OFFENCE", "PREMISES_TYPE"):
+        # NOTE: value_counts sorts by count, the first row of each hexagon is its most common value
+        counts = cells.value_counts(["q", "r", col]).reset_index()
+        hexagons[col] = counts.drop_duplicates(["q", "r"]).set_index(["q", "r"])[col]
+
+    lon, lat = hex_center(hexagons.index.get_level_values("q"), hexagons.index.get_level_values("r"), radius)
+    # NOTE: 5 decimals is about a meter, enough for a center and much shorter in the JSON sent to the browser
+    hexagons["LON"] = np.round(lon, 5)
+    hexagons["LAT"] = np.round(lat, 5)
+
+    return hexagons[HEXAGON_COLUMNS].sort_values("COUNT", ascending=False).reset_index(drop=True)
+
+
+@lru_cache(maxsize=8)
+def _build_hexagons(zoom: int, digest: str) -> pd.DataFrame:
+    return aggregate_hexagons(load_toodu_map(MAP_COLUMNS), HEX_RADIUS_METERS[zoom])
+
+
+def load_hexagons(zoom: int) -> pd.DataFrame:
+    """
+    Returns the incidents of the map aggregated into hexagons sized for `zoom` (a key of HEX_RADIUS_METERS),
+    built once per process and per version of the filtered dataset. Callers must not mutate it.
+    """
+    return _build_hexagons(zoom, file_digest(FILTERED_CSV))
+
+
+@lru_cache(maxsize=8)
+def _build_deck(zoom: int | None, digest: str) -> pdk.Deck:
+    if zoom is None:
+        toodu_df_map = load_toodu_map(MAP_COLUMNS).rename(columns={"LAT_WGS84": "LAT", "LONG_WGS84": "LON"})
+        layer = pdk.Layer(
+            "ScatterplotLayer",
+            data=toodu_df_map,
+            get_position=["LON", "LAT"],
+            get_radius=40,
+            get_color=[255, 0, 0],
+            pickable=True,
+            auto_highlight=True,
+        )
+        tooltip = ("LAT: <b>{LAT}</b><br>LON: <b>{LON}</b><br>OFFENCE: <b>{OFFENCE}</b><br>"
+                   "PREMISES_TYPE: <b>{PREMISES_TYPE}</b>")
+    else:
+        hexagons = load_hexagons(zoom)
+        layer = pdk.Layer(
+            "ColumnLayer",
+            data=hexagons,
+            get_position=["LON", "LAT"],
+            get_elevation="COUNT",
+            # NOTE: Six sided columns rotated to the pointy top hexagons of `hex_bin`
+            disk_resolution=6,
+            angle=90,
+            radius=HEX_RADIUS_METERS[zoom],
+            coverage=0.95,
+            elevation_scale=HEX_RADIUS_METERS[zoom] / 2,
+            extruded=True,
+            get_fill_color=[255, 0, 0, 180],
+            pickable=True,
+            auto_highlight=True,
+        )
+        tooltip = ("Incidents: <b>{COUNT}</b><br>Most common OFFENCE: <b>{OFFENCE}</b><br>"
+                   "Most common PREMISES_TYPE: <b>{PREMISES_TYPE}</b><br>Center: <b>{LAT}, {LON}</b>")
+
+    return pdk.Deck(
+        map_style="mapbox://styles/mapbox/dark-v10",
+        initial_view_state=pdk.ViewState(
+            latitude=43.651070,
+            longitude=-79.384331,
+            zoom=zoom or 10,
+            pitch=45,
+        ),
+        layers=[layer],
+        tooltip={"html": tooltip, "style": TOOLTIP_STYLE},
+    )
+
+
+def build_deck(zoom: int | None) -> pdk.Deck:
+    """
+    Returns the incident map at `zoom`: the incidents aggregated into hexagons (extruded by their number of
+    incidents), or every incident as a point if `zoom` is None. Built once per process and per version of the
+    filtered dataset, as pydeck converts the layer data to records when the layer is created.
+    """
+    return _build_deck(zoom, file_digest(FILTERED_CSV))
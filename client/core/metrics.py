@@ -0,0 +1,124 @@
+import bisect
+import threading
+
+# NOTE: Seconds, from sub-millisecond featurization up to multi-second batch predictions
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BATCH_SIZE_BUCKETS = (1, 10, 100, 1000, 10000, 50000)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    labels = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        labels.append(extra)
+    return "{" + ",".join(labels) + "}" if labels else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, label_names: tuple[str, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.__values: dict[tuple, float] = {}
+        self.__lock = threading.Lock()
+
+    def inc(self, labels: tuple, amount: float = 1) -> None:
+        with self.__lock:
+            self.__values[labels] = self.__values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        with self.__lock:
+            values = dict(self.__values)
+
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, label_names: tuple[str, ...], buckets: tuple[float, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.buckets = buckets
+        # NOTE: Per label set: one count per bucket (non-cumulative, +Inf last), the sum and the count
+        self.__values: dict[tuple, list] = {}
+        self.__lock = threading.Lock()
+
+    def observe(self, labels: tuple, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self.__lock:
+            entry = self.__values.get(labels)
+            if entry is None:
+                entry = self.__values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self) -> list[str]:
+        with self.__lock:
+            values = {labels: (list(counts), total, count) for labels, (counts, total, count) in self.__values.items()}
+
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in sorted(values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += bucket_count
+                le = 'le="' + (bound if bound == "+Inf" else _format_value(bound)) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {count}")
+        return lines
+
+
+class Metrics:
+    """
+    In-process request metrics of the API, rendered in the Prometheus text exposition format.
+
+    Metrics are kept per process: under gunicorn every worker exposes its own values, which
+    Prometheus aggregates when it scrapes the workers (or a sidecar) individually.
+    """
+
+    def __init__(self):
+        self.requests = Counter("toodu_requests_total", "Requests served, by route, model and status code.",
+                                ("route", "model", "status"))
+        self.errors = Counter("toodu_request_errors_total", "Requests answered with a 4xx or 5xx status code.",
+                              ("route", "model"))
+        self.request_seconds = Histogram("toodu_request_duration_seconds", "Time spent in the route handler.",
+                                         ("route", "model"), LATENCY_BUCKETS)
+        self.stage_seconds = Histogram("toodu_stage_duration_seconds",
+                                       "Time spent per stage (parse, lookup, featurize, inference, serialize).",
+                                       ("route", "model", "stage"), LATENCY_BUCKETS)
+        self.batch_rows = Histogram("toodu_batch_size_rows", "Rows per prediction request.",
+                                    ("route", "model"), BATCH_SIZE_BUCKETS)
+
+    def observe_request(self, route: str, model: str, status: int, seconds: float,
+                        stages: dict[str, float], rows: int | None) -> None:
+        labels = (route, model)
+        self.requests.inc((route, model, status))
+        if status >= 400:
+            self.errors.inc(labels)
+
+        self.request_seconds.observe(labels, seconds)
+        for stage, stage_seconds in stages.items():
+            self.stage_seconds.observe((route, model, stage), stage_seconds)
+
+        if rows is not None:
+            self.batch_rows.observe(labels, rows)
+
+    def render(self) -> str:
+        lines = []
+        for metric in (self.requests, self.errors, self.request_seconds, self.stage_seconds, self.batch_rows):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
@@ -1,34 +1,24 @@
 import os
 import sys
+import json
 import pickle
+import hashlib
 from typing import Any
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from core.orouter_client import OpenRouterClient
+from constants import API_URL
+from core.evaluation import METADATA_KEYS, evaluate_model, performance_metrics
 from model.smote_type import SmoteType
 
 import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
-from sklearn.model_selection import cross_val_score
-from sklearn.metrics import (
-    confusion_matrix,
-    classification_report,
-    accuracy_score,
-    precision_score,
-    recall_score,
-    f1_score
-)
+from sklearn.metrics import classification_report
+import requests
 import streamlit as st
-from dotenv import load_dotenv, find_dotenv
 
-load_dotenv(find_dotenv())
-client = OpenRouterClient()
 
-
-def format_classification_report(y_test, y_pred) -> None:
-    report_dict = classification_report(y_test, y_pred, output_dict=True)
+def format_classification_report(y_test=None, y_pred=None, report_dict: dict = None) -> None:
+    report_dict = report_dict or classification_report(y_test, y_pred, output_dict=True)
     report_df = pd.DataFrame(report_dict).transpose()
 
     st.dataframe(
@@ -38,36 +28,112 @@ def format_classification_report(y_test, y_pred) -> None:
     )
 
 
-def display_model_performance(model, x_test, y_test, model_name) -> None:
-    y_pred = model.predict(x_test)
-    accuracy = accuracy_score(y_test, y_pred)
-    precision = precision_score(y_test, y_pred)
-    recall = recall_score(y_test, y_pred)
-    f1 = f1_score(y_test, y_pred)
+@st.cache_data(show_spinner=False)
+def file_digest(path: str, mtime_ns: int) -> str:
+    # NOTE: `mtime_ns` is only part of the cache key, the file is re-hashed when it changes on disk
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def model_digest(model_path: str) -> str:
+    return file_digest(model_path, os.stat(model_path).st_mtime_ns)
+
+
+@st.cache_resource(show_spinner=False)
+def load_cached_model(model_path: str, digest: str) -> Any | None:
+    return safe_load_models(model_path)
+
+
+def load_model(model_path: str) -> Any | None:
+    try:
+        return load_cached_model(model_path, model_digest(model_path))
+    except OSError as e:
+        st.error(f"Could not load model: {e}")
+
+
+@st.cache_data(show_spinner=False)
+def load_models_metadata(path: str, mtime_ns: int) -> dict[str, dict]:
+    with open(path, "r") as file:
+        return {entry["file"]: entry for entry in json.load(file) if "file" in entry}
+
+
+def get_model_metadata(model_path: str) -> dict | None:
+    """
+    Returns the evaluation artifacts saved in `models.json` (by the training notebooks or `evaluate_models.py`)
+    for a model file.
+
+    Returns None when the file has no complete entry (e.g. it was written by an older notebook).
+    """
+    path = os.path.join(os.path.dirname(model_path), "models.json")
+    if not os.path.exists(path):
+        return None
 
-    cv_scores = cross_val_score(model, x_test, y_test, cv=5)
+    entry = load_models_metadata(path, os.stat(path).st_mtime_ns).get(os.path.basename(model_path))
+    if not entry or not METADATA_KEYS <= entry.keys():
+        return None
+
+    return performance_metrics(entry)
+
+
+@st.cache_data(show_spinner="Computing model performance...")
+def compute_model_performance(_model, digest: str, x_test, y_test) -> dict:
+    """
+    Computes the metrics shown by `display_model_performance` once per (model file hash, test split).
+
+    `_model` is not hashed by Streamlit, the model is identified by the `digest` of its file instead.
+    Only used for models without evaluation artifacts in `models.json`.
+    """
+    return performance_metrics(evaluate_model(_model, x_test, y_test))
+
+
+def display_model_performance(model, x_test, y_test, model_name, model_path: str = None) -> None:
+    # NOTE: Imported on first use, so importing this module (and the pages) does not load the plotting stack
+    import seaborn as sns
+    import matplotlib.pyplot as plt
+
+    metrics = get_model_metadata(model_path) if model_path else None
+    if metrics is None:
+        digest = model_digest(model_path) if model_path else model_name
+        metrics = compute_model_performance(model, digest, x_test, y_test)
+
+    accuracy = metrics["accuracy"]
+    precision = metrics["precision"]
+    recall = metrics["recall"]
+    f1 = metrics["f1"]
 
     st.subheader(f"{model_name} Performance Metrics")
 
     col1, col2, col3, col4 = st.columns(4)
     col1.metric("Accuracy", f"{accuracy:.2%}", f"{accuracy:.2%}")
-    col1.metric("Cross-Validation Mean Score", f"{cv_scores.mean():.2%}")
+    col1.metric("Cross-Validation Mean Score", f"{metrics['cv_mean']:.2%}")
     col2.metric("Precision", f"{precision:.2%}", f"{precision:.2%}")
-    col2.metric("Cross-Validation Score Std", f"{cv_scores.std():.2%}")
+    col2.metric("Cross-Validation Score Std", f"{metrics['cv_std']:.2%}")
     col3.metric("Recall", f"{recall:.2%}", f"{recall:.2%}")
+    col3.metric("AUC", f"{metrics['auc']:.4f}")
     col4.metric("F1 Score", f"{f1:.2%}", f"{f1:.2%}")
 
     st.subheader("Confusion Matrix")
-    cm = confusion_matrix(y_test, y_pred)
     plt.figure(figsize=(8, 6))
-    sns.heatmap(cm, annot=True, fmt='d', cmap='OrRd')
+    sns.heatmap(metrics["confusion_matrix"], annot=True, fmt='d', cmap='OrRd')
     plt.title(f'Confusion Matrix - {model_name}')
     st.pyplot(plt)
 
-    format_classification_report(
-        y_test=y_test,
-        y_pred=y_pred
-    )
+    st.subheader("ROC Curve")
+    plt.figure(figsize=(8, 6))
+    plt.plot(metrics["roc_curve"]["fpr"], metrics["roc_curve"]["tpr"], label=f"AUC: {metrics['auc']:.4f}", color="darkorange")
+    plt.plot([0, 1], [0, 1], color='navy', lw=2, linestyle='--')
+    plt.xlim([0.0, 1.0])
+    plt.ylim([0.0, 1.05])
+    plt.xlabel("False Positive Rate")
+    plt.ylabel("True Positive Rate")
+    plt.title(f'ROC Curve - {model_name}')
+    plt.legend(loc="lower right")
+    st.pyplot(plt)
+
+    format_classification_report(report_dict=metrics["classification_report"])
 
 
 def safe_load_models(model_path) -> Any | None:
@@ -80,39 +146,36 @@ def safe_load_models(model_path) -> Any | None:
         st.error(f"Could not load model: {e}")
 
 
-def prediction_analysis(input_json: dict, model_name: str, _type: str) -> None:
+def prediction_analysis(input_json: dict, model_name: str, _type: str, stream: bool = True) -> None:
     st.markdown("---")
     st.subheader(f"Prediction Analysis for {model_name}")
 
-    print(f"input_json: {input_json}")
-
-    smote_type = SmoteType.match_str(_type)
-
-    response = client.create_chat_completion(
-        messages=[
-            {
-                "role": "user",
-                "content": f"""
-                The predictive model used is `{model_name}`.
-                
-                Here is the JSON data you will make an analysis on: 
-                {input_json}
-                
-                The oversampling technique that was used for this analysis is `{smote_type}`.
-                """
-            }
-        ],
-        temperature=1,
-        max_tokens=0
-    )
+    # NOTE: The analysis is generated by the API, which caches and coalesces identical requests across sessions
+    payload = {
+        "prediction": input_json,
+        "model_name": model_name,
+        "smote_type": SmoteType.match_str(_type)
+    }
 
-    if response:
-        # st.markdown(body=f"""
-        #      <div style="word-wrap: break-word; overflow-wrap: break-word; white-space: normal;">
-        #         {response}
-        #     </div>
-        #     """, unsafe_allow_html=True)
-        st.write(response)
-        
-    else:
+    try:
+        response = requests.post(f"{API_URL}/summarize", params={"stream": str(stream).lower()},
+                                 json=payload, stream=stream, timeout=(5, 120))
+
+        if response.status_code != 200:
+            st.error(f"There was an error processing the request you provided: "
+                     f"{response.json()['data']['error']}")
+            return
+
+        if stream:
+            # NOTE: Tokens are rendered as they arrive instead of after the whole completion was generated
+            response.encoding = response.encoding or "utf-8"
+            summary = st.write_stream(response.iter_content(chunk_size=None, decode_unicode=True))
+        else:
+            summary = response.json()["summary"]
+            st.write(summary)
+
+    except (requests.RequestException, ValueError, KeyError):
+        summary = None
+
+    if not summary:
         st.error("There was an error processing the request you provided.")
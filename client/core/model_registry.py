@@ -0,0 +1,241 @@
+import os
+import sys
+import json
+import time
+import pickle
+import threading
+from typing import Any, BinaryIO, Callable
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.rich_logging import logger as log
+from core.preprocessing import Preprocessor
+from core import compact_models
+from model.smote_type import SmoteType
+from constants import MODEL_FORMAT
+
+CURRENT_DIR = os.path.abspath(__file__)
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(CURRENT_DIR)))
+MODELS_DIR = os.path.join(ROOT, "server", "models")
+
+# NOTE: Maps the model name sent by the client (the estimator class name) to its .pkl file,
+# served from the .npz exported next to it (see `export_models.py`) when MODEL_FORMAT is "npz"
+MODEL_FILES = {
+    SmoteType.SMOTE: {
+        "LogisticRegression": "lr_model.pkl",
+        "DecisionTreeClassifier": "dt_model.pkl",
+        "RandomForestClassifier": "rf_model.pkl"
+    },
+    SmoteType.SMOTENC: {
+        "LogisticRegression": "lr_model_smotenc.pkl",
+        "DecisionTreeClassifier": "dt_model_smotenc.pkl",
+        "RandomForestClassifier": "rf_model_smotenc.pkl"
+    }
+}
+
+# NOTE: Fitted encoders/scaler exported by the training notebooks, shared by the models of a SmoteType
+PREPROCESSOR_FILES = {
+    SmoteType.SMOTE: "preprocessor.pkl",
+    SmoteType.SMOTENC: "preprocessor_smotenc.pkl"
+}
+
+# NOTE: Decision thresholds on P(class 1) keyed by model file, can be tuned without retraining the models
+THRESHOLDS_FILE = "thresholds.json"
+DEFAULT_THRESHOLD = 0.5
+
+
+class ModelEntry:
+    __slots__ = ("model", "path", "signature", "load_seconds", "loaded_at")
+
+    def __init__(self, model: Any, path: str, signature: tuple[int, int], load_seconds: float):
+        self.model = model
+        self.path = path
+        self.signature = signature
+        self.load_seconds = load_seconds
+        self.loaded_at = time.time()
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of the deployed models and preprocessors, keyed by ``(SmoteType, file)``.
+
+    Every artifact is loaded once and kept in memory. On each lookup the file is
+    stat-ed, and the artifact is only reloaded when its mtime or size changed on disk.
+
+    With the "npz" format, artifacts exported by ``export_models.py`` are served instead of
+    their pickles: their arrays are memory mapped read-only, so every process serving the same
+    file (gunicorn workers, including after a reload, or separate servers) shares one copy of
+    them in the page cache, and sklearn is never imported. Artifacts without an ``.npz``, or
+    whose ``.npz`` was not exported from the current pickle (e.g. a retrained model), are
+    still unpickled.
+    """
+
+    def __init__(self,
+                 models_dir: str = MODELS_DIR,
+                 model_files: dict = None,
+                 preprocessor_files: dict = None,
+                 model_format: str = MODEL_FORMAT):
+        if model_format not in ("npz", "pickle"):
+            raise ValueError(f"Model format '{model_format}' is not supported.")
+
+        self.__models_dir = models_dir
+        self.__model_files = model_files or MODEL_FILES
+        self.__preprocessor_files = preprocessor_files or PREPROCESSOR_FILES
+        self.__model_format = model_format
+        self.__entries: dict[tuple[SmoteType | None, str], ModelEntry] = {}
+        self.__served: dict[str, tuple[tuple, str]] = {}
+        self.__lock = threading.Lock()
+        # NOTE: Hits are counted without taking `__lock`, so that a hit never waits on another model being loaded
+        self.__hits_lock = threading.Lock()
+        self.__hits = 0
+        self.__misses = 0
+        self.__reloads = 0
+
+    @property
+    def models_dir(self) -> str:
+        return self.__models_dir
+
+    def resolve(self, smote_type: SmoteType, model_name: str) -> str:
+        if not model_name:
+            raise ValueError("No model name was provided in the request.")
+
+        file_name = self.__model_files.get(smote_type, {}).get(model_name)
+        if not file_name:
+            raise ValueError(f"Model name '{model_name}' is not supported.")
+
+        return file_name
+
+    def get(self, smote_type: SmoteType, model_name: str) -> Any:
+        file_name = self.__served_file(self.resolve(smote_type, model_name))
+        if file_name.endswith(".npz"):
+            return self.__fetch(smote_type, file_name, compact_models.load)
+
+        return self.__fetch(smote_type, file_name, pickle.load)
+
+    def get_preprocessor(self, smote_type: SmoteType) -> Preprocessor:
+        file_name = self.__served_file(self.__preprocessor_files[smote_type])
+        if file_name.endswith(".npz"):
+            return self.__fetch(smote_type, file_name, compact_models.load)
+
+        return self.__fetch(smote_type, file_name, lambda file: Preprocessor.from_artifact(pickle.load(file)))
+
+    def get_threshold(self, smote_type: SmoteType, model_name: str) -> float:
+        file_name = self.resolve(smote_type, model_name)
+        if not os.path.exists(os.path.join(self.__models_dir, THRESHOLDS_FILE)):
+            return DEFAULT_THRESHOLD
+
+        thresholds = self.__fetch(None, THRESHOLDS_FILE, json.load)
+        threshold = float(thresholds.get(file_name, DEFAULT_THRESHOLD))
+        if not 0 <= threshold <= 1:
+            raise ValueError(f"Invalid threshold for {file_name} was provided: {threshold}")
+
+        return threshold
+
+    def preload(self) -> None:
+        for smote_type, files in self.__model_files.items():
+            try:
+                self.get_preprocessor(smote_type)
+            except Exception as e:
+                log.error(f"Could not preload preprocessor ({smote_type.value[0]}): {str(e)}")
+
+            for model_name in files:
+                try:
+                    self.get(smote_type, model_name)
+                except Exception as e:
+                    log.error(f"Could not preload model {model_name} ({smote_type.value[0]}): {str(e)}")
+
+    def stats(self) -> dict:
+        return {
+            "format": self.__model_format,
+            "hits": self.__hits,
+            "misses": self.__misses,
+            "reloads": self.__reloads,
+            "models": {
+                (f"{smote_type.value[0]}/{file_name}" if smote_type else file_name): {
+                    "load_seconds": entry.load_seconds,
+                    "loaded_at": entry.loaded_at
+                }
+                for (smote_type, file_name), entry in self.__entries.items()
+            }
+        }
+
+    def __served_file(self, file_name: str) -> str:
+        if self.__model_format != "npz":
+            return file_name
+
+        npz_name = f"{os.path.splitext(file_name)[0]}.npz"
+        pkl_path, npz_path = os.path.join(self.__models_dir, file_name), os.path.join(self.__models_dir, npz_name)
+
+        signatures = (_signature(pkl_path), _signature(npz_path))
+        if signatures[1] is None:
+            return file_name
+        if signatures[0] is None:
+            return npz_name
+
+        # NOTE: The pickle is only re-hashed when one of the two files changed on disk
+        served = self.__served.get(file_name)
+        if served is not None and served[0] == signatures:
+            return served[1]
+
+        if compact_models.exported_from(npz_path) == compact_models.source_digest(pkl_path):
+            served_name = npz_name
+        else:
+            served_name = file_name
+            log.warning(f"{npz_name} was not exported from the current {file_name}, serving the pickle instead. "
+                        f"Run export_models.py to export it again.")
+
+        self.__served[file_name] = (signatures, served_name)
+        return served_name
+
+    def __fetch(self, smote_type: SmoteType | None, file_name: str, loader: Callable[[BinaryIO], Any]) -> Any:
+        path = os.path.join(self.__models_dir, file_name)
+
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        key = (smote_type, file_name)
+        entry = self.__entries.get(key)
+        if entry is not None and entry.signature == signature:
+            self.__count_hit()
+            return entry.model
+
+        with self.__lock:
+            # NOTE: Another thread may have loaded the artifact while we waited on the lock
+            entry = self.__entries.get(key)
+            if entry is not None and entry.signature == signature:
+                self.__count_hit()
+                return entry.model
+
+            if entry is not None:
+                self.__reloads += 1
+                log.info(f"Model file {file_name} changed on disk, reloading it.")
+
+            self.__misses += 1
+            self.__entries[key] = self.__load(path, signature, loader)
+            return self.__entries[key].model
+
+    def __count_hit(self) -> None:
+        with self.__hits_lock:
+            self.__hits += 1
+
+    @staticmethod
+    def __load(path: str, signature: tuple[int, int], loader: Callable[[BinaryIO], Any]) -> ModelEntry:
+        time_in = time.perf_counter()
+        with open(path, "rb") as file:
+            model = loader(file)
+        load_seconds = time.perf_counter() - time_in
+
+        log.info(f"Loaded {os.path.basename(path)} in {load_seconds:.4f} seconds.")
+        return ModelEntry(model, path, signature, load_seconds)
+
+
+def _signature(path: str) -> tuple[int, int] | None:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+
+    return stat.st_mtime_ns, stat.st_size
+
+
+registry = ModelRegistry()
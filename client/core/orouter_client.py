@@ -1,89 +1,141 @@
 import os
 import sys
-from typing import List, Dict, Any
+import threading
+from typing import List, Dict, Any, Iterator
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from constants import OPENROUTER_MODEL, OPENROUTER_API_KEY, OPENROUTER_API_URL
-from core.rich_logging import logger as log
+from constants import (
+    OPENROUTER_MODEL,
+    OPENROUTER_API_KEY,
+    OPENROUTER_API_URL,
+    OPENROUTER_CACHE_SIZE,
+    OPENROUTER_CACHE_TTL,
+    OPENROUTER_CACHE_DB,
+    OPENROUTER_TIMEOUT,
+    OPENROUTER_CONNECT_TIMEOUT,
+    OPENROUTER_INPUT_TOKEN_BUDGET
+)
+from core.rich_logging import logger as log, log_payload
+from core.response_cache import ResponseCache, make_key
+from core.single_flight import SingleFlight
+from core.prompt import count_tokens, compact_json, summarize_prediction
 
+import httpx
 from openai import OpenAI, OpenAIError
 
+# NOTE: Kept short as it is sent with every analysis, the prediction itself is sent as a fixed size summary
 DEFAULT_SYSTEM_PROMPT = """
-You are a skilled data scientist tasked with evaluating the performance of predictive models applied
-to datasets from the Toronto Police Portal. Your goal is to analyze the model outputs and assess 
-their efficiency in predicting theft types based on specific features. Follow the instructions 
-below to provide a concise and thorough analysis.
-
-The models are specified in the JSON data under the `model_name` field, with the following options:
-1. `LogisticRegression`
-2. `DecisionTreeClassifier`
-3. `RandomForestClassifier`
-
-SMOTE (smote):
-Features used: `LOCATION_TYPE`, `PREMISES_TYPE`
-Example JSON:
-   {
-       "model": "lr_model.pkl",
-       "prediction": {
-           "confidence": 0.8198601086183642,
-           "values": "1, 0"
-       },
-       "status": 200,
-       "timestamp": "Tue, 10 Dec 2024 23:41:16 GMT"
-   }
-   
----
-SMOTENC (smotenc):
-Features used: LOCATION_TYPE, PREMISES_TYPE, HOOD_158, LONG_WGS84, LAT_WGS84, OCC_HOUR, REPORT_HOUR
-Example JSON:
-    {
-        "model": "lr_model_smotenc.pkl",
-        "prediction": {
-            "confidence": 0.8150654624056394,
-            "values": "1"
-        },
-        "status": 200,
-        "timestamp": "Wed, 11 Dec 2024 01:35:22 GMT"
-    }
-    
----
-Prediction Details
-
-The prediction.values field contains a comma-separated string of predicted outcomes:
-- 0 indicates Theft From Motor Vehicle Over $5000.
-- 1 indicates Theft Over $5000.
-
-The model's objective is to classify whether a given location is more likely to experience 
-a Motor Vehicle Theft Over $5000 or a Theft Over $5000.
-
----
-Required Output Format  
-
-1. Confidence Analysis: Provide the confidence score and discuss what it reveals about the model’s 
-certainty in its prediction.
-
-2. Insights: Highlight key recommendations or takeaways for analysts based on the prediction, ensuring 
-the output is clear, well-structured, and easy to understand.
-
-3. Operational Insights: Discuss the operational implications of the prediction, providing context and 
-contextualizing the results.
-
-4. Structure: Organized into clearly labeled sections for easy understanding and navigation.
-    
-Take into Account:
-- Do not include titles but include headers for each section bolded in the format of:
-    - ### Section Title
-- Do not separate sections but when necessary, use a new line.
-- Do not include any additional text or explanations beyond the required sections.
-- Do not include any unnecessary or redundant information.
-- Include styling within the paragraphs to enhance readability.
-- Do not include a title in the beginning.
+You are a skilled data scientist analyzing the predictions of models trained on the Theft Over data
+of the Toronto Police Portal. Models: LogisticRegression, DecisionTreeClassifier, RandomForestClassifier.
+Oversampling: smote (features LOCATION_TYPE, PREMISES_TYPE) or smotenc (LOCATION_TYPE, PREMISES_TYPE,
+HOOD_158, LONG_WGS84, LAT_WGS84, OCC_HOUR, REPORT_HOUR).
+
+The prediction is summarized as JSON:
+- rows: number of predicted rows, class_counts: rows per predicted class, where 0 is Theft From
+  Motor Vehicle Over $5000 and 1 is Theft Over $5000.
+- threshold: decision threshold applied to P(class 1).
+- p_class_1: mean, min and max of P(class 1) over the rows, and a histogram of the percent of rows
+  in each of `bins` equal width bins of [0, 1].
+- error: set instead of the above when the prediction failed.
+
+Write the following sections, each with a bolded header in the format `### Section Title`:
+1. Confidence Analysis: what the probabilities reveal about the model's certainty.
+2. Insights: key recommendations or takeaways for analysts.
+3. Operational Insights: the operational implications of the prediction, in context.
+
+Do not include a title or any text beyond these sections. Be concise, and use styling within the
+paragraphs to enhance readability.
 """
 
 
+def build_chat_request(messages: List[Dict[str, str]],
+                       temperature: float,
+                       max_tokens: int,
+                       top_p: float,
+                       frequency_penalty: float,
+                       presence_penalty: float,
+                       response_format: Dict) -> Dict[str, Any]:
+    """
+    Returns the keyword arguments of a chat completion request, with the system prompt prepended.
+    """
+    kwargs = {
+        "model": OPENROUTER_MODEL,
+        "messages": [
+            {
+                "role": "system",
+                "content": DEFAULT_SYSTEM_PROMPT
+            },
+            *messages
+        ],
+        "temperature": temperature or 1,
+        "max_tokens": max_tokens,
+        "top_p": top_p or 1,
+        "frequency_penalty": frequency_penalty or 0,
+        "presence_penalty": presence_penalty or 0,
+        "response_format": response_format
+    }
+
+    # NOTE: Numerical value checks for <= 0
+    check_dict = [
+        "temperature",
+        "max_tokens",
+        "top_p",
+        "frequency_penalty",
+        "presence_penalty",
+    ]
+
+    for item in check_dict:
+        match item:
+            case value if isinstance(value, int) or isinstance(value, float):
+                if value < 0:
+                    log.error(f"Invalid value for {item} was provided: {value}")
+                    raise ValueError(f"Invalid value for {item} was provided: {value}")
+
+                if value == 0:
+                    log.info(f"Value for {item} is 0, ignoring it in the request.")
+                    kwargs.pop(item)
+            case _:
+                pass
+
+    return kwargs
+
+
+def analysis_messages(input_json: dict,
+                      model_name: str,
+                      smote_type: str,
+                      token_budget: int = OPENROUTER_INPUT_TOKEN_BUDGET) -> List[Dict[str, str]]:
+    """
+    Returns the user message asking for the analysis of the prediction response `input_json`.
+
+    The prediction is sent as a fixed size summary (see `summarize_prediction`), so the prompt does not
+    grow with the number of predicted rows. Raises ValueError if the prompt exceeds `token_budget` tokens.
+    """
+    system_tokens = count_tokens(DEFAULT_SYSTEM_PROMPT)
+
+    # NOTE: The confidence histogram is the first detail dropped to fit the budget
+    for histogram in (True, False):
+        content = (f"Model: {model_name}\n"
+                   f"Oversampling: {smote_type}\n"
+                   f"Prediction: {compact_json(summarize_prediction(input_json, histogram=histogram))}")
+
+        tokens = system_tokens + count_tokens(content)
+        if tokens <= token_budget:
+            return [{"role": "user", "content": content}]
+
+        log.info(f"Analysis prompt of {tokens} tokens exceeds the budget of {token_budget} tokens")
+
+    raise ValueError(f"The analysis prompt ({tokens} tokens) exceeds the input budget of {token_budget} tokens.")
+
+
 class OpenRouterClient:
-    def __init__(self):
+    def __init__(self, cache: ResponseCache | None = None):
+        self.__cache = cache or ResponseCache(
+            max_entries=OPENROUTER_CACHE_SIZE,
+            ttl=OPENROUTER_CACHE_TTL,
+            db_path=OPENROUTER_CACHE_DB
+        )
+        self.__in_flight = SingleFlight()
         self.__api_url = os.getenv("OPENROUTER_API_BASE_URL")
         self.__api_key = os.getenv("OPENROUTER_API_KEY")
         self.__client = OpenAI(
@@ -93,6 +145,7 @@ class OpenRouterClient:
                 "Authorization": f"Bearer {self.__api_key}",
                 "Content-Type": "application/json"
             },
+            timeout=httpx.Timeout(OPENROUTER_TIMEOUT, connect=OPENROUTER_CONNECT_TIMEOUT),
         )
 
     @property
@@ -103,6 +156,10 @@ class OpenRouterClient:
     def client(self, client: OpenAI) -> None:
         self.__client = client
 
+    @property
+    def cache(self) -> ResponseCache:
+        return self.__cache
+
     @property
     def api_url(self) -> str:
         return self.__api_url
@@ -118,47 +175,26 @@ class OpenRouterClient:
                                top_p: float = 1,
                                frequency_penalty: float = 0,
                                presence_penalty: float = 0,
-                               response_format: Dict = None) -> Any:
-
-        kwargs = {
-            "model": OPENROUTER_MODEL,
-            "messages": [
-                {
-                    "role": "system",
-                    "content": DEFAULT_SYSTEM_PROMPT
-                },
-                *messages
-            ],
-            "temperature": temperature or 1,
-            "max_tokens": max_tokens,
-            "top_p": top_p or 1,
-            "frequency_penalty": frequency_penalty or 0,
-            "presence_penalty": presence_penalty or 0,
-            "response_format": response_format
-        }
-
-        # NOTE: Numerical value checks for <= 0
-        check_dict = [
-            "temperature",
-            "max_tokens",
-            "top_p",
-            "frequency_penalty",
-            "presence_penalty",
-        ]
-
-        for item in check_dict:
-            match item:
-                case value if isinstance(value, int) or isinstance(value, float):
-                    if value < 0:
-                        log.error(f"Invalid value for {item} was provided: {value}")
-                        raise ValueError(f"Invalid value for {item} was provided: {value}")
-
-                    if value == 0:
-                        log.info(f"Value for {item} is 0, ignoring it in the request.")
-                        kwargs.pop(item)
-                case _:
-                    pass
+                               response_format: Dict = None,
+                               use_cache: bool = True) -> Any:
+
+        kwargs = build_chat_request(messages, temperature, max_tokens, top_p,
+                                    frequency_penalty, presence_penalty, response_format)
+
+        # NOTE: Identical analyses (same messages once timestamps are stripped) are answered from the cache
+        cache_key = make_key(kwargs)
+        if use_cache:
+            cached = self.__cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        # NOTE: Concurrent identical requests (e.g. several users asking about the same prediction) share one call
+        content, shared = self.__in_flight.do(cache_key, lambda: self.__complete(kwargs, cache_key))
+        if shared:
+            log.info(f"Coalesced chat completion {cache_key[:12]} with the request already in flight")
+        return content
 
+    def __complete(self, kwargs: Dict[str, Any], cache_key: str) -> Any:
         try:
             response = self.__client.chat.completions.create(**kwargs)
 
@@ -170,5 +206,83 @@ class OpenRouterClient:
             log.error(f"Other error occurred while creating chat completion: {str(e)}")
             raise e
 
-        log.info(f"Response from OpenRouter API: {response}")
-        return response.choices[0].message.content
+        log_payload("Response from OpenRouter API: %s", response)
+        content = response.choices[0].message.content
+
+        if content:
+            self.__cache.set(cache_key, content)
+        return content
+
+    def stream_chat_completion(self,
+                               messages: List[Dict[str, str]],
+                               temperature: float = 1,
+                               max_tokens: int = 256,
+                               top_p: float = 1,
+                               frequency_penalty: float = 0,
+                               presence_penalty: float = 0,
+                               response_format: Dict = None,
+                               use_cache: bool = True) -> Iterator[str]:
+        """
+        Streaming variant of `create_chat_completion`, yields the content deltas as soon as they arrive.
+
+        A cached response is yielded at once, and a completed stream is added to the cache. Concurrent
+        identical streams are coalesced like `create_chat_completion`.
+        """
+        kwargs = build_chat_request(messages, temperature, max_tokens, top_p,
+                                    frequency_penalty, presence_penalty, response_format)
+
+        cache_key = make_key(kwargs)
+        if use_cache:
+            cached = self.__cache.get(cache_key)
+            if cached is not None:
+                yield cached
+                return
+
+        # NOTE: Concurrent identical streams share one upstream stream, every request replays its deltas
+        deltas, shared = self.__in_flight.stream(cache_key, lambda: self.__stream(kwargs, cache_key))
+        if shared:
+            log.info(f"Coalesced chat completion stream {cache_key[:12]} with the stream already in flight")
+        yield from deltas
+
+    def __stream(self, kwargs: Dict[str, Any], cache_key: str) -> Iterator[str]:
+        try:
+            stream = self.__client.chat.completions.create(**kwargs, stream=True)
+
+        except OpenAIError as e:
+            log.error(f"Error creating chat completion stream: {str(e)}")
+            raise e
+
+        deltas = []
+        with stream:
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    deltas.append(delta)
+                    yield delta
+
+        content = "".join(deltas)
+        log.info(f"Streamed response from OpenRouter API: {len(deltas)} chunks, {len(content)} characters")
+
+        if content:
+            self.__cache.set(cache_key, content)
+
+
+_shared_client: OpenRouterClient | None = None
+_shared_client_lock = threading.Lock()
+
+
+def shared_client() -> OpenRouterClient:
+    """
+    Returns the process wide client, created on first use, so every request shares its connection
+    pool, response cache and in-flight requests.
+    """
+    global _shared_client
+
+    # NOTE: Locked, so concurrent first requests cannot create (and coalesce on) different clients
+    with _shared_client_lock:
+        if _shared_client is None:
+            _shared_client = OpenRouterClient()
+        return _shared_client
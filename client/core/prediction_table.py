@@ -0,0 +1,102 @@
+import os
+import sys
+import time
+import weakref
+import itertools
+import threading
+from typing import Any
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.rich_logging import logger as log
+from core.preprocessing import Preprocessor
+from core.inference import predict_proba
+
+import numpy as np
+
+# NOTE: Tables larger than this (number of input combinations) are not materialized
+MAX_TABLE_CELLS = 100_000
+
+
+class PredictionTable:
+    """
+    ``predict_proba`` of a model for every combination of its label encoded inputs, indexed by the codes.
+
+    ``probabilities[c1, ..., ck]`` holds the probabilities of the row whose features (in training
+    column order) are encoded as ``c1, ..., ck``, so a prediction is a single fancy indexing lookup.
+    """
+    __slots__ = ("columns", "classes", "probabilities", "build_seconds")
+
+    def __init__(self, columns: list[str], classes: np.ndarray, probabilities: np.ndarray, build_seconds: float):
+        self.columns = columns
+        self.classes = classes
+        self.probabilities = probabilities
+        self.build_seconds = build_seconds
+
+    @classmethod
+    def build(cls, model: Any, preprocessor: Preprocessor) -> "PredictionTable":
+        """
+        Enumerates the input grid of `model` and runs ``predict_proba`` on every row.
+
+        Rows are predicted one at a time, as a one row request would be: batched linear models can
+        differ from the row by row results in the last bit (BLAS kernels), the table must not.
+        """
+        if not preprocessor.categorical:
+            raise ValueError("Only models with label encoded inputs only can be materialized.")
+
+        shape = tuple(len(preprocessor.label_codes[col]) for col in preprocessor.columns)
+        cells = int(np.prod(shape))
+        if cells > MAX_TABLE_CELLS:
+            raise ValueError(f"The input grid has {cells} combinations, more than {MAX_TABLE_CELLS}.")
+
+        time_in = time.perf_counter()
+        grid = np.array(list(itertools.product(*(range(size) for size in shape))), dtype=np.float64)
+        features = preprocessor.scale(grid.copy())
+
+        probabilities = np.vstack([predict_proba(model, features[row:row + 1]) for row in range(cells)])
+        probabilities = probabilities.reshape(*shape, len(model.classes_))
+        probabilities.setflags(write=False)
+
+        return cls(list(preprocessor.columns), model.classes_, probabilities, time.perf_counter() - time_in)
+
+    @property
+    def nbytes(self) -> int:
+        return self.probabilities.nbytes
+
+    def lookup(self, codes: np.ndarray) -> np.ndarray:
+        """
+        Returns the ``predict_proba`` rows of `codes`, the output of ``Preprocessor.encode``.
+        """
+        return self.probabilities[tuple(codes.astype(np.intp).T)]
+
+
+# NOTE: Keyed by the model object, so a model reloaded by the registry gets a new table (and the old one is freed)
+_tables: "weakref.WeakKeyDictionary[Any, tuple[Preprocessor, PredictionTable | None]]" = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def get_table(model: Any, preprocessor: Preprocessor) -> PredictionTable | None:
+    """
+    Returns the prediction table of `model`, materialized on first use, or None if its inputs are not all
+    label encoded (e.g. the coordinates of the SMOTENC models), in which case predictions stay live.
+    """
+    cached = _tables.get(model)
+    if cached is not None and cached[0] is preprocessor:
+        return cached[1]
+
+    with _lock:
+        cached = _tables.get(model)
+        if cached is not None and cached[0] is preprocessor:
+            return cached[1]
+
+        table = None
+        if preprocessor.categorical:
+            try:
+                table = PredictionTable.build(model, preprocessor)
+                log.info(f"Materialized {type(model).__name__} predictions: {table.probabilities.shape} "
+                         f"({table.nbytes} bytes) in {table.build_seconds:.3f} seconds.")
+            except ValueError as e:
+                log.error(f"Could not materialize {type(model).__name__} predictions: {str(e)}")
+
+        _tables[model] = (preprocessor, table)
+        return table
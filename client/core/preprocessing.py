@@ -0,0 +1,152 @@
+from typing import Any, TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class Preprocessor:
+    """
+    Applies the preprocessing fitted in the training notebooks to incoming requests.
+
+    The artifact is exported next to the models (``preprocessor.pkl`` for SMOTE and
+    ``preprocessor_smotenc.pkl`` for SMOTENC) and is never refitted on the server: every
+    request goes through a pure transform with the column order used during training.
+    """
+
+    def __init__(self,
+                 columns: list[str],
+                 scaled_columns: list[str],
+                 scaler: Any,
+                 label_encoders: dict[str, Any]):
+        self.__columns = list(columns)
+        self.__scaled_columns = list(scaled_columns)
+        self.__scaler = scaler
+        self.__label_encoders = label_encoders
+
+        # NOTE: Precomputed lookups used by `featurize`, so a request never touches pandas or sklearn
+        column_index = {col: index for index, col in enumerate(self.__columns)}
+        self.__scaled_index = np.array([column_index[col] for col in self.__scaled_columns], dtype=np.intp)
+        self.__mean = np.zeros(len(self.__scaled_columns)) if scaler.mean_ is None else np.asarray(scaler.mean_)
+        self.__scale = np.ones(len(self.__scaled_columns)) if scaler.scale_ is None else np.asarray(scaler.scale_)
+        self.__label_codes = {
+            col: {str(label): code for code, label in enumerate(encoder.classes_)}
+            for col, encoder in label_encoders.items()
+            if col in column_index
+        }
+
+    @classmethod
+    def from_artifact(cls, artifact: dict) -> "Preprocessor":
+        missing = {"columns", "scaled_columns", "scaler", "label_encoders"} - artifact.keys()
+        if missing:
+            raise ValueError(f"Preprocessing artifact is missing the following keys: {sorted(missing)}")
+
+        return cls(
+            columns=artifact["columns"],
+            scaled_columns=artifact["scaled_columns"],
+            scaler=artifact["scaler"],
+            label_encoders=artifact["label_encoders"]
+        )
+
+    @property
+    def columns(self) -> list[str]:
+        return self.__columns
+
+    @property
+    def label_encoders(self) -> dict[str, Any]:
+        return self.__label_encoders
+
+    @property
+    def label_codes(self) -> dict[str, dict[str, int]]:
+        return self.__label_codes
+
+    @property
+    def categorical(self) -> bool:
+        """
+        True if every feature is label encoded, i.e. the inputs form a finite grid of codes.
+        """
+        return all(col in self.__label_codes for col in self.__columns)
+
+    def featurize(self, records: list[dict]) -> np.ndarray:
+        """
+        Parses JSON records straight into a preallocated ``float64`` array in training column order.
+
+        Categorical features may be sent as encoded ints or as raw labels. The result is
+        scaled exactly like ``StandardScaler.transform`` and can be fed to the estimator as is.
+        """
+        return self.scale(self.encode(records))
+
+    def encode(self, records: list[dict]) -> np.ndarray:
+        """
+        First half of ``featurize``: the validated label codes and raw numerical values, before scaling.
+        """
+        if isinstance(records, dict):
+            records = [records]
+
+        features = np.empty((len(records), len(self.__columns)), dtype=np.float64)
+
+        for index, col in enumerate(self.__columns):
+            try:
+                values = [record[col] for record in records]
+            except KeyError:
+                raise ValueError(f"Request is missing the following feature: {col}")
+            except TypeError:
+                raise ValueError("Request must be a JSON object or a list of JSON objects.")
+
+            codes = self.__label_codes.get(col)
+            if codes is not None:
+                try:
+                    values = [codes[value] if isinstance(value, str) else value for value in values]
+                except KeyError as e:
+                    raise ValueError(f"Unknown label {e} was provided for {col}.")
+
+            try:
+                features[:, index] = values
+            except (TypeError, ValueError):
+                raise ValueError(f"Values provided for {col} must be numeric.")
+
+            if codes is not None:
+                column = features[:, index]
+                if ((column < 0) | (column >= len(codes)) | (column != np.floor(column))).any():
+                    raise ValueError(f"Encoded values provided for {col} must be integers in [0, {len(codes)}).")
+
+        if np.isnan(features).any():
+            raise ValueError("Request contains null feature values.")
+
+        return features
+
+    def scale(self, features: np.ndarray) -> np.ndarray:
+        """
+        Second half of ``featurize``: scales the output of ``encode`` in place.
+        """
+        features[:, self.__scaled_index] = (features[:, self.__scaled_index] - self.__mean) / self.__scale
+        return features
+
+    def transform(self, records: "list[dict] | pd.DataFrame") -> "pd.DataFrame":
+        """
+        pandas counterpart of ``featurize``, for callers that already hold a DataFrame.
+        """
+        # NOTE: Imported here, the API only uses `featurize` and does not need pandas
+        import pandas as pd
+
+        query = pd.DataFrame(records)
+
+        missing = [col for col in self.__columns if col not in query]
+        if missing:
+            raise ValueError(f"Request is missing the following features: {missing}")
+
+        query = query[self.__columns].copy()
+        if query.isna().to_numpy().any():
+            raise ValueError("Request contains null feature values.")
+
+        # NOTE: Raw category labels are encoded, already encoded values (from the dashboard) are kept as is
+        for col, encoder in self.__label_encoders.items():
+            if col in query and not pd.api.types.is_numeric_dtype(query[col]):
+                values = query[col].to_numpy(dtype=object)
+                labels = np.fromiter((isinstance(value, str) for value in values), dtype=bool, count=len(values))
+                values[labels] = encoder.transform(values[labels].astype(str))
+                query[col] = values.astype(np.int64)
+
+        query[self.__scaled_columns] = self.__scaler.transform(query[self.__scaled_columns])
+        return query
@@ -0,0 +1,70 @@
+import re
+import json
+from collections import Counter
+
+import numpy as np
+
+CONFIDENCE_BINS = 10
+
+# NOTE: Words, numbers and single punctuation marks, long words count as one token per 4 characters
+TOKEN_PATTERN = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+
+try:
+    import tiktoken
+
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except ImportError:
+    _encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """
+    Counts the tokens of `text` locally, with tiktoken when it is installed, else with a conservative estimate.
+    """
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return sum(-(-len(token) // 4) for token in TOKEN_PATTERN.findall(text))
+
+
+def compact_json(data) -> str:
+    return json.dumps(data, separators=(",", ":"), default=str)
+
+
+def summarize_prediction(response: dict, histogram: bool = True) -> dict:
+    """
+    Reduces the response of a predict endpoint to a fixed size summary: the class counts and the
+    distribution of P(class 1) replace the per row values, so the prompt does not grow with the batch.
+    Fields that differ between identical predictions (e.g. the timestamp) are dropped.
+    """
+    prediction = response.get("prediction")
+    if not isinstance(prediction, dict):
+        error = (response.get("data") or {}).get("error") or response.get("message")
+        return {"status": response.get("status"), "error": error}
+
+    labels = [value.strip() for value in str(prediction.get("values", "")).split(",") if value.strip()]
+    confidences = np.asarray(prediction.get("confidences") or [prediction.get("confidence")], dtype=np.float64)
+    confidences = confidences[~np.isnan(confidences)]
+
+    summary = {
+        "model": response.get("model"),
+        "rows": len(labels),
+        "class_counts": dict(sorted(Counter(labels).items())),
+        "threshold": prediction.get("threshold")
+    }
+
+    if len(confidences):
+        summary["p_class_1"] = {
+            "mean": round(float(confidences.mean()), 4),
+            "min": round(float(confidences.min()), 4),
+            "max": round(float(confidences.max()), 4)
+        }
+
+        if histogram:
+            # NOTE: Shares instead of counts, so the histogram keeps the same width whatever the number of rows
+            counts, _ = np.histogram(confidences, bins=CONFIDENCE_BINS, range=(0, 1))
+            summary["p_class_1"]["histogram"] = {
+                "bins": CONFIDENCE_BINS,
+                "percent": np.round(counts / len(confidences) * 100, 1).tolist()
+            }
+
+    return summary
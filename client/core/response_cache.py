@@ -0,0 +1,161 @@
+import os
+import re
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager, closing
+from typing import Any
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.rich_logging import logger as log
+
+# NOTE: Prediction payloads only differ by their timestamp between two identical Predict clicks
+TIMESTAMP_PATTERNS = [
+    # 'timestamp': 'Tue, 10 Dec 2024 23:41:16 GMT' (repr of the prediction dict) or "timestamp": "..." (JSON)
+    re.compile(r"""(["'])timestamp\1\s*:\s*(["']).*?\2"""),
+    # RFC 1123 dates, the format Flask uses for the timestamp field
+    re.compile(r"\b[A-Z][a-z]{2}, \d{2} [A-Z][a-z]{2} \d{4} \d{2}:\d{2}:\d{2} GMT\b"),
+    # ISO 8601 dates and date-times
+    re.compile(r"\b\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:?\d{2})?)?\b"),
+]
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def normalize_content(content: str) -> str:
+    """
+    Strips timestamps and collapses whitespace, so only the meaningful part of a message is hashed.
+    """
+    for pattern in TIMESTAMP_PATTERNS:
+        content = pattern.sub("<timestamp>", content)
+    return WHITESPACE_PATTERN.sub(" ", content).strip()
+
+
+def make_key(request: dict[str, Any]) -> str:
+    """
+    Returns the cache key of a chat completion request, a hash of its normalized messages and parameters.
+    """
+    normalized = {
+        **request,
+        "messages": [
+            {**message, "content": normalize_content(str(message.get("content", "")))}
+            for message in request.get("messages", [])
+        ]
+    }
+    return hashlib.sha256(json.dumps(normalized, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class ResponseCache:
+    """
+    Two level cache of chat completion responses: an in-memory LRU in front of an optional
+    SQLite store, which survives restarts and is shared by every process using the same file.
+    Entries expire after `ttl` seconds (never when `ttl` is 0).
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 86400, db_path: str | None = None):
+        self.__max_entries = max_entries
+        self.__ttl = ttl
+        self.__db_path = db_path
+        self.__entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self.__lock = threading.Lock()
+        self.__hits = 0
+        self.__misses = 0
+
+        if self.__db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.__db_path)), exist_ok=True)
+            with self.__connect() as connection:
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT, created_at REAL)"
+                )
+
+    @contextmanager
+    def __connect(self):
+        # NOTE: One short-lived connection per call, as Streamlit and Flask serve requests from several threads
+        with closing(sqlite3.connect(self.__db_path, timeout=5)) as connection, connection:
+            yield connection
+
+    def __is_expired(self, created_at: float) -> bool:
+        return self.__ttl > 0 and time.time() - created_at > self.__ttl
+
+    def __remember(self, key: str, value: str, created_at: float) -> None:
+        with self.__lock:
+            self.__entries[key] = (value, created_at)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.__max_entries:
+                self.__entries.popitem(last=False)
+
+    def __lookup(self, key: str) -> str | None:
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None:
+                if not self.__is_expired(entry[1]):
+                    self.__entries.move_to_end(key)
+                    return entry[0]
+                del self.__entries[key]
+
+        if not self.__db_path:
+            return None
+
+        try:
+            with self.__connect() as connection:
+                row = connection.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            log.error(f"Could not read the response cache: {str(e)}")
+            return None
+
+        if row is None or self.__is_expired(row[1]):
+            return None
+
+        self.__remember(key, row[0], row[1])
+        return row[0]
+
+    def get(self, key: str) -> str | None:
+        value = self.__lookup(key)
+
+        with self.__lock:
+            if value is None:
+                self.__misses += 1
+            else:
+                self.__hits += 1
+            hits, misses = self.__hits, self.__misses
+
+        log.info(f"Response cache {'hit' if value is not None else 'miss'} for {key[:12]} "
+                 f"(hits: {hits}, misses: {misses})")
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        created_at = time.time()
+        self.__remember(key, value, created_at)
+
+        if not self.__db_path:
+            return
+
+        try:
+            with self.__connect() as connection:
+                connection.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?)", (key, value, created_at))
+                if self.__ttl > 0:
+                    connection.execute("DELETE FROM responses WHERE created_at < ?", (created_at - self.__ttl,))
+        except sqlite3.Error as e:
+            log.error(f"Could not write to the response cache: {str(e)}")
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__entries.clear()
+
+        if self.__db_path:
+            with self.__connect() as connection:
+                connection.execute("DELETE FROM responses")
+
+    def stats(self) -> dict:
+        with self.__lock:
+            return {
+                "hits": self.__hits,
+                "misses": self.__misses,
+                "entries": len(self.__entries),
+                "ttl": self.__ttl,
+                "db_path": self.__db_path
+            }
@@ -1,14 +1,134 @@
-import logging
+import os
+import sys
+import json
 import time
+import queue
+import atexit
+import random
+import logging
+import datetime
+from logging.handlers import QueueHandler, QueueListener
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from constants import LOG_FORMAT, LOG_LEVEL, LOG_PAYLOAD_MAX_CHARS, LOG_PAYLOAD_SAMPLE_RATE
+
+# NOTE: Attributes of every LogRecord, anything else on a record was passed with `extra` and is logged as a field
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats records as compact JSON lines, with the fields passed in `extra` next to the message.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = {
+            "time": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc)
+                                     .isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "module": record.module,
+            "line": record.lineno,
+            "pid": record.process,
+            "message": record.getMessage()
+        }
+        line.update((key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES)
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            line["exception"] = record.exc_text
+
+        return json.dumps(line, separators=(",", ":"), default=str)
+
+
+class _QueueHandler(QueueHandler):
+    """
+    Hands the records to the listener thread as they are: the stdlib handler would format them (the
+    whole JSON line) on the calling thread, here only the %-style message is merged.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class _Truncated:
+    """
+    Payload rendered on demand, up to `max_chars` characters, without rendering the items past the limit.
+    """
+    __slots__ = ("value", "max_chars")
+
+    def __init__(self, value, max_chars: int):
+        self.value = value
+        self.max_chars = max_chars
+
+    def __str__(self) -> str:
+        if not isinstance(self.value, (list, tuple)):
+            text = repr(self.value)
+            return text if len(text) <= self.max_chars else f"{text[:self.max_chars]}... ({len(text)} chars)"
+
+        items, size = [], 0
+        for item in self.value:
+            if size > self.max_chars:
+                break
+            items.append(repr(item))
+            size += len(items[-1]) + 2
+
+        text = ", ".join(items)
+        if len(text) > self.max_chars:
+            text = f"{text[:self.max_chars]}..."
+        return f"[{text}] ({len(self.value)} items)" if len(items) < len(self.value) else f"[{text}]"
+
+
+def log_payload(message: str, payload, *args, level: int = logging.INFO) -> None:
+    """
+    Logs a request or response payload (the first %s of `message`), truncated to LOG_PAYLOAD_MAX_CHARS
+    and sampled at LOG_PAYLOAD_SAMPLE_RATE. The payload is only rendered if the record is emitted.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    if LOG_PAYLOAD_SAMPLE_RATE < 1 and random.random() >= LOG_PAYLOAD_SAMPLE_RATE:
+        return
+
+    logger.log(level, message, _Truncated(payload, LOG_PAYLOAD_MAX_CHARS), *args, stacklevel=2)
+
+
+def _start_listener() -> None:
+    global _listener
+
+    # NOTE: Threads do not survive a fork, every (gunicorn) worker starts its own listener on a fresh queue
+    _queue_handler.queue = queue.SimpleQueue()
+    _listener = QueueListener(_queue_handler.queue, _stream_handler, respect_handler_level=True)
+    _listener.start()
 
-from rich.logging import RichHandler
 
 start_time = time.time()  # time::now
-logging.basicConfig(
-    format="{asctime} - {levelname}: {message}",
-    style="{",
-    datefmt="%Y-%m-%d %H:%M",
-    level=logging.INFO,
-    handlers=[RichHandler()]
-)
+
+if LOG_FORMAT == "json":
+    # NOTE: Production mode: request threads only enqueue records, formatting and writing happen in the listener
+    _stream_handler = logging.StreamHandler(sys.stderr)
+    _stream_handler.setFormatter(JsonFormatter())
+    _queue_handler = _QueueHandler(queue.SimpleQueue())
+    _listener = None
+
+    logging.basicConfig(level=LOG_LEVEL, handlers=[_queue_handler])
+    _start_listener()
+    os.register_at_fork(after_in_child=_start_listener)
+    atexit.register(lambda: _listener.stop())
+else:
+    from rich.logging import RichHandler
+
+    logging.basicConfig(
+        format="{asctime} - {levelname}: {message}",
+        style="{",
+        datefmt="%Y-%m-%d %H:%M",
+        level=LOG_LEVEL,
+        handlers=[RichHandler()]
+    )
 logger = logging.getLogger("rich")
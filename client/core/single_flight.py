@@ -0,0 +1,120 @@
+import threading
+from typing import Any, Callable, Iterable, Iterator
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class _Stream:
+    __slots__ = ("condition", "items", "finished", "error")
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.items = []
+        self.finished = False
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key: the first caller runs the function and every
+    caller that arrives while it is running waits for, and shares, its result (or its exception).
+
+    Calls are only coalesced within a process (e.g. one gunicorn worker).
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__calls: dict[str, _Call] = {}
+        self.__streams: dict[str, _Stream] = {}
+
+    def do(self, key: str, func: Callable[[], Any]) -> tuple[Any, bool]:
+        """
+        Returns the result of `func` and whether it was shared with a call already in flight.
+        """
+        with self.__lock:
+            call = self.__calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.__calls[key] = _Call()
+            else:
+                call.waiters += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = func()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self.__lock:
+                del self.__calls[key]
+            call.done.set()
+
+        return call.result, False
+
+    def stream(self, key: str, func: Callable[[], Iterable[Any]]) -> tuple[Iterator[Any], bool]:
+        """
+        Streaming counterpart of ``do``: returns an iterator over the items of `func` and whether it was
+        shared with a stream already in flight.
+
+        The first caller starts `func` in a background thread and every caller (the first one included)
+        iterates over its items from the first one, as they are produced. A caller that stops iterating
+        (e.g. a client that disconnected) does not interrupt the stream of the others.
+        """
+        with self.__lock:
+            stream = self.__streams.get(key)
+            shared = stream is not None
+            if not shared:
+                stream = self.__streams[key] = _Stream()
+                threading.Thread(target=self.__produce, args=(key, stream, func),
+                                 name=f"single-flight-{key[:12]}", daemon=True).start()
+
+        return self.__subscribe(stream), shared
+
+    def __produce(self, key: str, stream: _Stream, func: Callable[[], Iterable[Any]]) -> None:
+        try:
+            for item in func():
+                with stream.condition:
+                    stream.items.append(item)
+                    stream.condition.notify_all()
+        except Exception as e:
+            stream.error = e
+        finally:
+            with self.__lock:
+                del self.__streams[key]
+            with stream.condition:
+                stream.finished = True
+                stream.condition.notify_all()
+
+    @staticmethod
+    def __subscribe(stream: _Stream) -> Iterator[Any]:
+        index = 0
+        while True:
+            with stream.condition:
+                stream.condition.wait_for(lambda: len(stream.items) > index or stream.finished)
+                items, finished = stream.items[index:], stream.finished
+
+            index += len(items)
+            yield from items
+
+            if finished:
+                if stream.error is not None:
+                    raise stream.error
+                return
+
+    def in_flight(self) -> int:
+        with self.__lock:
+            return len(self.__calls) + len(self.__streams)
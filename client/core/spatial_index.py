@@ -0,0 +1,118 @@
+import os
+import sys
+from functools import lru_cache
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.dataset import load_toodu_map, file_digest, FILTERED_CSV
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+# NOTE: `x` and `y` of the dataset are Web Mercator (EPSG:3857) meters
+WEB_MERCATOR_RADIUS = 6_378_137.0
+
+# NOTE: Columns returned for every incident, `x` and `y` are only used to build the index
+INCIDENT_COLUMNS = ["EVENT_UNIQUE_ID", "OCC_DATE", "OFFENCE", "PREMISES_TYPE", "LOCATION_TYPE",
+                    "HOOD_158", "NEIGHBOURHOOD_158", "LONG_WGS84", "LAT_WGS84"]
+
+MAX_NEIGHBOURS = 100
+
+# NOTE: Latitude where Web Mercator is cut off (y = +/- pi * radius), the poles project to infinity
+MAX_LATITUDE = 85.05112878
+
+
+def project(lon: float, lat: float) -> tuple[float, float]:
+    """
+    Returns the Web Mercator (x, y) of a WGS84 coordinate, the projection of the `x` and `y` columns.
+    """
+    x = WEB_MERCATOR_RADIUS * np.radians(lon)
+    y = WEB_MERCATOR_RADIUS * np.log(np.tan(np.pi / 4 + np.radians(lat) / 2))
+    return float(x), float(y)
+
+
+def _hood_label(hood) -> str:
+    # NOTE: The cleaned dataset (and the label encoders of the models) use 3 digit labels, e.g. "042"
+    return str(hood).zfill(3)
+
+
+class IncidentIndex:
+    """
+    KD-tree over the projected coordinates of the incidents of the map, for nearest incident and radius queries.
+
+    Web Mercator scales distances by 1 / cos(latitude): the tree is queried in projected meters and the
+    distances are converted back to ground meters at the latitude of the query, exact to well under a
+    percent over the few kilometers of a query in Toronto.
+    """
+
+    def __init__(self, incidents):
+        self.__points = np.column_stack([incidents["x"].to_numpy(dtype=np.float64),
+                                         incidents["y"].to_numpy(dtype=np.float64)])
+        self.__tree = cKDTree(self.__points)
+
+        # NOTE: Plain per-column arrays, a query only gathers its few rows (no DataFrame indexing per request)
+        self.__columns = {col: incidents[col].to_numpy() for col in INCIDENT_COLUMNS}
+        self.__columns["HOOD_158"] = np.array([_hood_label(hood) for hood in self.__columns["HOOD_158"]])
+
+    def __len__(self) -> int:
+        return len(self.__points)
+
+    def __records(self, indices: np.ndarray, distances: np.ndarray) -> list[dict]:
+        columns = {col: values[indices].tolist() for col, values in self.__columns.items()}
+        return [
+            {**{col: columns[col][row] for col in INCIDENT_COLUMNS}, "DISTANCE_M": round(float(distance), 1)}
+            for row, distance in enumerate(distances)
+        ]
+
+    def nearest(self, lon: float, lat: float, k: int = 10) -> list[dict]:
+        """
+        Returns the `k` incidents closest to (lon, lat), closest first, with their distance in meters.
+        """
+        if not 0 < k <= MAX_NEIGHBOURS:
+            raise ValueError(f"k must be between 1 and {MAX_NEIGHBOURS}.")
+
+        scale = np.cos(np.radians(lat))
+        distances, indices = self.__tree.query(project(lon, lat), k=min(k, len(self)))
+        distances, indices = np.atleast_1d(distances), np.atleast_1d(indices)
+        return self.__records(indices, distances * scale)
+
+    def within(self, lon: float, lat: float, radius: float, limit: int = MAX_NEIGHBOURS) -> tuple[int, list[dict]]:
+        """
+        Returns the number of incidents within `radius` meters of (lon, lat) and the `limit` closest of them.
+        """
+        if not np.isfinite(radius) or radius <= 0:
+            raise ValueError("Radius must be a positive number of meters.")
+        if not 0 < limit <= MAX_NEIGHBOURS:
+            raise ValueError(f"k must be between 1 and {MAX_NEIGHBOURS}.")
+
+        scale = np.cos(np.radians(lat))
+        point = np.array(project(lon, lat))
+        indices = np.asarray(self.__tree.query_ball_point(point, radius / scale), dtype=np.intp)
+
+        distances = np.hypot(*(self.__points[indices] - point).T) * scale
+        order = np.argsort(distances, kind="stable")[:limit]
+        return len(indices), self.__records(indices[order], distances[order])
+
+    def neighbourhood(self, lon: float, lat: float) -> dict:
+        """
+        Returns the neighbourhood (HOOD_158) of the incident closest to (lon, lat), as the best estimate of the
+        neighbourhood of the point without the neighbourhood boundaries.
+        """
+        incident = self.nearest(lon, lat, k=1)[0]
+        return {
+            "HOOD_158": incident["HOOD_158"],
+            "NEIGHBOURHOOD_158": incident["NEIGHBOURHOOD_158"],
+            "DISTANCE_M": incident["DISTANCE_M"]
+        }
+
+
+@lru_cache(maxsize=2)
+def _build_index(digest: str) -> IncidentIndex:
+    return IncidentIndex(load_toodu_map(INCIDENT_COLUMNS + ["x", "y"]))
+
+
+def get_index() -> IncidentIndex:
+    """
+    Returns the index of the incidents of the filtered dataset, built once per process and per version of the file.
+    """
+    return _build_index(file_digest(FILTERED_CSV))
@@ -0,0 +1,87 @@
+import os
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from constants import METRICS_ENABLED
+
+from flask import g, has_request_context
+
+
+class StageTimer:
+    """
+    Accumulates the wall time of the named stages of a request (e.g. parse, featurize, inference,
+    serialize), reported to clients in the ``Server-Timing`` header and recorded in the metrics.
+    """
+    __slots__ = ("stages", "started", "model", "rows")
+
+    enabled = True
+
+    def __init__(self):
+        self.stages: dict[str, float] = {}
+        self.started = time.perf_counter()
+        self.model: str | None = None
+        self.rows: int | None = None
+
+    @contextmanager
+    def stage(self, name: str):
+        time_in = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - time_in
+
+    def server_timing(self) -> str:
+        return ", ".join(f"{name};dur={seconds * 1e3:.3f}" for name, seconds in self.stages.items())
+
+
+class _DisabledTimer:
+    """
+    Stand-in used when metrics are disabled: one shared instance whose stages cost a no-op context manager.
+    """
+    __slots__ = ()
+
+    enabled = False
+    stages = {}
+    __stage = nullcontext()
+
+    def stage(self, name: str):
+        return self.__stage
+
+    def __setattr__(self, name, value) -> None:
+        pass
+
+
+_DISABLED_TIMER = _DisabledTimer()
+
+
+def stage_timer() -> StageTimer | _DisabledTimer:
+    """
+    Returns the timer of the current request, created on first use (a shared no-op timer when metrics are disabled).
+    """
+    if not METRICS_ENABLED:
+        return _DISABLED_TIMER
+
+    if not has_request_context():
+        return StageTimer()
+
+    timer = g.get("stage_timer")
+    if timer is None:
+        timer = g.stage_timer = StageTimer()
+    return timer
+
+
+def parse_server_timing(header: str | None) -> dict[str, float]:
+    """
+    Parses a ``Server-Timing`` header into milliseconds per stage.
+    """
+    stages = {}
+    for metric in (header or "").split(","):
+        name, _, params = metric.strip().partition(";")
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if name and key == "dur":
+                stages[name] = float(value)
+    return stages
@@ -0,0 +1,66 @@
+"""
+Backfills the evaluation artifacts of the deployed models in ``server/models/models.json``.
+
+Every ``.pkl`` model of ``server/models`` is evaluated on the test split of its SmoteType (metrics,
+confusion matrix, 5-fold cross-validation and ROC curve), and its entry in ``models.json`` is
+written (or replaced) in the format of ``evaluate_and_save_model`` in the training notebooks, so
+the dashboard renders the model performance without running the models. Entries of other files
+(and legacy entries without a file) are kept as is.
+
+The metrics are only meaningful on the cleaned dataset the models were trained on, whose test split
+(the one of the training notebooks) is held out from training. On any other copy of the dataset,
+e.g. one that repeats its rows, the test rows leak into the training rows and the scores are inflated.
+
+Usage (from the ``client`` directory):
+    python evaluate_models.py
+"""
+import os
+import sys
+import json
+import pickle
+import datetime
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.dataset import get_split
+from core.evaluation import evaluate_model
+from core.model_registry import MODEL_FILES, MODELS_DIR
+
+MODELS_JSON = os.path.join(MODELS_DIR, "models.json")
+
+
+def main() -> None:
+    entries = []
+    if os.path.exists(MODELS_JSON) and os.path.getsize(MODELS_JSON) > 0:
+        with open(MODELS_JSON, "r") as file:
+            entries = json.load(file)
+
+    for smote_type, files in MODEL_FILES.items():
+        split = get_split(smote_type)
+
+        for model_name, file_name in files.items():
+            with open(os.path.join(MODELS_DIR, file_name), "rb") as file:
+                model = pickle.load(file)
+
+            entry = {
+                "model": model_name,
+                "file": file_name,
+                "smote_type": smote_type.value[0],
+                "timestamp": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                **evaluate_model(model, split.x_test, split.y_test)
+            }
+            entries = [existing for existing in entries if existing.get("file") != file_name] + [entry]
+
+            print(f"{file_name:<26} accuracy {entry['accuracy']:.4f}, f1 {entry['f1']:.4f}, auc {entry['auc']:.4f}, "
+                  f"cv {entry['cross_validation']['mean']:.4f} +/- {entry['cross_validation']['std']:.4f}")
+
+    temp_path = f"{MODELS_JSON}.tmp"
+    with open(temp_path, "w") as file:
+        json.dump(entries, file, indent=4)
+    os.replace(temp_path, MODELS_JSON)
+
+    print(f"\nWrote {len(entries)} entries to {MODELS_JSON}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Exports the deployed models and preprocessors to the pickle-free ``.npz`` format of ``core.compact_models``.
+
+Every ``<name>.pkl`` of ``server/models`` is exported next to it: coefficient vectors for the logistic
+regressions and flattened node arrays for the decision trees and random forests, evaluated with NumPy
+only. Each export is written to a ``<name>.candidate.npz`` first, loaded back (memory mapped) and validated
+against the ``predict_proba`` of the sklearn model on the test split of its SmoteType, with the best of
+``--repeat`` timings of both, and on the first rows of the split scaled up to +/-1e30 (far outside
+the training range, where the logistic saturates). The trees must match bit for bit and the logistic
+regressions to within ``--tolerance`` (their ``exp`` can differ in the last bit from scipy's ``expit``).
+
+A candidate only replaces the served ``<name>.npz`` if it passes, otherwise it is deleted and the
+served file is left unchanged. Exits with code 1 if any exported model does not match its sklearn model.
+
+Usage (from the ``client`` directory):
+    python export_models.py [--tolerance 1e-12] [--repeat 5]
+"""
+import os
+import sys
+import time
+import pickle
+import argparse
+import warnings
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.compact_models import export_model, export_preprocessor, save, load
+from core.dataset import get_split
+from core.model_registry import MODEL_FILES, PREPROCESSOR_FILES, MODELS_DIR
+from core.preprocessing import Preprocessor
+
+import numpy as np
+
+# NOTE: Factors applied to the test rows to validate the models far outside the training range, kept within
+# float32 as the trees compare their features in float32
+EXTREME_SCALES = (-1e30, -1e6, -1e4, 1e4, 1e6, 1e30)
+
+
+def npz_path(file_name: str) -> str:
+    return os.path.join(MODELS_DIR, f"{os.path.splitext(file_name)[0]}.npz")
+
+
+def candidate_path(file_name: str) -> str:
+    return os.path.join(MODELS_DIR, f"{os.path.splitext(file_name)[0]}.candidate.npz")
+
+
+def publish(file_name: str, valid: bool) -> None:
+    """
+    Moves the validated candidate of `file_name` over its served .npz, or deletes the candidate if it failed.
+    """
+    if valid:
+        os.replace(candidate_path(file_name), npz_path(file_name))
+    elif os.path.exists(candidate_path(file_name)):
+        os.remove(candidate_path(file_name))
+
+
+def timed(func, x: np.ndarray, repeat: int) -> tuple:
+    timings = []
+    for _ in range(repeat):
+        time_in = time.perf_counter()
+        result = func(x)
+        timings.append((time.perf_counter() - time_in) * 1e3)
+    return result, min(timings)
+
+
+def export_preprocessors() -> bool:
+    valid = True
+    print(f"{'preprocessor':<28}{'pkl (KB)':>10}{'npz (KB)':>10}  result")
+
+    for smote_type, file_name in PREPROCESSOR_FILES.items():
+        path = os.path.join(MODELS_DIR, file_name)
+        with open(path, "rb") as file:
+            artifact = pickle.load(file)
+
+        same = False
+        save(candidate_path(file_name), export_preprocessor(artifact), source=path)
+        try:
+            original, compact = Preprocessor.from_artifact(artifact), load(candidate_path(file_name))
+
+            # NOTE: Random codes of every column (numerical columns included), scaled by both preprocessors
+            rng = np.random.default_rng(42)
+            codes = np.column_stack([rng.integers(0, len(original.label_codes.get(col, range(100))), 1000)
+                                     for col in original.columns]).astype(np.float64)
+            same = (compact.columns == original.columns and compact.label_codes == original.label_codes
+                    and np.array_equal(compact.scale(codes.copy()), original.scale(codes.copy())))
+
+            print(f"{file_name:<28}{os.path.getsize(path) / 1e3:>10.1f}"
+                  f"{os.path.getsize(candidate_path(file_name)) / 1e3:>10.1f}  {'exact' if same else 'DIFFERS'}")
+        finally:
+            publish(file_name, same)
+        valid &= same
+
+    return valid
+
+
+def export_models(tolerance: float, repeat: int) -> bool:
+    valid = True
+    print(f"\n{'model':<28}{'pkl (KB)':>10}{'npz (KB)':>10}{'sklearn (ms)':>14}{'numpy (ms)':>12}  result")
+
+    for smote_type, files in MODEL_FILES.items():
+        x_test = np.asarray(get_split(smote_type).x_test, dtype=np.float64)
+
+        for file_name in files.values():
+            path = os.path.join(MODELS_DIR, file_name)
+            with open(path, "rb") as file:
+                model = pickle.load(file)
+
+            same = False
+            save(candidate_path(file_name), export_model(model), source=path)
+            try:
+                compact = load(candidate_path(file_name))
+
+                expected, sklearn_ms = timed(model.predict_proba, x_test, repeat)
+                actual, numpy_ms = timed(compact.predict_proba, x_test, repeat)
+
+                x_extreme = np.vstack([x_test[:100] * scale for scale in EXTREME_SCALES])
+                difference = max(np.abs(actual - expected).max(),
+                                 np.abs(compact.predict_proba(x_extreme) - model.predict_proba(x_extreme)).max())
+                same_labels = (np.array_equal(compact.predict(x_test), model.predict(x_test))
+                               and np.array_equal(compact.predict(x_extreme), model.predict(x_extreme)))
+                exact = hasattr(model, "coef_") or difference == 0
+                same = exact and difference <= tolerance and same_labels
+
+                result = "exact" if difference == 0 else f"max |diff| {difference:.3g}"
+                print(f"{file_name:<28}{os.path.getsize(path) / 1e3:>10.1f}"
+                      f"{os.path.getsize(candidate_path(file_name)) / 1e3:>10.1f}"
+                      f"{sklearn_ms:>14.2f}{numpy_ms:>12.2f}  {result}{'' if same else ', DIFFERS'}"
+                      f"{'' if same_labels else ' (labels differ)'}")
+            finally:
+                publish(file_name, same)
+            valid &= same
+
+    return valid
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tolerance", type=float, default=1e-12,
+                        help="Largest difference allowed to the probabilities of the logistic regressions")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    # NOTE: The models are fitted with feature names and validated on arrays, like the routes serve them
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message="X does not have valid feature names")
+        valid = export_preprocessors()
+        valid &= export_models(args.tolerance, args.repeat)
+
+    if not valid:
+        print("\nSome exported models do not match the sklearn models, their served .npz files were left unchanged.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
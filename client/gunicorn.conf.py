@@ -0,0 +1,32 @@
+"""
+Gunicorn configuration of the production API, every setting can be overridden from the environment.
+
+    GUNICORN_BIND      address to listen on (defaults to 0.0.0.0:5000)
+    GUNICORN_WORKERS   number of pre-forked worker processes (defaults to 2 * CPUs + 1)
+    GUNICORN_THREADS   threads per worker (defaults to 2), the sklearn calls release the GIL in parts
+    GUNICORN_TIMEOUT   seconds before a silent worker is restarted (defaults to 120, for long batch streams)
+"""
+import gc
+import os
+import multiprocessing
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv("GUNICORN_THREADS", 2))
+worker_class = "gthread" if threads > 1 else "sync"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 120))
+keepalive = 5
+
+# NOTE: The app (and every model) is loaded once in the master, workers are forked from it
+preload_app = True
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", None)
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+
+def when_ready(server) -> None:
+    # NOTE: Moves the preloaded objects out of the collector's reach, so collections in the workers
+    # do not write to (and copy) the memory pages shared with the master
+    gc.freeze()
+    server.log.info(f"Preloaded the models, forking {workers} workers with {threads} threads each")
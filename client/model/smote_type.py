@@ -11,3 +11,10 @@ class SmoteType(Enum):
             if to_match in sm_type.value:
                 return sm_type.value[0]
         return None
+
+    @classmethod
+    def match(cls, to_match: str) -> "SmoteType | None":
+        for sm_type in cls:
+            if to_match in sm_type.value:
+                return sm_type
+        return None
@@ -0,0 +1,2 @@
+#!/usr/bin/env bash
+LOG_FORMAT="${LOG_FORMAT:-json}" gunicorn -c gunicorn.conf.py wsgi:app
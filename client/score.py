@@ -0,0 +1,217 @@
+"""
+Offline bulk scoring of a Theft Over CSV (or its Parquet copy) with one of the deployed models.
+
+The input is read in chunks and the chunks are fanned out to a process pool, where every
+worker loads the model once through the model registry. Results are written incrementally,
+in input order, to a CSV or Parquet file.
+
+Usage (from the ``client`` directory):
+    python score.py ../server/data/Theft_Over_Open_Data_Cleaned.csv predictions.parquet \\
+        --model RandomForestClassifier --smote-type smotenc --workers 4
+"""
+import os
+import sys
+import time
+import argparse
+import resource
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, Future
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.rich_logging import logger as log
+from core.model_registry import registry, MODEL_FILES
+from core.inference import predict_with_threshold
+from core.batch import score_chunk, DEFAULT_CHUNK_SIZE
+from model.smote_type import SmoteType
+
+import pandas as pd
+
+RESULT_DTYPES = {"label": "Int64", "probability": "float64", "error": "string"}
+
+
+def _init_worker(smote_type: str, model_name: str) -> None:
+    # NOTE: Each worker deserializes the model and preprocessor once, every chunk after that is a cache hit
+    smote_type = SmoteType.match(smote_type)
+    registry.get(smote_type, model_name)
+    registry.get_preprocessor(smote_type)
+
+
+def _score_chunk(chunk: pd.DataFrame, smote_type: str, model_name: str, id_column: str | None) -> pd.DataFrame:
+    smote_type = SmoteType.match(smote_type)
+    model = registry.get(smote_type, model_name)
+    preprocessor = registry.get_preprocessor(smote_type)
+    threshold = registry.get_threshold(smote_type, model_name)
+
+    try:
+        features = preprocessor.transform(chunk).to_numpy(dtype="float64")
+        labels, confidences = predict_with_threshold(model, features, threshold)
+        results = pd.DataFrame({"label": labels, "probability": confidences, "error": None}, index=chunk.index)
+
+    except ValueError:
+        # NOTE: Slow path, isolates the invalid rows so the rest of the chunk is still scored
+        records = chunk[preprocessor.columns].to_dict("records")
+        results = pd.DataFrame(score_chunk(model, preprocessor, records, threshold), index=chunk.index)
+        results = results[["label", "probability", "error"]]
+
+    # NOTE: Every chunk must share one schema, as the Parquet writer is created from the first one
+    results = results.astype(RESULT_DTYPES)
+    results.insert(0, "row", chunk.index)
+    if id_column:
+        results.insert(0, id_column, chunk[id_column].to_numpy())
+
+    return results
+
+
+class ResultWriter:
+    def __init__(self, path: str, output_format: str):
+        self.__path = path
+        self.__format = output_format
+        self.__writer = None
+        self.__file = None
+
+    def write(self, results: pd.DataFrame) -> None:
+        if self.__format == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(results, preserve_index=False)
+            if self.__writer is None:
+                self.__writer = pq.ParquetWriter(self.__path, table.schema)
+            self.__writer.write_table(table)
+            return
+
+        if self.__file is None:
+            self.__file = open(self.__path, "w", newline="")
+            results.to_csv(self.__file, index=False)
+        else:
+            results.to_csv(self.__file, index=False, header=False)
+
+    def close(self) -> None:
+        if self.__writer is not None:
+            self.__writer.close()
+        if self.__file is not None:
+            self.__file.close()
+
+
+def peak_rss_mb() -> tuple[float, float]:
+    # NOTE: ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+    unit = 1024 * 1024 if sys.platform == "darwin" else 1024
+    main = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / unit
+    workers = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / unit
+    return main, workers
+
+
+def read_chunks(input_path: str, columns: list[str], dtype: dict, chunk_size: int):
+    """
+    Yields `columns` of the input in chunks of `chunk_size` rows, indexed by their row number in the input.
+    """
+    if not input_path.endswith((".parquet", ".pq")):
+        yield from pd.read_csv(input_path, usecols=columns, dtype=dtype, chunksize=chunk_size)
+        return
+
+    import pyarrow.parquet as pq
+
+    offset = 0
+    for batch in pq.ParquetFile(input_path).iter_batches(batch_size=chunk_size, columns=columns):
+        chunk = batch.to_pandas().astype(dtype)
+        chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+        offset += len(chunk)
+        yield chunk
+
+
+def score(input_path: str,
+          output_path: str,
+          model_name: str,
+          smote_type: SmoteType,
+          chunk_size: int = DEFAULT_CHUNK_SIZE * 10,
+          workers: int = os.cpu_count() or 1,
+          output_format: str | None = None,
+          id_column: str | None = None) -> dict:
+    registry.resolve(smote_type, model_name)
+    preprocessor = registry.get_preprocessor(smote_type)
+
+    output_format = output_format or ("parquet" if output_path.endswith((".parquet", ".pq")) else "csv")
+
+    # NOTE: Only the model features are read, and categoricals are kept as raw labels (e.g. HOOD_158 "NSA")
+    usecols = preprocessor.columns + ([id_column] if id_column else [])
+    dtype = {col: str for col in preprocessor.label_encoders if col in preprocessor.columns}
+    chunks = read_chunks(input_path, usecols, dtype, chunk_size)
+
+    writer = ResultWriter(output_path, output_format)
+    pending: deque[Future] = deque()
+    rows = errors = 0
+
+    time_in = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=_init_worker,
+                             initargs=(smote_type.value[0], model_name)) as executor:
+
+        def drain(limit: int) -> None:
+            nonlocal rows, errors
+            while len(pending) > limit:
+                results = pending.popleft().result()
+                writer.write(results)
+                rows += len(results)
+                errors += int(results["error"].notna().sum())
+
+        try:
+            for chunk in chunks:
+                pending.append(executor.submit(_score_chunk, chunk, smote_type.value[0], model_name, id_column))
+
+                # NOTE: Bounds the chunks in flight so memory does not grow with the input size
+                drain(limit=workers * 2)
+
+            drain(limit=0)
+        finally:
+            writer.close()
+
+    seconds = time.perf_counter() - time_in
+    peak_main, peak_workers = peak_rss_mb()
+
+    return {
+        "rows": rows,
+        "errors": errors,
+        "seconds": seconds,
+        "rows_per_second": rows / seconds if seconds else 0.0,
+        "peak_rss_mb": peak_main,
+        "peak_worker_rss_mb": peak_workers
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="CSV or Parquet file with the shape of Theft_Over_Open_Data_Cleaned.csv")
+    parser.add_argument("output", help="Output file, written as Parquet if it ends with .parquet, else CSV")
+    parser.add_argument("--model", required=True, choices=sorted(MODEL_FILES[SmoteType.SMOTENC]))
+    parser.add_argument("--smote-type", default="smotenc", choices=[sm_type.value[0] for sm_type in SmoteType])
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE * 10)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--format", choices=["csv", "parquet"], default=None)
+    parser.add_argument("--id-column", default=None, help="Input column copied to the output, e.g. EVENT_UNIQUE_ID")
+    args = parser.parse_args()
+
+    report = score(
+        input_path=args.input,
+        output_path=args.output,
+        model_name=args.model,
+        smote_type=SmoteType.match(args.smote_type),
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        output_format=args.format,
+        id_column=args.id_column
+    )
+
+    log.info(f"Scored {report['rows']} rows ({report['errors']} errors) in {report['seconds']:.2f} seconds.")
+    print(f"""
+    Rows:              {report['rows']}
+    Errors:            {report['errors']}
+    Elapsed:           {report['seconds']:.2f} s
+    Throughput:        {report['rows_per_second']:,.0f} rows/s
+    Peak RSS (main):   {report['peak_rss_mb']:.1f} MB
+    Peak RSS (worker): {report['peak_worker_rss_mb']:.1f} MB
+    """)
+
+
+if __name__ == "__main__":
+    main()
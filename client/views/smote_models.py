@@ -6,15 +6,12 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from model.smote_type import SmoteType
 from core.model_funcs import (
-    safe_load_models,
+    load_model,
     display_model_performance,
     format_classification_report,
     prediction_analysis
 )
-
-import pandas as pd
-from sklearn.preprocessing import LabelEncoder
-from sklearn.model_selection import train_test_split
+from core.dataset import get_split
 
 import streamlit as st
 from dotenv import load_dotenv, find_dotenv
@@ -25,58 +22,23 @@ load_dotenv(find_dotenv())
 CURRENT_DIR = os.path.abspath(__file__)
 ROOT = os.path.dirname(os.path.dirname(os.path.dirname(CURRENT_DIR)))
 MODELS_DIR = os.path.join(ROOT, "server", "models")
-DATA_DIR = os.path.join(ROOT, "server", "data")
 
 
 # NOTE: Safe loading models from ../../server/models folder
-lr_model = safe_load_models(os.path.join(MODELS_DIR, "lr_model.pkl"))
-dt_model = safe_load_models(os.path.join(MODELS_DIR, "dt_model.pkl"))
-rf_model = safe_load_models(os.path.join(MODELS_DIR, "rf_model.pkl"))
-
-toodu_df = pd.read_csv(os.path.join(DATA_DIR, "Theft_Over_Open_Data_Cleaned.csv"))
+lr_model = load_model(os.path.join(MODELS_DIR, "lr_model.pkl"))
+dt_model = load_model(os.path.join(MODELS_DIR, "dt_model.pkl"))
+rf_model = load_model(os.path.join(MODELS_DIR, "rf_model.pkl"))
 
 
 def create_selectbox_options(label_encoder) -> list[tuple[str, int]]:
     return [(f"({encoded}): {title}", encoded) for encoded, title in enumerate(label_encoder.classes_)]
 
 
-theft_over_categories = {
-    "Theft - Misapprop Funds Over",
-    "Theft Over - Bicycle",
-    "Theft Over - Distraction",
-    "Theft Over",
-    "Theft Over - Shoplifting",
-    "Theft Of Utilities Over",
-    "Theft From Mail / Bag / Key"
-}
-toodu_df["OFFENCE"] = toodu_df["OFFENCE"].replace(theft_over_categories, "Theft Over")
-
-le = LabelEncoder()
-premises_le = LabelEncoder()
-location_le = LabelEncoder()
-
-toodu_df["PREMISES_TYPE"] = premises_le.fit_transform(toodu_df["PREMISES_TYPE"])
-toodu_df["LOCATION_TYPE"] = location_le.fit_transform(toodu_df["LOCATION_TYPE"])
-toodu_df["OFFENCE_ENCODED"] = le.fit_transform(toodu_df["OFFENCE"])
-
-categorical_features = [
-    "PREMISES_TYPE",
-    "LOCATION_TYPE"
-]
+# NOTE: The dataset is loaded, encoded and split once per process by the shared data layer
+x_train, x_test, y_train, y_test, label_encoders, le = get_split(SmoteType.SMOTE)
 
-for col in categorical_features:
-    toodu_df[col] = LabelEncoder().fit_transform(toodu_df[col])
-
-premises_options = create_selectbox_options(premises_le)
-location_options = create_selectbox_options(location_le)
-
-x = toodu_df[categorical_features]
-y = toodu_df["OFFENCE_ENCODED"]
-
-x_train, x_test, y_train, y_test = train_test_split(x, y, test_size=0.2, random_state=42)
-
-location_type = list(toodu_df["LOCATION_TYPE"].unique())
-premises_type = list(toodu_df["PREMISES_TYPE"].unique())
+premises_options = create_selectbox_options(label_encoders["PREMISES_TYPE"])
+location_options = create_selectbox_options(label_encoders["LOCATION_TYPE"])
 # endregion
 
 
@@ -92,6 +54,11 @@ models = {
     "Decision Tree (SMOTE)": dt_model,
     "Random Forest (SMOTE)": rf_model,
 }
+model_paths = {
+    "Logistic Regression (SMOTE)": os.path.join(MODELS_DIR, "lr_model.pkl"),
+    "Decision Tree (SMOTE)": os.path.join(MODELS_DIR, "dt_model.pkl"),
+    "Random Forest (SMOTE)": os.path.join(MODELS_DIR, "rf_model.pkl"),
+}
 model_names = list(models.keys())
 
 st.sidebar.title("Discovery Sidebar 🌐")
@@ -113,7 +80,8 @@ On the left side where you see the sidebar, you can select the model you want to
 """)
 st.markdown("---")
 
-display_model_performance(selected_model, x_test, y_test, st.session_state.model)
+display_model_performance(selected_model, x_test, y_test, st.session_state.model,
+                          model_path=model_paths[st.session_state.model])
 
 st.markdown("---")
 
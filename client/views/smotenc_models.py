@@ -6,15 +6,13 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from model.smote_type import SmoteType
 from core.model_funcs import (
-    safe_load_models,
+    load_model,
     display_model_performance,
     prediction_analysis
 )
-
-import pandas as pd
-import pydeck as pdk
-from sklearn.preprocessing import LabelEncoder, StandardScaler
-from sklearn.model_selection import train_test_split
+from core.dataset import get_split, load_toodu_map, MAP_COLUMNS
+from core.map_layers import build_deck
+from core.spatial_index import get_index
 
 import streamlit as st
 from dotenv import load_dotenv, find_dotenv
@@ -25,81 +23,43 @@ load_dotenv(find_dotenv())
 CURRENT_DIR = os.path.abspath(__file__)
 ROOT = os.path.dirname(os.path.dirname(os.path.dirname(CURRENT_DIR)))
 MODELS_DIR = os.path.join(ROOT, "server", "models")
-DATA_DIR = os.path.join(ROOT, "server", "data")
 
 
 # NOTE: Safe loading models from ../../server/models folder (ONLY SMOTENC)
-lr_model_smotenc = safe_load_models(os.path.join(MODELS_DIR, "lr_model_smotenc.pkl"))
-dt_model_smotenc = safe_load_models(os.path.join(MODELS_DIR, "dt_model_smotenc.pkl"))
-rf_model_smotenc = safe_load_models(os.path.join(MODELS_DIR, "rf_model_smotenc.pkl"))
-
-toodu_df = pd.read_csv(os.path.join(DATA_DIR, "Theft_Over_Open_Data_Cleaned.csv"))
+lr_model_smotenc = load_model(os.path.join(MODELS_DIR, "lr_model_smotenc.pkl"))
+dt_model_smotenc = load_model(os.path.join(MODELS_DIR, "dt_model_smotenc.pkl"))
+rf_model_smotenc = load_model(os.path.join(MODELS_DIR, "rf_model_smotenc.pkl"))
+
+# NOTE: Coordinates for Pydeck Map and LONG_WGS84, LAT_WGS84 (shared frame, renamed without mutating it)
+toodu_df_map = load_toodu_map(MAP_COLUMNS).rename(columns={"LAT_WGS84": "LAT", "LONG_WGS84": "LON"})
+
+# NOTE: Zoom level of each map detail, None shows every incident as a point
+MAP_DETAILS = {
+    "City": 10,
+    "District": 12,
+    "Street": 14,
+    "Incidents": None
+}
 
-# NOTE: Coordinates for Pydeck Map and LONG_WGS84, LAT_WGS84
-toodu_df_map = pd.read_csv(os.path.join(DATA_DIR, "Theft_Over_Open_Data_Filtered.csv"))
-toodu_df_map.rename(columns={"LAT_WGS84": "LAT", "LONG_WGS84": "LON"}, inplace=True)
+# NOTE: Downtown Toronto, also the center of the map
+DEFAULT_LON = -79.384331
+DEFAULT_LAT = 43.651070
 
 
 def create_selectbox_options(label_encoder) -> list[tuple[str, int]]:
     return [(f"({encoded}): {title}", encoded) for encoded, title in enumerate(label_encoder.classes_)]
 
 
-theft_over_categories = {
-    "Theft - Misapprop Funds Over",
-    "Theft Over - Bicycle",
-    "Theft Over - Distraction",
-    "Theft Over",
-    "Theft Over - Shoplifting",
-    "Theft Of Utilities Over",
-    "Theft From Mail / Bag / Key"
-}
-toodu_df["OFFENCE"] = toodu_df["OFFENCE"].replace(theft_over_categories, "Theft Over")
-
-le = LabelEncoder()
-premises_le = LabelEncoder()
-location_le = LabelEncoder()
-hood_le = LabelEncoder()
-
-toodu_df["PREMISES_TYPE"] = premises_le.fit_transform(toodu_df["PREMISES_TYPE"])
-toodu_df["LOCATION_TYPE"] = location_le.fit_transform(toodu_df["LOCATION_TYPE"])
-toodu_df["HOOD_158"] = hood_le.fit_transform(toodu_df["HOOD_158"])
-toodu_df["OFFENCE_ENCODED"] = le.fit_transform(toodu_df["OFFENCE"])
-
-categorical_features = [
-    "PREMISES_TYPE",
-    "LOCATION_TYPE",
-    "HOOD_158",
-]
-
-numerical_features = [
-    "LONG_WGS84",
-    "LAT_WGS84",
-    "OCC_HOUR",
-    "REPORT_HOUR",
-]
-
-label_encoders = {}
+# NOTE: The dataset is loaded, encoded and split once per process by the shared data layer
+x_train, x_test, y_train, y_test, label_encoders, le = get_split(SmoteType.SMOTENC)
 
-for col in categorical_features:
-    label_encoders[col] = LabelEncoder()
-    toodu_df[col] = label_encoders[col].fit_transform(toodu_df[col])
+premises_options = create_selectbox_options(label_encoders["PREMISES_TYPE"])
+location_options = create_selectbox_options(label_encoders["LOCATION_TYPE"])
+hood_options = create_selectbox_options(label_encoders["HOOD_158"])
+hood_positions = {title: position for position, title in enumerate(label_encoders["HOOD_158"].classes_)}
 
-premises_options = create_selectbox_options(premises_le)
-location_options = create_selectbox_options(location_le)
-hood_options = create_selectbox_options(hood_le)
-
-# features_filtered = toodu_df[categorical_features]`
-target_filtered = toodu_df["OFFENCE_ENCODED"]
-
-scaler = StandardScaler()
-toodu_df[numerical_features] = scaler.fit_transform(toodu_df[numerical_features])
-features_filtered = toodu_df[categorical_features + numerical_features]
-
-x_train, x_test, y_train, y_test = train_test_split(features_filtered, target_filtered, test_size=0.2, random_state=42)
-
-location_type = list(toodu_df["LOCATION_TYPE"].unique())
-premises_type = list(toodu_df["PREMISES_TYPE"].unique())
-hood_158 = list(toodu_df["HOOD_158"].unique())
+# NOTE: KD-tree over the incidents, shared with /api/v1/incidents/nearby (built once per process)
+incident_index = get_index()
 # endregion
 
 st.set_page_config(
@@ -114,6 +74,11 @@ models = {
     "Decision Tree (SMOTENC)": dt_model_smotenc,
     "Random Forest (SMOTENC)": rf_model_smotenc,
 }
+model_paths = {
+    "Logistic Regression (SMOTENC)": os.path.join(MODELS_DIR, "lr_model_smotenc.pkl"),
+    "Decision Tree (SMOTENC)": os.path.join(MODELS_DIR, "dt_model_smotenc.pkl"),
+    "Random Forest (SMOTENC)": os.path.join(MODELS_DIR, "rf_model_smotenc.pkl"),
+}
 model_names = list(models.keys())
 
 st.sidebar.title("Discovery Sidebar 🌐")
@@ -143,7 +108,8 @@ On the left side where you see the sidebar, you can select the model you want to
 """)
 st.markdown("---")
 
-display_model_performance(selected_model, x_test, y_test, st.session_state.model)
+display_model_performance(selected_model, x_test, y_test, st.session_state.model,
+                          model_path=model_paths[st.session_state.model])
 
 st.markdown("---")
 
@@ -163,23 +129,33 @@ To refer to the endpoints, they are the following:
 """)
 
 user_input_smotenc = st.session_state.get("user_inputs_smotenc", [])
+
+# NOTE: Coordinates are typed in (bounded by the dataset), HOOD_158 is filled from the closest incident
+long_wgs84 = st.number_input("LONG_WGS84", min_value=float(toodu_df_map["LON"].min()),
+                             max_value=float(toodu_df_map["LON"].max()), value=DEFAULT_LON, format="%.6f")
+lat_wgs84 = st.number_input("LAT_WGS84", min_value=float(toodu_df_map["LAT"].min()),
+                            max_value=float(toodu_df_map["LAT"].max()), value=DEFAULT_LAT, format="%.6f")
+neighbourhood = incident_index.neighbourhood(long_wgs84, lat_wgs84)
+hood_index = hood_positions.get(neighbourhood["HOOD_158"], 0)
+
 entry_format = {
     # NOTE: Categorical Inputs
     "LOCATION_TYPE": st.selectbox("LOCATION_TYPE", options=location_options, format_func=lambda n: n[0]),
     "PREMISES_TYPE": st.selectbox("PREMISES_TYPE", options=premises_options, format_func=lambda n: n[0]),
-    "HOOD_158": st.selectbox("HOOD_158", options=hood_options, format_func=lambda n: n[0]),
+    "HOOD_158": st.selectbox("HOOD_158", options=hood_options, index=hood_index, format_func=lambda n: n[0],
+                             help=f"Filled from the closest incident ({neighbourhood['NEIGHBOURHOOD_158']}, "
+                                  f"{neighbourhood['DISTANCE_M']:.0f} m away)"),
 
     # NOTE: Numerical Inputs
-    "LONG_WGS84": st.select_slider("LONG_WGS84",
-                                   options=toodu_df_map["LON"].unique(),
-                                   value=toodu_df_map["LON"].unique()[0]),
-    "LAT_WGS84": st.select_slider("LAT_WGS84",
-                                  options=toodu_df_map["LAT"].unique(),
-                                  value=toodu_df_map["LAT"].unique()[0]),
+    "LONG_WGS84": long_wgs84,
+    "LAT_WGS84": lat_wgs84,
     "OCC_HOUR": st.number_input("OCC_HOUR", format="%.2f"),
     "REPORT_HOUR": st.number_input("REPORT_HOUR", format="%.2f"),
 }
 
+with st.expander("Incidents near this point"):
+    st.dataframe(incident_index.nearest(long_wgs84, lat_wgs84, k=10), use_container_width=True)
+
 with st.container(border=True):
     col1, col2 = st.columns(2)
 
@@ -207,39 +183,10 @@ with st.expander("Current JSON Request", expanded=True):
         predictions based on the entries you provided above.
     """)
 
-st.pydeck_chart(
-    pdk.Deck(
-        map_style="mapbox://styles/mapbox/dark-v10",
-        initial_view_state=pdk.ViewState(
-            latitude=43.651070,
-            longitude=-79.384331,
-            zoom=10,
-            pitch=45,
-        ),
-        layers=[
-            pdk.Layer(
-                "ScatterplotLayer",
-                data=toodu_df_map,
-                get_position=["LON", "LAT"],
-                get_radius=40,
-                get_color=[255, 0, 0],
-                pickable=True,
-                auto_highlight=True,
-            ),
-        ],
-        tooltip={
-            "html": "LAT: <b>{LAT}</b><br>LON: <b>{LON}</b><br>OFFENCE: <b>{OFFENCE}</b><br>PREMISES_TYPE: <b>{"
-                    "PREMISES_TYPE}</b>",
-            "style": {
-                "backgroundColor": "rgba(0, 0, 0, 0.7)",
-                "color": "white",
-                "padding": "10px",
-                "fontSize": "14px",
-                "borderRadius": "8px"
-            },
-        },
-    )
-)
+# NOTE: The incidents are aggregated into hexagons server side, so a rerun sends hundreds of cells instead of
+# every incident; the size of the hexagons follows the selected detail (zoom) of the map
+map_detail = st.radio("Map detail", options=list(MAP_DETAILS), index=0, horizontal=True)
+st.pydeck_chart(build_deck(MAP_DETAILS[map_detail]))
 
 if st.button("Predict Probabilities 🔮", use_container_width=True):
     st.balloons()
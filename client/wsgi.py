@@ -0,0 +1,20 @@
+"""
+WSGI entry point of the API for production servers.
+
+Importing ``app`` registers the blueprint and preloads every model, so with ``preload_app``
+(see ``gunicorn.conf.py``) the models are loaded once in the master process and the forked
+workers share their memory pages. Models exported to ``.npz`` (``MODEL_FORMAT=npz``, see
+``export_models.py``) are memory mapped, so their pages stay shared by the workers even when
+a worker reloads a model.
+
+Usage (from the ``client`` directory):
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+
+from app import app
+
+application = app